@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Archive Input/Output
+อ่านไฟล์ Markdown จาก zip/tar ทีละ member และเขียน HTML เป็น member ของ zip/tar โดยไม่แตกไฟล์ลงดิสก์
+tar ถูกอ่านแบบ stream (r|*) ตามลำดับใน archive หน่วยความจำจึงขึ้นกับขนาดของ member ไม่ใช่ขนาดของทั้ง archive
+(tarfile/zipfile/calendar ถูก import เมื่อใช้งานจริง เพื่อไม่ให้การเริ่มโปรแกรมทั่วไปช้าลง)
+"""
+
+import gzip
+import io
+import os
+import posixpath
+import tempfile
+import time
+from collections import namedtuple
+
+from output_writer import replace_output, same_file, write_output
+from scanner import DirectoryScanner
+
+ZIP_EXTENSIONS = ('.zip',)
+TAR_EXTENSIONS = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# เวลาแรกสุดที่ zip เก็บได้ (1980-01-01 UTC)
+ZIP_MIN_MTIME = 315532800
+
+# name: path ใน archive (คั่นด้วย /), data: เนื้อหา (bytes), mtime: เวลาแก้ไข (วินาที)
+ArchiveMember = namedtuple('ArchiveMember', ['name', 'data', 'mtime'])
+
+
+def archive_format(path: str) -> str:
+    """ชนิดของ archive จากนามสกุลไฟล์ ('zip', 'tar' หรือ None ถ้าไม่ใช่ archive)"""
+    lower = path.lower()
+    if lower.endswith(ZIP_EXTENSIONS):
+        return 'zip'
+    if lower.endswith(TAR_EXTENSIONS):
+        return 'tar'
+    return None
+
+
+def is_archive(path: str) -> bool:
+    """ตรวจสอบว่า path เป็นไฟล์ zip/tar (ตามนามสกุล) หรือไม่"""
+    return archive_format(path) is not None
+
+
+def member_name(name: str) -> str:
+    """path ของ member ในรูปแบบ relative ที่ปลอดภัย (None ถ้าเป็น path แบบ absolute หรือออกนอก archive ด้วย ..)"""
+    name = name.replace('\\', '/')
+    if name.startswith('/') or (len(name) > 1 and name[1] == ':'):
+        return None
+    normalized = posixpath.normpath(name)
+    if normalized in ('.', '..') or normalized.startswith('../'):
+        return None
+    return normalized
+
+
+def archive_href(asset_name: str, page: str) -> str:
+    """URL แบบ relative จากหน้า HTML ไปยัง asset (ทั้งสองเป็น path ใน archive)"""
+    return posixpath.relpath(asset_name, posixpath.dirname(page) or '.')
+
+
+def iter_archive_members(path: str, include=None, exclude=None):
+    """yield ArchiveMember ของไฟล์ Markdown ใน archive ทีละ member ตามลำดับใน archive
+
+    include/exclude คือ glob patterns แบบเดียวกับการสแกนโฟลเดอร์ (ค่าเริ่มต้น: *.md)
+    """
+    import calendar
+    import tarfile
+    import zipfile
+
+    scanner = DirectoryScanner(os.curdir, include, exclude, use_ignore_file=False)
+    seen = set()
+
+    def accepted(raw_name):
+        name = member_name(raw_name)
+        if name is None:
+            print(f"Warning: Skipping unsafe archive member: {raw_name}")
+            return None
+        if not scanner.accepts_relative(name):
+            return None
+        if name in seen:
+            print(f"Warning: Skipping duplicate archive member: {raw_name}")
+            return None
+        seen.add(name)
+        return name
+
+    try:
+        if archive_format(path) == 'zip':
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    if info.is_dir():
+                        continue
+                    name = accepted(info.filename)
+                    if name is not None:
+                        yield ArchiveMember(name, archive.read(info), calendar.timegm(info.date_time))
+        else:
+            with tarfile.open(path, 'r|*') as archive:
+                for info in archive:
+                    if not info.isfile():
+                        continue
+                    name = accepted(info.name)
+                    if name is not None:
+                        # อ่านให้ครบก่อนไป member ถัดไป (stream อ่านย้อนหลังไม่ได้)
+                        yield ArchiveMember(name, archive.extractfile(info).read(), info.mtime)
+    except (OSError, tarfile.TarError, zipfile.BadZipFile) as e:
+        raise Exception(f"Error reading archive {path}: {e}")
+
+
+def iter_file_members(files: list, root: str):
+    """yield ArchiveMember ของไฟล์บนดิสก์ (ชื่อ member คือ path แบบ relative กับ root) ทีละไฟล์"""
+    for path in files:
+        name = os.path.relpath(os.path.abspath(path), os.path.abspath(root)).replace(os.sep, '/')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            mtime = os.path.getmtime(path)
+        except OSError as e:
+            raise Exception(f"Error reading file {path}: {e}")
+        yield ArchiveMember(name, data, mtime)
+
+
+class ArchiveWriter:
+    """เขียน member ลง zip/tar ผ่านไฟล์ชั่วคราว ซึ่งแทนที่ไฟล์เดิมเมื่อ close()
+
+    เวลาของ member มาจากต้นฉบับและ header ของ gzip ไม่มีเวลา archive ที่สร้างซ้ำจากต้นฉบับเดิมจึงเหมือนเดิมทุก byte
+    และไฟล์เดิมไม่ถูกแตะ (written เป็น False) ใช้กับ with: archive ที่ไม่สมบูรณ์ถูกทิ้งเมื่อเกิด exception
+    """
+
+    def __init__(self, path: str):
+        import tarfile
+        import zipfile
+
+        self.path = path
+        self.names = set()
+        self.written = False
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        self._file = os.fdopen(fd, 'w+b')
+        self._gzip = None
+        lower = path.lower()
+        if archive_format(path) == 'zip':
+            self._zip = zipfile.ZipFile(self._file, 'w', zipfile.ZIP_DEFLATED)
+            self._tar = None
+            return
+        self._zip = None
+        if lower.endswith(('.tar.gz', '.tgz')):
+            self._gzip = gzip.GzipFile(filename='', mode='wb', fileobj=self._file, mtime=0)
+            self._tar = tarfile.open(fileobj=self._gzip, mode='w', format=tarfile.PAX_FORMAT)
+        elif lower.endswith(('.tar.bz2', '.tbz2')):
+            self._tar = tarfile.open(fileobj=self._file, mode='w:bz2', format=tarfile.PAX_FORMAT)
+        elif lower.endswith(('.tar.xz', '.txz')):
+            self._tar = tarfile.open(fileobj=self._file, mode='w:xz', format=tarfile.PAX_FORMAT)
+        else:
+            self._tar = tarfile.open(fileobj=self._file, mode='w', format=tarfile.PAX_FORMAT)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def add(self, name: str, data: bytes, mtime: float) -> bool:
+        """เพิ่ม member (ชื่อซ้ำกับ member ที่เพิ่มไปแล้วถือเป็นข้อผิดพลาด) คืนค่า True เสมอ"""
+        import tarfile
+        import zipfile
+
+        if name in self.names:
+            raise Exception(f"Duplicate archive member: {name}")
+        self.names.add(name)
+        if self._zip is not None:
+            info = zipfile.ZipInfo(name, date_time=time.gmtime(max(mtime, ZIP_MIN_MTIME))[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            self._zip.writestr(info, data)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mtime = int(mtime)
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(data))
+        return True
+
+    def _close_archive(self):
+        if self._zip is not None:
+            self._zip.close()
+        else:
+            self._tar.close()
+        if self._gzip is not None:
+            self._gzip.close()
+        self._file.close()
+
+    def close(self):
+        """ปิด archive และแทนที่ไฟล์เดิม (ถ้าเนื้อหาต่างจากเดิม)"""
+        try:
+            self._close_archive()
+            if not same_file(self._temp_path, self.path):
+                replace_output(self._temp_path, self.path)
+                self.written = True
+        finally:
+            if os.path.exists(self._temp_path):
+                os.unlink(self._temp_path)
+
+    def abort(self):
+        """ทิ้ง archive ที่เขียนไม่ครบ (ไฟล์เดิมไม่ถูกแตะ)"""
+        try:
+            self._close_archive()
+        except Exception:
+            pass
+        if os.path.exists(self._temp_path):
+            os.unlink(self._temp_path)
+
+
+class DirectoryWriter:
+    """เขียน member เป็นไฟล์ใน output_dir (อินพุตเป็น archive แต่ output เป็นโฟลเดอร์) ด้วย interface เดียวกับ ArchiveWriter"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.written = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add(self, name: str, data: bytes, mtime: float) -> bool:
+        """เขียนไฟล์เมื่อเนื้อหาต่างจากไฟล์เดิม คืนค่า True ถ้าไฟล์ถูกเขียนใหม่"""
+        written = write_output(os.path.join(self.path, *name.split('/')), data)
+        self.written = self.written or written
+        return written
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Shared Page Assets
+สไตล์ชีตของหน้า HTML และการเขียนไฟล์ asset แบบตั้งชื่อตาม hash ของเนื้อหา
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import os
+import re
+from functools import lru_cache
+
+from output_writer import write_bytes_atomic, write_output, write_text_atomic
+
+# CSS ของหน้า HTML แยกตาม feature ที่หน้าใช้ (base ใส่ทุกหน้า ส่วนอื่นใส่เฉพาะหน้าที่มี feature นั้น)
+CSS_SECTIONS = {
+    'base': """\
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    max-width: 1200px;
+    margin: 0 auto;
+    padding: 20px;
+    color: #333;
+}
+h1, h2, h3, h4, h5, h6 {
+    color: #2c3e50;
+    margin-top: 2em;
+    margin-bottom: 1em;
+}
+h1 {
+    border-bottom: 3px solid #3498db;
+    padding-bottom: 10px;
+}
+h2 {
+    border-bottom: 2px solid #ecf0f1;
+    padding-bottom: 5px;
+}
+code {
+    background-color: #f8f9fa;
+    padding: 2px 4px;
+    border-radius: 3px;
+    font-family: 'Courier New', monospace;
+}
+img {
+    max-width: 100%;
+    height: auto;
+    display: block;
+    margin: 20px auto;
+    box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+}
+blockquote {
+    border-left: 4px solid #3498db;
+    margin: 20px 0;
+    padding: 10px 20px;
+    background-color: #f8f9fa;
+}
+""",
+    'code': """\
+pre {
+    background-color: #f8f9fa;
+    padding: 15px;
+    border-radius: 5px;
+    overflow-x: auto;
+    border-left: 4px solid #3498db;
+}
+""",
+    'table': """\
+table {
+    border-collapse: collapse;
+    width: 100%;
+    margin: 20px 0;
+}
+th, td {
+    border: 1px solid #ddd;
+    padding: 12px;
+    text-align: left;
+}
+th {
+    background-color: #f2f2f2;
+    font-weight: bold;
+}
+""",
+    'toc': """\
+.toc {
+    background-color: #f8f9fa;
+    padding: 20px;
+    border-radius: 5px;
+    margin: 20px 0;
+}
+
+""",
+    'nav': """\
+/* Site navigation */
+.site-nav {
+    font-size: 14px;
+    border-bottom: 1px solid #e1e5e9;
+    margin-bottom: 20px;
+}
+
+.site-nav ul {
+    list-style: none;
+    padding-left: 1em;
+    margin: 5px 0;
+}
+
+.site-nav .site-folder {
+    color: #6a737d;
+    margin-top: 5px;
+}
+
+.site-nav .current > a {
+    font-weight: bold;
+}
+
+""",
+    'search': """\
+/* Search box */
+.site-search input {
+    width: 100%;
+    padding: 6px 10px;
+    border: 1px solid #e1e5e9;
+    border-radius: 4px;
+    font-size: 14px;
+}
+
+.site-search ul {
+    list-style: none;
+    padding-left: 0;
+    margin: 5px 0 20px;
+}
+
+""",
+    'mermaid': """\
+/* Mermaid Diagram Styles */
+.mermaid-diagram {
+    border: 2px solid #e1e5e9;
+    border-radius: 8px;
+    padding: 20px;
+    margin: 20px 0;
+    background-color: #f8f9fa;
+}
+
+.mermaid-diagram h4 {
+    margin-top: 0;
+    color: #0366d6;
+    border-bottom: 1px solid #e1e5e9;
+    padding-bottom: 10px;
+}
+
+.mermaid-container {
+    background-color: white;
+    border: 1px solid #e1e5e9;
+    border-radius: 6px;
+    padding: 15px;
+    margin: 15px 0;
+    overflow-x: auto;
+}
+
+.mermaid {
+    text-align: center;
+}
+
+.mermaid-svg {
+    text-align: center;
+}
+
+.mermaid-svg svg {
+    max-width: 100%;
+    height: auto;
+}
+
+.mermaid-code {
+    background-color: #f6f8fa;
+    border: 1px solid #e1e5e9;
+    border-radius: 6px;
+    padding: 15px;
+    margin: 15px 0;
+}
+
+.mermaid-code pre {
+    margin: 0;
+    overflow-x: auto;
+}
+
+.mermaid-alternatives {
+    margin-top: 15px;
+}
+
+.mermaid-alternatives ol {
+    margin: 10px 0;
+}
+
+.mermaid-alternatives li {
+    margin: 5px 0;
+}
+
+.mermaid-alternatives a {
+    color: #0366d6;
+    text-decoration: none;
+}
+
+.mermaid-alternatives a:hover {
+    text-decoration: underline;
+}
+
+details {
+    margin-top: 15px;
+}
+
+summary {
+    cursor: pointer;
+    font-weight: bold;
+    color: #0366d6;
+}
+
+textarea {
+    font-family: 'Courier New', monospace;
+    font-size: 12px;
+    border: 1px solid #e1e5e9;
+    border-radius: 4px;
+    padding: 10px;
+    resize: vertical;
+}
+""",
+}
+
+# CSS หลักของหน้า HTML ที่สร้าง (ทุก feature สำหรับสไตล์ชีตที่ใช้ร่วมกัน)
+PAGE_CSS = ''.join(CSS_SECTIONS.values())
+
+# feature ของหน้าที่ตรวจจาก HTML ที่แปลงแล้ว: ชื่อ -> จุดเริ่มของแท็กที่พบเฉพาะเมื่อหน้าใช้ feature นั้น
+# (< ในข้อความของหน้าถูก escape เป็น &lt; เสมอ จึงตรงกับแท็กจริงเท่านั้น ไม่ใช่โค้ดตัวอย่างที่พูดถึงแท็ก)
+FEATURE_MARKERS = {
+    'code': ('<pre>', '<pre '),
+    'table': ('<table>', '<table '),
+    'toc': ('<div class="toc"',),
+    'nav': ('<nav class="site-nav"',),
+    'search': ('<div class="site-search"',),
+    'mermaid': ('<div class="mermaid-',),
+}
+
+# ชื่อ class ของ token ใน code block ที่ Pygments highlight แล้ว
+TOKEN_CLASS_PATTERN = re.compile(r'<span class="([\w-]+)">')
+
+# แท็กที่ครอบ code block ของ codehilite (class อื่นจาก attr_list อยู่ก่อน highlight) และเลขบรรทัด
+HIGHLIGHT_BLOCK_PATTERN = re.compile(r'<div class="(?:[^"]* )?highlight"')
+LINENOS_PATTERN = re.compile(r'<\w+ class="linenos')
+
+# กฎ CSS ของ Pygments ที่ใช้กับ token class เดียว (.highlight .k { ... })
+PYGMENTS_RULE_PATTERN = re.compile(r'^\.highlight \.([\w-]+) ')
+
+# Mermaid.js จาก CDN (ใช้เมื่อไม่ได้ระบุไฟล์ในเครื่องด้วย --mermaid-js)
+MERMAID_CDN_URL = "https://cdn.jsdelivr.net/npm/mermaid@10.6.1/dist/mermaid.min.js"
+
+# theme ของ Mermaid ทั้งในเบราว์เซอร์และตอน render ล่วงหน้า (mermaid_render)
+MERMAID_CONFIG = {
+    'theme': 'default',
+    'themeVariables': {
+        'primaryColor': '#3498db',
+        'primaryTextColor': '#2c3e50',
+        'primaryBorderColor': '#2980b9',
+        'lineColor': '#34495e',
+        'secondaryColor': '#ecf0f1',
+        'tertiaryColor': '#ffffff',
+    },
+}
+
+# diagrams ถูก render โดย script ของ MermaidPage จึงปิด startOnLoad
+MERMAID_INIT_SCRIPT = (f"<script>mermaid.initialize("
+                       f"{json.dumps(dict(MERMAID_CONFIG, startOnLoad=False), sort_keys=True)});</script>")
+
+# จำนวนตัวอักษรของ hash ที่ใส่ในชื่อไฟล์ asset
+ASSET_HASH_LENGTH = 12
+
+# ชื่อ asset ของ Mermaid.js ที่คัดลอกจากไฟล์ในเครื่อง (mermaid.<hash>.js)
+MERMAID_ASSET_PREFIX = 'mermaid'
+
+# asset ที่เก็บ Mermaid diagrams ({id: source}) ของทั้ง site เป็น script (โหลดได้แม้เปิดหน้าผ่าน file://)
+DIAGRAMS_ASSET_NAME = 'md2html-diagrams.js'
+DIAGRAMS_ASSET_PREFIX = 'window.MD2HTML_DIAGRAMS = Object.assign(window.MD2HTML_DIAGRAMS || {}, '
+DIAGRAMS_ASSET_SUFFIX = ');\n'
+
+
+def pygments_css(css_class: str = 'highlight') -> str:
+    """สร้าง CSS ของ Pygments สำหรับ code blocks ที่ codehilite สร้าง"""
+    from pygments.formatters import HtmlFormatter
+    return HtmlFormatter().get_style_defs(f'.{css_class}') + '\n'
+
+
+def build_stylesheet() -> str:
+    """รวม CSS ของหน้าและ CSS ของ Pygments เป็นสไตล์ชีตเดียว"""
+    return PAGE_CSS + '\n/* Syntax highlighting (Pygments) */\n' + pygments_css()
+
+
+@lru_cache(maxsize=1)
+def _pygments_rules() -> tuple:
+    """กฎ CSS ของ Pygments เป็น (token class หรือ None สำหรับกฎทั่วไป, บรรทัด CSS)"""
+    rules = []
+    for line in pygments_css().splitlines():
+        match = PYGMENTS_RULE_PATTERN.match(line)
+        if match:
+            rules.append((match.group(1), line))
+        else:
+            # กฎของเลขบรรทัดใช้เฉพาะ code blocks ที่เปิด linenums
+            rules.append(('linenos' if 'linenos' in line else None, line))
+    return tuple(rules)
+
+
+def page_features(body_html: str) -> frozenset:
+    """feature ที่หน้าใช้ (code, table, toc, nav, search, mermaid) จาก HTML ที่แปลงแล้ว"""
+    return frozenset(name for name, markers in FEATURE_MARKERS.items()
+                     if any(marker in body_html for marker in markers))
+
+
+def token_classes(body_html: str) -> frozenset:
+    """token class ของ Pygments ที่ปรากฏใน code blocks ของหน้า"""
+    if HIGHLIGHT_BLOCK_PATTERN.search(body_html) is None:
+        return frozenset()
+    classes = set(TOKEN_CLASS_PATTERN.findall(body_html))
+    if LINENOS_PATTERN.search(body_html) is not None:
+        classes.add('linenos')
+    return frozenset(classes)
+
+
+@lru_cache(maxsize=256)
+def page_css(features: frozenset = None, classes: frozenset = None) -> str:
+    """CSS เฉพาะส่วนที่หน้าใช้และกฎ Pygments ของ token classes ที่พบ (features=None = สไตล์ชีตเต็ม)"""
+    if features is None:
+        return build_stylesheet()
+    css = ''.join(section for name, section in CSS_SECTIONS.items() if name == 'base' or name in features)
+    if classes:
+        css += '\n/* Syntax highlighting (Pygments) */\n' + ''.join(
+            line + '\n' for token, line in _pygments_rules() if token is None or token in classes)
+    return css
+
+
+@lru_cache(maxsize=64)
+def page_head(stylesheet_href: str = None, features: frozenset = None, classes: frozenset = None) -> str:
+    """ส่วน <head> ของหน้า (สไตล์ชีต) สร้างครั้งเดียวต่อชุดของ arguments
+
+    ถ้าไม่ได้ลิงก์สไตล์ชีตภายนอก จะฝัง CSS เฉพาะ features ของหน้า (None = ทุกส่วน เช่น ตอน streaming
+    ที่ต้องเขียน <head> ก่อนรู้เนื้อหา) และ CSS ของ Pygments เฉพาะ token classes ที่หน้าใช้
+    Mermaid.js ไม่อยู่ใน <head> แต่ถูกโหลดท้ายหน้าเฉพาะหน้าที่มี diagram (ดู mermaid_script)
+    """
+    if stylesheet_href:
+        return f'<link rel="stylesheet" href="{html.escape(stylesheet_href)}">'
+    return f"<style>\n{page_css(features, classes)}    </style>"
+
+
+def page_head_for(stylesheet_href: str, body_html: str) -> str:
+    """ส่วน <head> ที่มีเฉพาะ CSS ที่ body_html ใช้"""
+    if stylesheet_href:
+        return page_head(stylesheet_href)
+    return page_head(None, page_features(body_html), token_classes(body_html))
+
+
+def inline_script(code: str) -> str:
+    """<script> ที่ฝังโค้ด JavaScript ได้อย่างปลอดภัย (escape </script ที่อยู่ในโค้ด)"""
+    return "<script>\n" + re.sub(r'</(script)', r'<\\/\1', code, flags=re.I) + "\n</script>"
+
+
+@lru_cache(maxsize=16)
+def mermaid_script(src: str = None, inline_path: str = None) -> str:
+    """HTML ที่โหลด Mermaid.js และตั้งค่า theme
+
+    src: URL ของไฟล์ Mermaid.js (ค่าเริ่มต้น CDN)
+    inline_path: ฝังโค้ดจากไฟล์นี้ในหน้าแทน (path ตั้งชื่อตาม hash ของเนื้อหา จึง cache ตาม path ได้)
+    """
+    if inline_path:
+        try:
+            with open(inline_path, 'r', encoding='utf-8') as f:
+                loader = inline_script(f.read())
+        except OSError as e:
+            raise Exception(f"Error reading Mermaid script {inline_path}: {e}")
+    else:
+        loader = f'<script src="{html.escape(src or MERMAID_CDN_URL)}"></script>'
+    return f"<!-- Mermaid.js for interactive diagrams -->\n{loader}\n{MERMAID_INIT_SCRIPT}"
+
+
+def hashed_asset_name(prefix: str, extension: str, content: str) -> str:
+    """ตั้งชื่อไฟล์ asset ตาม hash ของเนื้อหา เช่น md2html.<hash>.css"""
+    digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:ASSET_HASH_LENGTH]
+    return f"{prefix}.{digest}.{extension}"
+
+
+def write_hashed_asset(output_dir: str, prefix: str, extension: str, content: str) -> str:
+    """เขียนไฟล์ asset ครั้งเดียว (ข้ามถ้ามีไฟล์ชื่อเดียวกันอยู่แล้ว) และคืน path ของไฟล์"""
+    asset_path = os.path.join(output_dir, hashed_asset_name(prefix, extension, content))
+    if not os.path.exists(asset_path):
+        write_text_atomic(asset_path, content)
+    return asset_path
+
+
+def read_diagram_asset(asset_path: str) -> dict:
+    """diagrams ใน asset ของ site ({} ถ้ายังไม่มีไฟล์หรืออ่านไม่ได้)"""
+    try:
+        with open(asset_path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        if text.startswith(DIAGRAMS_ASSET_PREFIX) and text.endswith(DIAGRAMS_ASSET_SUFFIX):
+            return json.loads(text[len(DIAGRAMS_ASSET_PREFIX):-len(DIAGRAMS_ASSET_SUFFIX)])
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def write_diagram_asset(asset_path: str, diagrams: dict, replace: bool = False) -> bool:
+    """รวม diagrams เข้ากับ asset ของ site (replace=True เขียนใหม่เฉพาะ diagrams ที่ให้มา)
+
+    diagrams เดิมถูกเก็บไว้ เพราะหน้าที่ไม่ได้แปลงใหม่ (cached) ยังอ้างอิงอยู่
+    คืนค่า True ถ้าไฟล์ถูกเขียนใหม่
+    """
+    existing = {} if replace else read_diagram_asset(asset_path)
+    merged = dict(existing, **diagrams)
+    if not replace and merged == existing and os.path.exists(asset_path):
+        return False
+    return write_output(asset_path, diagram_asset_content(merged).encode('utf-8'))
+
+
+def diagram_asset_content(diagrams: dict) -> str:
+    """เนื้อหาของ asset ของ site ที่เก็บ diagrams"""
+    content = json.dumps(diagrams, ensure_ascii=False, sort_keys=True, indent=0)
+    return DIAGRAMS_ASSET_PREFIX + content + DIAGRAMS_ASSET_SUFFIX
+
+
+def vendor_mermaid_script(source_path: str, output_dir: str) -> str:
+    """คัดลอก Mermaid.js จากไฟล์ในเครื่องเป็น asset mermaid.<hash>.js ใน output_dir และคืน path"""
+    try:
+        with open(source_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except OSError as e:
+        raise Exception(f"Error reading Mermaid script {source_path}: {e}")
+    return write_hashed_asset(output_dir, MERMAID_ASSET_PREFIX, 'js', content)
+
+
+def asset_compressors() -> list:
+    """[(นามสกุล, ฟังก์ชันบีบอัด)] ของสำเนาบีบอัดของ asset (.gz และ .br ถ้าติดตั้ง brotli)"""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+
+    compressors = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return compressors
+
+
+def precompress_asset(asset_path: str) -> list:
+    """เขียน asset_path.gz (และ .br ถ้าติดตั้ง brotli) สำหรับ static hosting ที่ส่งไฟล์บีบอัดไว้แล้ว
+
+    ข้ามไฟล์ที่บีบอัดไว้แล้วและใหม่กว่าต้นฉบับ คืนรายการไฟล์ที่เขียน
+    """
+    compressors = asset_compressors()
+    source_mtime = os.path.getmtime(asset_path)
+    data = None
+    written = []
+    for suffix, compress in compressors:
+        target = asset_path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+            continue
+        if data is None:
+            with open(asset_path, 'rb') as f:
+                data = f.read()
+        write_bytes_atomic(target, compress(data))
+        written.append(target)
+    return written
+
+
+def write_stylesheet(output_dir: str) -> str:
+    """เขียนสไตล์ชีตที่ใช้ร่วมกัน md2html.<hash>.css ลงใน output_dir"""
+    return write_hashed_asset(output_dir, 'md2html', 'css', build_stylesheet())
+
+
+def asset_href(asset_path: str, page_path: str) -> str:
+    """สร้าง URL แบบ relative จากหน้า HTML ไปยังไฟล์ asset"""
+    page_dir = os.path.dirname(os.path.abspath(page_path))
+    return os.path.relpath(os.path.abspath(asset_path), page_dir).replace(os.sep, '/')
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Asyncio Conversion API
+แปลง Markdown จาก event loop ของ asyncio (เช่น aiohttp/FastAPI) โดยส่งงาน CPU และการอ่าน/เขียนไฟล์
+ไปทำใน executor (thread หรือ process) พร้อมจำกัดจำนวนงานที่ทำพร้อมกันและจำนวนงานที่รอได้
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_converter import convert_task, create_converter
+from build_cache import read_source
+
+# converter ของ worker process แยกตามการตั้งค่า (สร้างเมื่อถูกใช้ครั้งแรกใน process นั้น)
+_process_converters = {}
+
+
+class ConverterBusyError(Exception):
+    """มีงานค้างเกิน max_pending (เช่น ให้ web service ตอบ 503 แทนการรอ)"""
+
+
+def _convert_content(converter, content: str, title: str, stylesheet_href: str) -> str:
+    return converter.convert_to_html(content, title, stylesheet_href)
+
+
+def _convert_file(converter, input_path: str, title: str, stylesheet_href: str) -> str:
+    content, _ = read_source(input_path)
+    return converter.convert_to_html(content, title, stylesheet_href)
+
+
+def _write_file(converter, task: dict) -> dict:
+    os.makedirs(os.path.dirname(os.path.abspath(task['output'])), exist_ok=True)
+    return convert_task(converter, task)
+
+
+def _warm(converter):
+    converter.warm()
+
+
+def _started(converter):
+    """งานว่างที่ทำให้ executor เริ่ม worker process (converter อุ่นเครื่องใน _init_process แล้ว)"""
+
+
+def _process_converter(config: tuple):
+    """converter ของ worker process ปัจจุบัน (ลบไฟล์ชั่วคราวเมื่อ process ปิดตัว)"""
+    converter = _process_converters.get(config)
+    if converter is None:
+        import multiprocessing.util
+
+        include_images, template_path, highlight_cache_dir = config
+        converter = create_converter(include_images, {
+            'template_path': template_path,
+            'highlight_cache_dir': highlight_cache_dir,
+        })
+        multiprocessing.util.Finalize(None, converter.cleanup, exitpriority=10)
+        _process_converters[config] = converter
+    return converter
+
+
+def _init_process(config: tuple):
+    """initializer ของ worker process: สร้างและอุ่นเครื่อง converter ก่อนรับงานแรก (ทุก worker ที่ executor เริ่ม)"""
+    _process_converter(config).warm()
+
+
+def _run_in_process(config: tuple, function, *args):
+    """จุดเริ่มงานใน worker process"""
+    return function(_process_converter(config), *args)
+
+
+class AsyncMarkdownConverter:
+    """MarkdownConverter สำหรับ asyncio
+
+    executor: 'thread' (converter ตัวเดียวใช้ร่วมกันทุก thread), 'process' (หนึ่ง converter ต่อ process
+    ใช้ CPU ได้หลาย core) หรือ Executor ที่สร้างไว้แล้ว
+    max_concurrency: จำนวนงานที่ส่งเข้า executor พร้อมกัน (ค่าเริ่มต้น = max_workers)
+    max_pending: จำนวนงานสูงสุดที่รอ + กำลังทำ ถ้าเกินจะ raise ConverterBusyError ทันที (None = ไม่จำกัด)
+    """
+
+    def __init__(self, executor='thread', max_workers: int = None, max_concurrency: int = None,
+                 max_pending: int = None, include_images: bool = True, template_path: str = None,
+                 highlight_cache_dir: str = None):
+        if isinstance(executor, str) and executor not in ('thread', 'process'):
+            raise Exception(f"Unknown executor type: {executor}")
+        self.max_workers = max_workers or min(32, os.cpu_count() or 1)
+        self.max_concurrency = max_concurrency or self.max_workers
+        self.max_pending = max_pending
+        self._config = (include_images, template_path, highlight_cache_dir)
+
+        self._executor = None if isinstance(executor, str) else executor
+        self._executor_type = executor if isinstance(executor, str) else None
+        self._owns_executor = self._executor is None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self.pending = 0
+        self.running = 0
+
+        # converter ที่ใช้ร่วมกันเมื่อรันใน thread (ConverterPool ทำให้ใช้จากหลาย thread ได้)
+        self._converter = None
+        self._converter_lock = threading.Lock()
+
+    @property
+    def uses_processes(self) -> bool:
+        if self._executor_type is not None:
+            return self._executor_type == 'process'
+        from concurrent.futures import ProcessPoolExecutor
+        return isinstance(self._executor, ProcessPoolExecutor)
+
+    def _get_executor(self):
+        if self._executor is None:
+            if self._executor_type == 'process':
+                # import เฉพาะเมื่อใช้ process (multiprocessing ใช้เวลา import นาน)
+                from concurrent.futures import ProcessPoolExecutor
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process,
+                                                     initargs=(self._config,))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='md2html')
+        return self._executor
+
+    def _thread_converter(self):
+        with self._converter_lock:
+            if self._converter is None:
+                include_images, template_path, highlight_cache_dir = self._config
+                self._converter = create_converter(include_images, {
+                    'template_path': template_path,
+                    'highlight_cache_dir': highlight_cache_dir,
+                })
+            return self._converter
+
+    def _run_in_thread(self, function, *args):
+        return function(self._thread_converter(), *args)
+
+    async def _submit(self, function, *args):
+        """ส่งงานเข้า executor โดยจำกัดจำนวนงานที่รอและที่ทำพร้อมกัน"""
+        if self.max_pending is not None and self.pending >= self.max_pending:
+            raise ConverterBusyError(f"Too many pending conversions ({self.pending}/{self.max_pending})")
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                self.running += 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    executor = self._get_executor()
+                    if self.uses_processes:
+                        return await loop.run_in_executor(executor, _run_in_process,
+                                                          self._config, function, *args)
+                    return await loop.run_in_executor(executor, self._run_in_thread, function, *args)
+                finally:
+                    self.running -= 1
+        finally:
+            self.pending -= 1
+
+    async def warm(self):
+        """สร้างและอุ่นเครื่อง converter ล่วงหน้า
+
+        process executor ที่สร้างเอง: worker ทุกตัวอุ่นเครื่องใน initializer จึงส่งเพียงงานว่างให้ executor
+        เริ่ม worker ครบ (executor ไม่รับประกันว่างานอุ่นเครื่องจะกระจายไปถึงทุก worker)
+        executor ที่ส่งมาจากภายนอก: ส่งงานอุ่นเครื่องหนึ่งงานต่อ worker เท่าที่ทำได้
+        """
+        if not self.uses_processes:
+            await self._submit(_warm)
+            return
+        function = _started if self._owns_executor else _warm
+        await asyncio.gather(*(self._submit(function) for _ in range(self.max_workers)))
+
+    async def convert(self, content: str, title: str = "Document", stylesheet_href: str = None) -> str:
+        """แปลงข้อความ Markdown เป็นหน้า HTML"""
+        return await self._submit(_convert_content, content, title, stylesheet_href)
+
+    async def convert_file(self, input_path: str, title: str = "Document",
+                           stylesheet_href: str = None) -> str:
+        """อ่านไฟล์ Markdown และแปลงเป็นหน้า HTML (อ่านไฟล์ใน executor ไม่ block event loop)"""
+        return await self._submit(_convert_file, input_path, title, stylesheet_href)
+
+    async def write_file(self, input_path: str, output_path: str, title: str = "Document",
+                         stylesheet_href: str = None) -> dict:
+        """แปลงไฟล์และเขียน HTML ลงไฟล์ใน executor คืนผลลัพธ์แบบเดียวกับ BatchConverter"""
+        options = {'stylesheet_href': stylesheet_href} if stylesheet_href else {}
+        task = {
+            'path': os.path.abspath(input_path),
+            'output': os.path.abspath(output_path),
+            'title': title,
+            'options': options,
+        }
+        return await self._submit(_write_file, task)
+
+    async def close(self):
+        """รอให้งานใน executor เสร็จ ปิด executor และลบไฟล์ชั่วคราว"""
+        loop = asyncio.get_running_loop()
+        if self._executor is not None and self._owns_executor:
+            await loop.run_in_executor(None, self._executor.shutdown)
+            self._executor = None
+        if self._converter is not None:
+            self._converter.cleanup()
+            self._converter = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
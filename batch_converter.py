@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Parallel Batch Converter
+แปลงไฟล์ Markdown หลายไฟล์พร้อมกันด้วย process pool (หนึ่ง MarkdownConverter ต่อ worker)
+"""
+
+import glob
+import os
+import posixpath
+import time
+from pathlib import Path
+
+from assets import asset_href
+from build_cache import decode_source, read_source, settings_hash
+from output_writer import write_output
+from profiling import DocumentProfile, profile_stage, start_worker_cprofile, text_bytes
+from scanner import DirectoryScanner
+from search_index import index_sections
+from site_index import new_page_index, site_page_name
+from streaming import STREAM_THRESHOLD, convert_file_streaming
+
+# จำนวนงานที่ส่งเข้า pool ล่วงหน้าต่อ worker ของ BatchConverter.convert_stream
+STREAM_TASKS_PER_JOB = 4
+
+# converter ประจำ worker process (สร้างครั้งเดียวใน _init_worker)
+_worker_converter = None
+
+
+def create_converter(include_images: bool, converter_options: dict):
+    """สร้าง MarkdownConverter ตามการตั้งค่าของ batch"""
+    # import ภายในฟังก์ชันเพื่อไม่ให้ import วนกับ main.py
+    from main import MarkdownConverter
+
+    converter = MarkdownConverter(**converter_options)
+    if not include_images:
+        converter.mermaid_processor = None
+    return converter
+
+
+def _init_worker(include_images: bool, converter_options: dict, cprofile_path: str = None):
+    """สร้าง converter ของ worker process ตอนเริ่มต้น (และเริ่ม cProfile ถ้าระบุ cprofile_path)"""
+    import multiprocessing.util
+
+    if cprofile_path:
+        start_worker_cprofile(cprofile_path)
+    global _worker_converter
+    _worker_converter = create_converter(include_images, converter_options)
+    # ลบไฟล์ชั่วคราวเมื่อ worker process ปิดตัว
+    multiprocessing.util.Finalize(None, _worker_converter.cleanup, exitpriority=10)
+
+
+def convert_task(converter, task: dict) -> dict:
+    """แปลงไฟล์เดียวตาม task และคืนผลลัพธ์ (ไม่ throw exception)
+
+    task['stream'] = True บังคับให้แปลงแบบ streaming แม้ไฟล์จะเล็กกว่า STREAM_THRESHOLD
+    task['profile'] = True จับเวลาแต่ละขั้นตอนและใส่ผลไว้ใน result['profile']
+    ถ้า task ใช้ asset ของ site (options['diagrams_href']) diagrams ใหม่จะอยู่ใน result['diagrams']
+    หน้าของ site (options['site_page']) มีหัวข้อและลิงก์ของหน้าใน result['index'] สำหรับ SiteIndex
+    task['search'] = True ตัดคำข้อความของแต่ละหัวข้อ (ใน worker) ลง result['index']['sections']
+    result['written'] = False เมื่อ HTML ที่ได้เหมือนไฟล์ output เดิม (ไฟล์ไม่ถูกเขียนทับ)
+    task['data'] (bytes ของต้นฉบับ เช่น member ของ archive) แปลงจากข้อมูลนี้แทนการอ่าน task['path']
+    และคืน HTML ใน result['html'] โดยไม่เขียนไฟล์ (task['output'] เป็นเพียงชื่อของหน้า)
+    """
+    start = time.perf_counter()
+    result = {
+        'path': task['path'],
+        'output': task['output'],
+        'status': 'converted',
+        'error': None,
+        'hash': None,
+        'written': False,
+    }
+    # สถิติของ thread นี้ (thread อื่นของ watch mode หรือ server อาจแปลงไฟล์อื่นพร้อมกัน)
+    highlight_before = converter.highlight_cache.thread_stats()
+    svg_before = converter.svg_cache_stats(thread=True)
+    profile = DocumentProfile(task['path']) if task.get('profile') else None
+    page_index = None
+    if task['options'].get('site_page') or task.get('search'):
+        page_index = new_page_index(task['page'], task['title'], task.get('search'))
+    try:
+        size = len(task['data']) if 'data' in task else os.path.getsize(task['path'])
+        if 'data' in task:
+            # member ของ archive: แปลงจาก bytes ที่อ่านมาแล้วและคืน HTML แทนการเขียนไฟล์
+            with profile_stage(profile, 'read'):
+                content, result['hash'] = decode_source(task['data'], task['path'])
+            result['html'] = converter.convert_to_bytes(content, task['title'], page_index=page_index,
+                                                        profile=profile, **task['options'])
+            if profile is not None:
+                profile.add('read', bytes_in=size, bytes_out=text_bytes(content))
+        elif task.get('stream') or size >= STREAM_THRESHOLD:
+            # ไฟล์ใหญ่มาก: แปลงแบบ streaming เพื่อจำกัดหน่วยความจำของ worker
+            result['hash'], result['written'] = convert_file_streaming(
+                converter, task['path'], task['output'], task['title'],
+                page_index=page_index, profile=profile, **task['options'])
+        else:
+            with profile_stage(profile, 'read'):
+                content, result['hash'] = read_source(task['path'])
+            html_bytes = converter.convert_to_bytes(content, task['title'], page_index=page_index,
+                                                    profile=profile, **task['options'])
+            with profile_stage(profile, 'write'):
+                result['written'] = write_output(task['output'], html_bytes)
+            if profile is not None:
+                profile.add('read', bytes_in=size, bytes_out=text_bytes(content))
+                profile.add('write', bytes_in=len(html_bytes), bytes_out=len(html_bytes))
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+    if profile is not None:
+        result['profile'] = profile.to_dict()
+    if page_index is not None and result['status'] == 'converted':
+        if 'sections' in page_index:
+            page_index['sections'] = index_sections(page_index['sections'])
+        result['index'] = page_index
+    if task['options'].get('diagrams_href'):
+        result['diagrams'] = converter.take_site_diagrams()
+    highlight_after = converter.highlight_cache.thread_stats()
+    result['highlight'] = {
+        name: highlight_after[name] - highlight_before[name]
+        for name in ('hits', 'disk_hits', 'misses')
+    }
+    if svg_before is not None:
+        svg_after = converter.svg_cache_stats(thread=True)
+        result['svg'] = {
+            name: svg_after[name] - svg_before[name]
+            for name in ('hits', 'disk_hits', 'misses')
+        }
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def _convert_in_worker(task: dict) -> dict:
+    """จุดเริ่มงานใน worker process"""
+    return convert_task(_worker_converter, task)
+
+
+def find_markdown_files(pattern: str, include=None, exclude=None, index_path: str = None) -> list:
+    """หาไฟล์ Markdown จากโฟลเดอร์ (ค้นหาทุกโฟลเดอร์ย่อย) หรือ glob pattern
+
+    include/exclude คือ glob patterns สำหรับโฟลเดอร์ (ค่าเริ่มต้น: *.md และ .md2htmlignore)
+    index_path คือไฟล์ scan index สำหรับสแกนซ้ำเฉพาะโฟลเดอร์ที่เปลี่ยน (None = ไม่ใช้)
+    """
+    if os.path.isdir(pattern):
+        scanner = DirectoryScanner(pattern, include, exclude, index_path=index_path)
+        return [found.path for found in scanner.scan()]
+    found = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+    return sorted(found)
+
+
+def build_tasks(files: list, output_dir: str, stylesheet: str = None,
+                diagrams_asset: str = None, mermaid_js: str = None,
+                source_root: str = None, site_asset: str = None, search_script: str = None) -> list:
+    """สร้างรายการงานแปลงไฟล์ โดยเขียนไฟล์ HTML ลงใน output_dir
+
+    stylesheet คือ path ของสไตล์ชีตภายนอกที่แต่ละหน้าจะลิงก์ไป (None = ฝัง CSS ในหน้า)
+    diagrams_asset คือ path ของ asset ที่เก็บ Mermaid diagrams ของทั้ง site (None = เก็บในแต่ละหน้า)
+    mermaid_js คือ path ของ Mermaid.js ที่คัดลอกไว้ใน output_dir (None = โหลดจาก CDN)
+    source_root คือโฟลเดอร์ต้นฉบับของ site: output คงโครงสร้างโฟลเดอร์ย่อยตาม source_root
+    (None = เขียนทุกไฟล์ลง output_dir โดยตรง) และ site_asset คือ path ของ asset index/เมนูนำทางของ site
+    search_script คือ path ของสคริปต์ค้นหา: ทุกหน้ามีกล่องค้นหาและถูกเพิ่มเข้า search index (None = ไม่ใช้)
+    task['page'] คือ path ของหน้าใน output_dir (คั่นด้วย /)
+    ไฟล์ที่ได้ output ซ้ำกับไฟล์ก่อนหน้า (เช่น docs/b.md และ docs/sub/b.md เมื่อไม่ใช้ source_root)
+    ถูกข้ามพร้อมคำเตือน เพื่อไม่ให้ workers เขียนไฟล์เดียวกันแข่งกัน
+    """
+    tasks = []
+    outputs = set()
+    for path in files:
+        base_name = Path(path).stem
+        if source_root:
+            page = site_page_name(path, source_root)
+            output = os.path.join(output_dir, *page.split('/'))
+        else:
+            page = None
+            output = os.path.join(output_dir, f"{base_name}.html")
+        key = os.path.normcase(os.path.abspath(output))
+        if key in outputs:
+            print(f"Warning: Skipping {path}: output {output} is already written by another file")
+            continue
+        outputs.add(key)
+        options = {}
+        if stylesheet:
+            options['stylesheet_href'] = asset_href(stylesheet, output)
+        if diagrams_asset:
+            options['diagrams_href'] = asset_href(diagrams_asset, output)
+        if mermaid_js:
+            options['mermaid_js_href'] = asset_href(mermaid_js, output)
+        if site_asset:
+            options['site_href'] = asset_href(site_asset, output)
+            options['site_page'] = page
+        if search_script:
+            options['search_href'] = asset_href(search_script, output)
+        task = {
+            'path': path,
+            'output': output,
+            'title': base_name,
+            'options': options,
+            'page': page or f"{base_name}.html",
+        }
+        if search_script:
+            task['search'] = True
+        tasks.append(task)
+    return tasks
+
+
+def build_archive_tasks(members, assets: dict = None, site: bool = False, search: bool = False):
+    """สร้างงานแปลงจาก member ของ archive ทีละงาน (generator ตามลำดับของ members)
+
+    หน้า HTML คงโครงสร้างโฟลเดอร์ใน archive เสมอ (<path>.md -> <path>.html)
+    assets คือ {ชื่อ option ของ href เช่น 'stylesheet_href': path ของ asset ใน archive output}
+    site=True เพิ่มหน้าเข้า index ของ site และ search=True เพิ่มหน้าเข้า search index
+    member ที่ได้ชื่อหน้าซ้ำกับหน้าก่อนหน้าหรือกับ asset (เช่น a.md และ a.markdown) ถูกข้ามพร้อมคำเตือน
+    """
+    # import เฉพาะเมื่อใช้ archive (tarfile/zipfile ไม่จำเป็นต่อ worker ทั่วไป)
+    from archive_io import archive_href
+
+    pages = set((assets or {}).values())
+    for member in members:
+        page = posixpath.splitext(member.name)[0] + '.html'
+        if page in pages:
+            print(f"Warning: Skipping {member.name}: output {page} already exists in the archive")
+            continue
+        pages.add(page)
+        options = {name: archive_href(asset, page) for name, asset in (assets or {}).items()}
+        if site:
+            options['site_page'] = page
+        task = {
+            'path': member.name,
+            'output': page,
+            'title': posixpath.splitext(posixpath.basename(member.name))[0],
+            'options': options,
+            'page': page,
+            'data': member.data,
+        }
+        if search:
+            task['search'] = True
+        yield task
+
+
+class BatchConverter:
+    """แปลงไฟล์ Markdown หลายไฟล์แบบขนานด้วย process pool"""
+
+    def __init__(self, jobs: int = None, include_images: bool = True,
+                 manifest=None, force: bool = False, template_path: str = None,
+                 highlight_cache_dir: str = None, cprofile_path: str = None,
+                 mermaid_renderer: str = None, mermaid_cache_dir: str = None):
+        self.jobs = jobs or os.cpu_count() or 1
+        self.include_images = include_images
+        self.template_path = template_path
+        self.mermaid_renderer = mermaid_renderer if include_images else None
+        # keyword arguments ของ MarkdownConverter ในแต่ละ worker
+        self.converter_options = {
+            'template_path': template_path,
+            'highlight_cache_dir': highlight_cache_dir,
+        }
+        if self.mermaid_renderer:
+            self.converter_options['mermaid_renderer'] = self.mermaid_renderer
+            self.converter_options['mermaid_cache_dir'] = mermaid_cache_dir
+        # สถิติ highlight cache และ SVG cache รวมของทุก worker
+        self.highlight_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        self.svg_stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+        # BuildManifest สำหรับข้ามไฟล์ที่ไม่เปลี่ยนแปลง (None = ไม่ใช้ cache)
+        self.manifest = manifest
+        self.force = force
+        # แต่ละ worker process บันทึกสถิติ cProfile ลง cprofile_path.<pid> (None = ไม่ใช้)
+        self.cprofile_path = cprofile_path
+
+    def convert(self, tasks: list):
+        """แปลงไฟล์ทั้งหมดใน tasks และส่งผลลัพธ์ออกมาทีละไฟล์ตามลำดับที่แปลงเสร็จ
+
+        ผลลัพธ์แต่ละรายการเป็น dict ที่มี 'path', 'output', 'status'
+        ('converted', 'cached' หรือ 'failed'), 'error' และ 'elapsed'
+        """
+        if self.manifest is None:
+            for result in self._convert_all(tasks):
+                self._add_highlight_stats(result)
+                yield result
+            return
+
+        from main import conversion_settings
+
+        settings_keys = {}
+        pending = []
+        for task in tasks:
+            key = settings_hash(conversion_settings(task['title'], self.include_images,
+                                                   self.template_path, self.mermaid_renderer,
+                                                   **task['options']))
+            settings_keys[task['path']] = key
+            if not self.force and self.manifest.is_up_to_date(task['path'], task['output'], key):
+                yield {
+                    'path': task['path'],
+                    'output': task['output'],
+                    'status': 'cached',
+                    'error': None,
+                    'hash': None,
+                    'written': False,
+                    'elapsed': 0.0,
+                }
+            else:
+                pending.append(task)
+
+        try:
+            for result in self._convert_all(pending):
+                self._add_highlight_stats(result)
+                if result['status'] == 'converted':
+                    self.manifest.record(result['path'], result['output'],
+                                         settings_keys[result['path']], result['hash'])
+                else:
+                    self.manifest.forget(result['path'])
+                yield result
+        finally:
+            # บันทึก manifest แม้ถูกหยุดกลางทาง เพื่อไม่ต้องแปลงไฟล์ที่เสร็จแล้วซ้ำ
+            self.manifest.save()
+
+    def _add_highlight_stats(self, result: dict):
+        """รวมสถิติ highlight cache (และ SVG cache) ของไฟล์ที่แปลงเสร็จ"""
+        for name, count in result['highlight'].items():
+            self.highlight_stats[name] += count
+        for name, count in result.get('svg', {}).items():
+            self.svg_stats[name] += count
+
+    def _convert_all(self, tasks: list):
+        """แปลงไฟล์ด้วย process pool (หรือใน process ปัจจุบันเมื่อมีงานเดียว)"""
+        if not tasks:
+            return
+
+        for task in tasks:
+            os.makedirs(os.path.dirname(task['output']) or '.', exist_ok=True)
+
+        workers = min(self.jobs, len(tasks))
+        if workers == 1:
+            # งานเดียวหรือ --jobs 1 ไม่ต้องเสียเวลาสร้าง process
+            yield from self._convert_inline(tasks)
+            return
+
+        from concurrent.futures import as_completed
+
+        executor = self._executor(workers)
+        try:
+            futures = [executor.submit(_convert_in_worker, task) for task in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # หากผู้เรียกหยุดกลางทาง ให้ยกเลิกงานที่ยังไม่เริ่ม
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def convert_stream(self, tasks, window: int = None):
+        """แปลงงานจาก iterator (เช่น member ของ archive ที่อ่านทีละตัว) และส่งผลลัพธ์ตามลำดับของงาน
+
+        ส่งงานเข้า pool ล่วงหน้าไม่เกิน window งาน (ค่าเริ่มต้น STREAM_TASKS_PER_JOB ต่อ worker)
+        จึงอ่านงานถัดไปเฉพาะเมื่องานแรกสุดที่ค้างอยู่เสร็จ หน่วยความจำขึ้นกับขนาดของงานที่ค้าง ไม่ใช่จำนวนงานทั้งหมด
+        และผลลัพธ์เรียงเหมือนเดิมทุกครั้งแม้แปลงขนานกัน ไม่ใช้ build manifest (ทุกงานถูกแปลงใหม่)
+        """
+        if self.jobs == 1:
+            for result in self._convert_inline(tasks):
+                self._add_highlight_stats(result)
+                yield result
+            return
+
+        from collections import deque
+
+        window = window or self.jobs * STREAM_TASKS_PER_JOB
+        executor = self._executor(self.jobs)
+        pending = deque()
+        try:
+            for task in tasks:
+                pending.append(executor.submit(_convert_in_worker, task))
+                if len(pending) < window:
+                    continue
+                result = pending.popleft().result()
+                self._add_highlight_stats(result)
+                yield result
+            while pending:
+                result = pending.popleft().result()
+                self._add_highlight_stats(result)
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _executor(self, workers: int):
+        """process pool ที่แต่ละ worker มี MarkdownConverter ของตัวเอง"""
+        # import เฉพาะเมื่อใช้หลาย process (multiprocessing ใช้เวลา import นาน)
+        from concurrent.futures import ProcessPoolExecutor
+
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.include_images, self.converter_options, self.cprofile_path)
+        )
+
+    def _convert_inline(self, tasks: list):
+        """แปลงไฟล์ใน process ปัจจุบัน"""
+        converter = create_converter(self.include_images, self.converter_options)
+        try:
+            for task in tasks:
+                yield convert_task(converter, task)
+        finally:
+            converter.cleanup()
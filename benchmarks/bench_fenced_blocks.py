@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Fenced Block Scanner Benchmark
+วัดเวลาแทนที่ Mermaid diagrams ในเอกสารที่มี diagrams หลายร้อยอัน
+เทียบ regex แบบเดิม (DOTALL, compile ทุกครั้ง) กับ scanner รอบเดียวใน fenced_blocks.py
+
+Usage:
+  python benchmarks/bench_fenced_blocks.py [--diagrams 100 500 1000]
+"""
+
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fenced_blocks import replace_fenced_blocks, scan_fenced_blocks
+
+
+def build_document(diagrams: int) -> str:
+    """สร้างเอกสารที่มี prose, code blocks และ Mermaid diagrams สลับกัน"""
+    parts = []
+    for i in range(diagrams):
+        parts.append(f"## Section {i}\n\n" + "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 8 + "\n\n")
+        parts.append(f"```python\ndef handler_{i}(event):\n    return event.get('id', {i})\n```\n\n")
+        parts.append(f"```mermaid\ngraph TD\n    A{i}[Start] --> B{i}{{Decision}}\n    B{i} -->|Yes| C{i}[OK]\n```\n\n")
+    return ''.join(parts)
+
+
+def legacy_replace(content: str) -> str:
+    """วิธีเดิม: re.sub แบบ DOTALL บนทั้งเอกสาร"""
+    return re.sub(r'```mermaid\n(.*?)\n```', lambda m: f'<div class="mermaid">{m.group(1)}</div>',
+                  content, flags=re.DOTALL)
+
+
+def scanner_replace(content: str) -> str:
+    """วิธีใหม่: สแกนรอบเดียวแล้วส่งให้ handler"""
+    return replace_fenced_blocks(content, {'mermaid': lambda block: f'<div class="mermaid">{block.content}</div>'})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fenced block scanner benchmark")
+    parser.add_argument('--diagrams', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    for count in args.diagrams:
+        document = build_document(count)
+        found = sum(1 for block in scan_fenced_blocks(document) if block.language == 'mermaid')
+        print(f"{count} diagrams, {len(document) / 1024:.0f} KB, {found} mermaid blocks found")
+        cases = [
+            ('regex re.sub (legacy, x2 passes)', lambda: legacy_replace(legacy_replace(document))),
+            ('scan_fenced_blocks only', lambda: list(scan_fenced_blocks(document))),
+            ('replace_fenced_blocks', lambda: scanner_replace(document)),
+        ]
+        for name, func in cases:
+            best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            print(f"  {name:34s} {best * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Directory Scanner Benchmark
+เทียบการสแกนโฟลเดอร์แบบเดิม (os.walk + getsize + getmtime) กับ DirectoryScanner
+ทั้งแบบไม่มี index, มี index และเมื่อมีโฟลเดอร์เปลี่ยนหนึ่งโฟลเดอร์
+
+Usage:
+  python benchmarks/bench_scanner.py [--files N] [--repeat N]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scanner import DirectoryScanner
+
+FILES_PER_DIRECTORY = 100
+
+
+def create_tree(root: str, count: int):
+    """สร้างไฟล์ Markdown count ไฟล์ (และไฟล์อื่นปนเล็กน้อย) ในโฟลเดอร์ย่อยสองชั้น"""
+    for i in range(0, count, FILES_PER_DIRECTORY):
+        directory = os.path.join(root, f"part{i // (FILES_PER_DIRECTORY * 50):02d}", f"dir{i:06d}")
+        os.makedirs(directory)
+        for j in range(min(FILES_PER_DIRECTORY, count - i)):
+            with open(os.path.join(directory, f"page{j:03d}.md"), 'w') as f:
+                f.write("# page\n")
+        with open(os.path.join(directory, "image.png"), 'wb') as f:
+            f.write(b'\0')
+
+
+def legacy_scan(root: str) -> int:
+    """วิธีเดิมของ GUI: os.walk แล้ว stat แยกสำหรับขนาดและเวลาแก้ไข"""
+    count = 0
+    for directory, dirs, files in os.walk(root):
+        for name in files:
+            if name.lower().endswith('.md'):
+                path = os.path.join(directory, name)
+                os.path.getsize(path)
+                os.path.getmtime(path)
+                count += 1
+    return count
+
+
+def best_time(func, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Directory scanner benchmark")
+    parser.add_argument('--files', type=int, default=50000)
+    parser.add_argument('--repeat', '-n', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        root = os.path.join(work_dir, 'docs')
+        create_tree(root, args.files)
+        index_path = os.path.join(work_dir, 'scan-index.json')
+        indexed = DirectoryScanner(root, index_path=index_path)
+        indexed.scan()
+        changed_dir = os.path.join(root, 'part00', 'dir000000')
+
+        def scan_after_change():
+            with open(os.path.join(changed_dir, 'new.md'), 'w') as f:
+                f.write("# new\n")
+            indexed.scan()
+            os.unlink(os.path.join(changed_dir, 'new.md'))
+            indexed.scan()
+
+        # (ชื่อ, ฟังก์ชัน, จำนวนการสแกนต่อการเรียกหนึ่งครั้ง)
+        cases = [
+            ('os.walk + getsize/getmtime', lambda: legacy_scan(root), 1),
+            ('DirectoryScanner, 1 thread', lambda: DirectoryScanner(root, workers=1).scan(), 1),
+            ('DirectoryScanner, 8 threads', lambda: DirectoryScanner(root).scan(), 1),
+            ('with index, nothing changed', indexed.scan, 1),
+            ('with index, 1 dir changed', scan_after_change, 2),
+        ]
+        print(f"{args.files} Markdown files, best of {args.repeat}")
+        for name, func, scans in cases:
+            elapsed = best_time(func, args.repeat) / scans
+            print(f"  {name:30s} {elapsed:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Conversion Server Latency Benchmark
+เริ่ม conversion daemon ภายใน process (localhost HTTP และ Unix socket) แล้ววัด latency ต่อคำขอ
+เทียบกับการเรียก MarkdownConverter โดยตรง
+
+Usage:
+  python benchmarks/bench_server.py [--requests N] [--file input.md]
+"""
+
+import argparse
+import os
+import secrets
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from server import ConversionClient, ConversionService, create_server
+
+SAMPLE_DOCUMENT = """# Release Notes
+
+ข้อความธรรมดา with **bold**, `inline code` and a [link](https://example.com).
+
+## Changes
+
+- item one
+- item two
+
+| name | value |
+|------|-------|
+| a    | 1     |
+
+```python
+def main():
+    return 42
+```
+"""
+
+
+def measure(func, requests: int) -> list:
+    """เรียก func ตามจำนวนครั้งที่กำหนด คืนค่าเวลาแต่ละครั้งเป็นมิลลิวินาที"""
+    times = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def report(name: str, times: list):
+    times = sorted(times)
+    p95 = times[int(len(times) * 0.95) - 1]
+    print(f"  {name:24s} median {statistics.median(times):7.2f} ms   p95 {p95:7.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Conversion server latency benchmark")
+    parser.add_argument('--requests', '-n', type=int, default=200)
+    parser.add_argument('--file', help='Markdown file to render (default: built-in sample)')
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file, 'r', encoding='utf-8') as f:
+            content = f.read()
+    else:
+        content = SAMPLE_DOCUMENT
+
+    service = ConversionService()
+    service.warm()
+    token = secrets.token_urlsafe(32)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        servers = [
+            ('http', create_server(('tcp', '127.0.0.1', 0), service, token)),
+            ('unix', create_server(('unix', os.path.join(work_dir, 'md2html.sock')), service, token)),
+        ]
+        for _, server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        print(f"{args.requests} requests, document {len(content)} chars")
+        converter = service.converter()
+        report('in-process', measure(lambda: converter.convert_to_bytes(content, 'Bench'), args.requests))
+        for name, server in servers:
+            if name == 'unix':
+                address = ('unix', server.server_address)
+            else:
+                address = ('tcp', '127.0.0.1', server.server_address[1])
+            client = ConversionClient(address, token=token)
+            client.render(content, 'Bench')
+            report(f'{name} /render', measure(lambda: client.render(content, 'Bench'), args.requests))
+            client.close()
+            server.shutdown()
+            server.server_close()
+
+    service.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+CLI Startup Benchmark
+วัดเวลาเริ่มทำงานแบบ cold start ของ main.py (--help และการแปลงไฟล์เล็กหนึ่งไฟล์)
+พร้อมแสดง modules ที่ใช้เวลา import มากที่สุดจาก python -X importtime
+
+Usage:
+  python benchmarks/bench_startup.py [--repeat N] [--top N] [--max-ms MS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, 'main.py')
+
+TEXT_DOCUMENT = """# Notes
+
+ข้อความธรรมดา with **bold** text and a [link](https://example.com).
+
+| a | b |
+|---|---|
+| 1 | 2 |
+"""
+
+CODE_DOCUMENT = TEXT_DOCUMENT + """
+```python
+def hello():
+    return "world"
+```
+"""
+
+
+def run_once(command: list, cwd: str) -> float:
+    """รันคำสั่งหนึ่งครั้ง คืนค่าเวลาเป็นมิลลิวินาที"""
+    start = time.perf_counter()
+    subprocess.run(command, cwd=cwd, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def import_profile(command: list, cwd: str, top: int) -> list:
+    """รันคำสั่งด้วย -X importtime แล้วคืน modules ที่ใช้เวลารวมมากที่สุด [(ms, module)]"""
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + command[1:], cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # นับเฉพาะ modules ระดับบนสุด (ไม่ย่อหน้า) เพื่อไม่ให้นับซ้ำ
+        if name.startswith(' ') and not name.startswith('  '):
+            entries.append((int(cumulative) / 1000, name.strip()))
+    entries.sort(reverse=True)
+    return entries[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI cold start benchmark")
+    parser.add_argument('--repeat', '-n', type=int, default=10)
+    parser.add_argument('--top', type=int, default=8,
+                        help='Number of slowest top-level imports to show (default: 8)')
+    parser.add_argument('--max-ms', type=float, default=None,
+                        help='Exit with status 1 if the median of any case exceeds this many ms')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name, content in (('text.md', TEXT_DOCUMENT), ('code.md', CODE_DOCUMENT)):
+            with open(os.path.join(work_dir, name), 'w', encoding='utf-8') as f:
+                f.write(content)
+
+        cases = [
+            ('python -c pass (baseline)', [sys.executable, '-c', 'pass']),
+            ('main.py --help', [sys.executable, MAIN, '--help']),
+            ('convert small file (no code)', [sys.executable, MAIN, 'text.md', '--no-cache']),
+            ('convert small file (code)', [sys.executable, MAIN, 'code.md', '--no-cache']),
+            ('up-to-date check', [sys.executable, MAIN, 'text.md']),
+        ]
+        # สร้าง manifest ไว้ก่อนสำหรับกรณี up-to-date
+        run_once(cases[-1][1], work_dir)
+
+        print(f"{args.repeat} runs per case (median / min)")
+        slow = False
+        for name, command in cases:
+            times = [run_once(command, work_dir) for _ in range(args.repeat)]
+            median = statistics.median(times)
+            print(f"  {name:30s} {median:8.1f} ms {min(times):8.1f} ms")
+            if args.max_ms is not None and command[1] != '-c' and median > args.max_ms:
+                slow = True
+
+        for name, command in cases[1:4]:
+            print(f"\nSlowest top-level imports: {name}")
+            for cumulative, module in import_profile(command, work_dir, args.top):
+                print(f"  {cumulative:8.1f} ms  {module}")
+
+    if slow:
+        print(f"\nStartup exceeded {args.max_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Template Microbenchmark
+วัดเวลาประกอบโครงหน้า HTML ต่อเอกสาร เทียบ PageTemplate กับการสร้าง f-string ทุกครั้ง
+
+Usage:
+  python benchmarks/bench_template.py [--iterations N]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from assets import PAGE_CSS, page_head
+from page_template import load_template
+
+
+def legacy_render(title: str, body: str) -> bytes:
+    """วิธีเดิม: สร้างหน้า HTML ทั้งหน้าด้วย f-string (รวม CSS) แล้ว encode"""
+    return f"""
+<!DOCTYPE html>
+<html lang="th">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title}</title>
+    <style>
+{PAGE_CSS}    </style>
+</head>
+<body>
+    {body}
+</body>
+</html>
+        """.encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Page template microbenchmark")
+    parser.add_argument('--iterations', '-n', type=int, default=20000)
+    parser.add_argument('--body-size', type=int, default=20000,
+                        help='Size of the converted body in characters (default: 20000)')
+    args = parser.parse_args()
+
+    body = ('<p>Lorem ipsum dolor sit amet, ภาษาไทย consectetur.</p>\n' * (args.body_size // 55 + 1))[:args.body_size]
+    title = 'Benchmark <Document>'
+    template = load_template()
+
+    cases = [
+        ('f-string (legacy)', lambda: legacy_render(title, body)),
+        ('PageTemplate.render_bytes', lambda: template.render_bytes(title, page_head(), body)),
+        ('PageTemplate.render', lambda: template.render(title, page_head(), body)),
+        ('body.encode() only', lambda: body.encode('utf-8')),
+    ]
+
+    print(f"{args.iterations} iterations, body {len(body)} chars")
+    for name, func in cases:
+        best = min(timeit.repeat(func, number=args.iterations, repeat=5))
+        print(f"  {name:28s} {best / args.iterations * 1e6:8.2f} us/doc")
+
+
+if __name__ == "__main__":
+    main()
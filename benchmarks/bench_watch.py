@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Watch Mode Latency Benchmark
+สร้างโฟลเดอร์ตัวอย่างที่มีไฟล์ Markdown จำนวนมาก เริ่ม watch mode แล้ววัดเวลา
+ตั้งแต่แก้ไขไฟล์หนึ่งไฟล์จนไฟล์ HTML ถูกเขียนเสร็จ
+
+Usage:
+  python benchmarks/bench_watch.py [--files N] [--edits N] [--poll]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_converter import build_tasks, create_converter
+from watcher import RebuildQueue, watch
+
+FILES_PER_DIRECTORY = 100
+
+
+def create_tree(root: str, count: int) -> list:
+    """สร้างไฟล์ Markdown ขนาดเล็ก count ไฟล์ กระจายในโฟลเดอร์ย่อย"""
+    paths = []
+    for i in range(count):
+        directory = os.path.join(root, f"section{i // FILES_PER_DIRECTORY:03d}")
+        if i % FILES_PER_DIRECTORY == 0:
+            os.makedirs(directory)
+        path = os.path.join(directory, f"page{i:05d}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(f"# Page {i}\n\nข้อความตัวอย่าง with `code` and a list:\n\n- one\n- two\n")
+        paths.append(path)
+    return paths
+
+
+def wait_for_output(path: str, previous_mtime: int, timeout: float = 10.0) -> bool:
+    """รอจนไฟล์ output ถูกเขียนใหม่"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if os.stat(path).st_mtime_ns != previous_mtime:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.0005)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch mode latency benchmark")
+    parser.add_argument('--files', type=int, default=10000)
+    parser.add_argument('--edits', type=int, default=30)
+    parser.add_argument('--poll', action='store_true', help='Use the polling watcher')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_dir = os.path.join(work_dir, 'docs')
+        output_dir = os.path.join(work_dir, 'html')
+        os.makedirs(output_dir)
+        start = time.perf_counter()
+        paths = create_tree(source_dir, args.files)
+        print(f"Created {len(paths)} files in {time.perf_counter() - start:.1f}s")
+
+        converter = create_converter(True, {})
+        converter.warm()
+        rebuild = RebuildQueue(converter, lambda path: build_tasks([path], output_dir)[0])
+        stop = threading.Event()
+        start = time.perf_counter()
+        thread = threading.Thread(target=watch, args=(source_dir, rebuild),
+                                  kwargs={'polling': args.poll, 'stop_event': stop}, daemon=True)
+        thread.start()
+        # รอให้ watcher เริ่มเฝ้าดูทุกโฟลเดอร์
+        time.sleep(1.0)
+
+        latencies = []
+        for _ in range(args.edits):
+            path = random.choice(paths)
+            output = build_tasks([path], output_dir)[0]['output']
+            try:
+                previous_mtime = os.stat(output).st_mtime_ns
+            except OSError:
+                previous_mtime = None
+            edit_start = time.perf_counter()
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("\nแก้ไขแล้ว\n")
+            if wait_for_output(output, previous_mtime):
+                latencies.append((time.perf_counter() - edit_start) * 1000)
+            time.sleep(0.05)
+
+        stop.set()
+        thread.join()
+        converter.cleanup()
+
+    if not latencies:
+        print("No rebuilds observed")
+        sys.exit(1)
+    latencies.sort()
+    p95 = latencies[max(0, int(len(latencies) * 0.95) - 1)]
+    print(f"{len(latencies)}/{args.edits} edits rebuilt ({'polling' if args.poll else 'inotify'})")
+    print(f"  edit -> HTML written: median {statistics.median(latencies):.1f} ms, "
+          f"p95 {p95:.1f} ms, max {latencies[-1]:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Synthetic Markdown Corpora
+สร้างเอกสาร Markdown สังเคราะห์สำหรับ benchmark แบบกำหนดผลได้ (seed เดียวกันได้เนื้อหาเดิมทุกครั้ง)
+ชนิดของ corpus: prose, code, tables, mermaid, lists และ huge (ไฟล์เดียวขนาดใหญ่ที่ผสมทุกชนิด)
+
+Usage:
+  python benchmarks/corpus.py OUTPUT_DIR [--kind KIND] [--docs N] [--size BYTES] [--seed N]
+"""
+
+import argparse
+import os
+import random
+import zlib
+
+WORDS = (
+    "markdown converter document section table diagram render output input cache worker "
+    "process thread stream block header footer index search build page site template "
+    "ข้อมูล รายงาน ระบบ ผู้ใช้ การแปลง เอกสาร ตาราง แผนภาพ ประสิทธิภาพ ความเร็ว หน่วยความจำ"
+).split()
+
+# ตัวอย่างโค้ดของแต่ละภาษา (Pygments lexer คนละตัว) เติมชื่อด้วย {name} และตัวเลขด้วย {n}
+CODE_SNIPPETS = {
+    'python': "def {name}(items):\n    total = {n}\n    for item in items:\n        total += item * 2\n    return total\n",
+    'javascript': "function {name}(items) {{\n  let total = {n};\n  items.forEach(x => total += x);\n  return total;\n}}\n",
+    'typescript': "export function {name}(items: number[]): number {{\n  return items.reduce((a, b) => a + b, {n});\n}}\n",
+    'java': "public class {name} {{\n    public static int run(int[] xs) {{\n        int t = {n};\n        for (int x : xs) t += x;\n        return t;\n    }}\n}}\n",
+    'c': "#include <stdio.h>\nint {name}(int *xs, int n) {{\n    int t = {n};\n    for (int i = 0; i < n; i++) t += xs[i];\n    return t;\n}}\n",
+    'cpp': "#include <vector>\nint {name}(const std::vector<int>& xs) {{\n    int t = {n};\n    for (auto x : xs) t += x;\n    return t;\n}}\n",
+    'go': "func {name}(xs []int) int {{\n\tt := {n}\n\tfor _, x := range xs {{\n\t\tt += x\n\t}}\n\treturn t\n}}\n",
+    'rust': "fn {name}(xs: &[i32]) -> i32 {{\n    xs.iter().fold({n}, |a, b| a + b)\n}}\n",
+    'ruby': "def {name}(items)\n  items.inject({n}) {{ |sum, x| sum + x }}\nend\n",
+    'php': "<?php\nfunction {name}($items) {{\n    return array_sum($items) + {n};\n}}\n",
+    'sql': "SELECT id, name, SUM(amount) AS total_{name}\nFROM orders\nWHERE amount > {n}\nGROUP BY id, name;\n",
+    'bash': "for f in *.md; do\n  echo \"{name} $f\"\n  sleep {n}\ndone\n",
+    'json': "{{\n  \"name\": \"{name}\",\n  \"count\": {n},\n  \"tags\": [\"a\", \"b\"]\n}}\n",
+    'yaml': "{name}:\n  count: {n}\n  enabled: true\n  tags:\n    - a\n    - b\n",
+    'html': "<div class=\"{name}\">\n  <p>Item {n}</p>\n</div>\n",
+    'css': ".{name} {{\n  margin: {n}px;\n  color: #333;\n}}\n",
+    'kotlin': "fun {name}(xs: List<Int>): Int {{\n    return xs.sum() + {n}\n}}\n",
+    'swift': "func {name}(_ xs: [Int]) -> Int {{\n    return xs.reduce({n}, +)\n}}\n",
+    'haskell': "{name} :: [Int] -> Int\n{name} xs = foldr (+) {n} xs\n",
+    'lua': "function {name}(xs)\n  local t = {n}\n  for _, x in ipairs(xs) do t = t + x end\n  return t\nend\n",
+    'scala': "def {name}(xs: List[Int]): Int = xs.foldLeft({n})(_ + _)\n",
+    'perl': "sub {name} {{\n    my $t = {n};\n    $t += $_ for @_;\n    return $t;\n}}\n",
+    'ini': "[{name}]\ncount = {n}\nenabled = true\n",
+    'diff': "--- a/{name}.txt\n+++ b/{name}.txt\n@@ -1,2 +1,2 @@\n-old {n}\n+new {n}\n",
+    'xml': "<item name=\"{name}\">\n  <count>{n}</count>\n</item>\n",
+}
+
+MERMAID_DIAGRAMS = (
+    "graph TD\n    A{n}[Start] --> B{n}{{Check}}\n    B{n} -->|yes| C{n}[Done]\n    B{n} -->|no| A{n}\n",
+    "sequenceDiagram\n    participant U as User\n    participant S as Server\n    U->>S: request {n}\n    S-->>U: response {n}\n",
+    "classDiagram\n    class Item{n} {{\n        +int count\n        +render()\n    }}\n    Item{n} <|-- Page{n}\n",
+    "stateDiagram-v2\n    [*] --> Idle{n}\n    Idle{n} --> Busy{n}\n    Busy{n} --> [*]\n",
+    "pie title Share {n}\n    \"A\" : {n}\n    \"B\" : 20\n",
+    "gantt\n    title Plan {n}\n    dateFormat YYYY-MM-DD\n    section S\n    Task {n} :a1, 2024-01-01, 3d\n",
+)
+
+KINDS = ('prose', 'code', 'tables', 'mermaid', 'lists', 'huge')
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(6, 16))]
+    i = rng.randrange(len(words))
+    words[i] = rng.choice(("**{}**", "*{}*", "`{}`", "[{}](https://example.com)")).format(words[i])
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraph(rng: random.Random) -> str:
+    return ' '.join(_sentence(rng) for _ in range(rng.randint(3, 6))) + '\n\n'
+
+
+def _prose_block(rng: random.Random, n: int) -> str:
+    if n % 5 == 0:
+        return f"{'#' * rng.randint(2, 4)} {_sentence(rng).rstrip('.')}\n\n"
+    if n % 7 == 0:
+        return '> ' + _sentence(rng) + '\n\n'
+    return _paragraph(rng)
+
+
+def _code_block(rng: random.Random, n: int) -> str:
+    language = rng.choice(sorted(CODE_SNIPPETS))
+    body = CODE_SNIPPETS[language].format(name=f"item_{n}", n=n) * rng.randint(1, 4)
+    return f"```{language}\n{body}```\n\n"
+
+
+def _table_block(rng: random.Random, n: int) -> str:
+    columns = rng.randint(3, 8)
+    header = '| ' + ' | '.join(f"col {c}" for c in range(columns)) + ' |\n'
+    separator = '|' + '|'.join('---' for _ in range(columns)) + '|\n'
+    rows = ''.join(
+        '| ' + ' | '.join(rng.choice(WORDS) if c % 2 else str(rng.randint(0, 10 ** 6))
+                          for c in range(columns)) + ' |\n'
+        for _ in range(rng.randint(5, 30))
+    )
+    return header + separator + rows + '\n'
+
+
+def _mermaid_block(rng: random.Random, n: int) -> str:
+    return "```mermaid\n" + rng.choice(MERMAID_DIAGRAMS).format(n=n) + "```\n\n" + _paragraph(rng)
+
+
+def _list_block(rng: random.Random, n: int) -> str:
+    lines = []
+    depth = 0
+    for _ in range(rng.randint(10, 40)):
+        depth = max(0, min(8, depth + rng.choice((-1, 0, 1, 1))))
+        marker = f"{rng.randint(1, 9)}." if depth % 2 else rng.choice('-*+')
+        lines.append('    ' * depth + f"{marker} {_sentence(rng)}\n")
+    return ''.join(lines) + '\n'
+
+
+BLOCKS = {
+    'prose': (_prose_block,),
+    'code': (_code_block, _prose_block),
+    'tables': (_table_block, _prose_block),
+    'mermaid': (_mermaid_block,),
+    'lists': (_list_block,),
+    'huge': (_prose_block, _code_block, _table_block, _mermaid_block, _list_block),
+}
+
+
+def generate_document(kind: str, size: int, seed: int = 0, index: int = 0) -> str:
+    """สร้างเอกสารชนิด kind ขนาดประมาณ size bytes (seed และ index เดียวกันได้ผลเดิมเสมอ)"""
+    if kind not in BLOCKS:
+        raise Exception(f"Unknown corpus kind: {kind}")
+    rng = random.Random(zlib.crc32(f"{kind}:{seed}:{index}".encode()))
+    makers = BLOCKS[kind]
+    parts = [f"# {kind.title()} document {index}\n\n"]
+    length = len(parts[0])
+    n = 0
+    while length < size:
+        block = makers[n % len(makers)](rng, n)
+        parts.append(block)
+        length += len(block.encode('utf-8'))
+        n += 1
+    return ''.join(parts)
+
+
+def generate_corpus(kind: str, docs: int, size: int, seed: int = 0) -> list:
+    """รายการ (ชื่อไฟล์, เนื้อหา) ของเอกสาร docs ไฟล์"""
+    return [(f"{kind}-{i:04d}.md", generate_document(kind, size, seed, i)) for i in range(docs)]
+
+
+def write_corpus(directory: str, kind: str, docs: int, size: int, seed: int = 0) -> list:
+    """เขียน corpus ลงโฟลเดอร์ directory/kind คืนรายการ path"""
+    target = os.path.join(directory, kind)
+    os.makedirs(target, exist_ok=True)
+    paths = []
+    for name, content in generate_corpus(kind, docs, size, seed):
+        path = os.path.join(target, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic Markdown corpora")
+    parser.add_argument('output_dir')
+    parser.add_argument('--kind', action='append', choices=KINDS,
+                        help='Corpus kind (repeatable, default: all)')
+    parser.add_argument('--docs', type=int, default=20)
+    parser.add_argument('--size', type=int, default=20000, help='Approximate bytes per document')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    for kind in args.kind or KINDS:
+        docs, size = (1, args.size * args.docs) if kind == 'huge' else (args.docs, args.size)
+        paths = write_corpus(args.output_dir, kind, docs, size, args.seed)
+        print(f"{kind:8s} {len(paths)} file(s) -> {os.path.join(args.output_dir, kind)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Benchmark Suite
+วัด throughput (MB/s, docs/s), latency percentiles และ peak RSS ของ MarkdownConverter.convert_to_html,
+Mermaid processors และ batch mode บน corpus สังเคราะห์ (benchmarks/corpus.py) แล้วบันทึกผลเป็น JSON
+ที่ใช้เป็น baseline และเทียบหา regression ได้ (แต่ละ case รันใน process ใหม่เพื่อให้ peak RSS แยกกัน)
+
+Usage:
+  python benchmarks/suite.py run [--scale quick|full] [--case NAME] [--output FILE] [--baseline FILE]
+  python benchmarks/suite.py compare BASELINE CURRENT [--threshold PERCENT]
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCHMARK_DIR))
+
+from corpus import generate_corpus, generate_document, write_corpus
+
+# ขนาดของ corpus: docs ต่อชนิด, bytes ต่อเอกสาร, ขนาดไฟล์ huge และจำนวนรอบ
+SCALES = {
+    'quick': {'docs': 10, 'size': 20000, 'huge_size': 2000000, 'rounds': 2},
+    'full': {'docs': 100, 'size': 50000, 'huge_size': 32000000, 'rounds': 5},
+}
+
+# metric ที่ใช้เทียบกับ baseline: (ชื่อ, ค่ามากกว่าดีกว่าหรือไม่)
+COMPARED_METRICS = (
+    ('mb_per_s', True),
+    ('docs_per_s', True),
+    ('p50_ms', False),
+    ('p90_ms', False),
+    ('peak_rss_mb', False),
+)
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    """percentile แบบ nearest-rank ของรายการที่เรียงแล้ว"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def peak_rss_mb(include_children: bool = False):
+    """peak RSS ของ process (และ child processes ถ้าระบุ) เป็น MB (None บน Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if include_children:
+        usage = max(usage, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux รายงานเป็น KB, macOS เป็น bytes
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return round(usage / scale, 1)
+
+
+def summarize(docs: int, size: int, seconds: float, latencies: list) -> dict:
+    """สรุปผลของหนึ่งรอบ (docs เอกสาร, size bytes ในเวลา seconds) และ latency ของทุกรอบ"""
+    latencies = sorted(latency * 1000 for latency in latencies)
+    return {
+        'docs': docs,
+        'bytes': size,
+        'seconds': round(seconds, 4),
+        'mb_per_s': round(size / seconds / 1e6, 3) if seconds else 0.0,
+        'docs_per_s': round(docs / seconds, 2) if seconds else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50), 3),
+        'p90_ms': round(percentile(latencies, 0.90), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'max_ms': round(latencies[-1], 3) if latencies else 0.0,
+    }
+
+
+def time_documents(func, documents: list, rounds: int) -> dict:
+    """เรียก func(ชื่อ, เนื้อหา) กับทุกเอกสาร rounds รอบ
+
+    throughput ใช้รอบที่เร็วที่สุด (ลดผลของเครื่องที่มีงานอื่นรบกวน) ส่วน latency ใช้ทุกรอบ
+    """
+    size = sum(len(content.encode('utf-8')) for _, content in documents)
+    latencies = []
+    best = None
+    for _ in range(rounds):
+        elapsed = 0.0
+        for name, content in documents:
+            start = time.perf_counter()
+            func(name, content)
+            latency = time.perf_counter() - start
+            latencies.append(latency)
+            elapsed += latency
+        best = elapsed if best is None else min(best, elapsed)
+    return summarize(len(documents), size, best, latencies)
+
+
+def make_converter():
+    from main import MarkdownConverter
+
+    converter = MarkdownConverter()
+    converter.warm()
+    return converter
+
+
+def bench_convert(kind: str):
+    """MarkdownConverter.convert_to_html กับ corpus ชนิด kind"""
+    def run(config: dict) -> dict:
+        if kind == 'huge':
+            documents = [('huge.md', generate_document('huge', config['huge_size'], config['seed']))]
+        else:
+            documents = generate_corpus(kind, config['docs'], config['size'], config['seed'])
+        converter = make_converter()
+        try:
+            return time_documents(lambda name, content: converter.convert_to_html(content, name),
+                                  documents, config['rounds'])
+        finally:
+            converter.cleanup()
+    return run
+
+
+def bench_mermaid_html(config: dict) -> dict:
+    """MermaidProcessorPy (interactive HTML) กับ corpus mermaid"""
+    from mermaid_processor_html import MermaidProcessorPy
+
+    documents = generate_corpus('mermaid', config['docs'], config['size'], config['seed'])
+    processor = MermaidProcessorPy()
+    try:
+        return time_documents(lambda name, content: processor.replace_mermaid_with_images(content),
+                              documents, config['rounds'])
+    finally:
+        processor.cleanup()
+
+
+def bench_mermaid_alternative(config: dict) -> dict:
+    """การแสดง Mermaid แบบโค้ด (--no-images) กับ corpus mermaid"""
+    documents = generate_corpus('mermaid', config['docs'], config['size'], config['seed'])
+    converter = make_converter()
+    try:
+        return time_documents(lambda name, content: converter.replace_mermaid_with_alternatives(content),
+                              documents, config['rounds'])
+    finally:
+        converter.cleanup()
+
+
+def bench_mermaid_prerender(config: dict) -> dict:
+    """convert_to_html พร้อม render Mermaid เป็น SVG ตอน build (stub renderer, SVG cache ชั่วคราว)
+
+    รอบแรก render ทุก diagram รอบถัดไปอ่านจาก cache (throughput จึงเป็นกรณี cache อุ่นแล้ว)
+    """
+    from main import MarkdownConverter
+
+    documents = generate_corpus('mermaid', config['docs'], config['size'], config['seed'])
+    with tempfile.TemporaryDirectory() as cache_dir:
+        converter = MarkdownConverter(mermaid_renderer='stub', mermaid_cache_dir=cache_dir)
+        converter.warm()
+        try:
+            return time_documents(lambda name, content: converter.convert_to_html(content, name),
+                                  documents, config['rounds'])
+        finally:
+            converter.cleanup()
+
+
+def bench_batch(search: bool = False):
+    """BatchConverter (process pool) กับทุก corpus ยกเว้น huge รวมเวลาเริ่ม worker
+
+    search=True รวมการเก็บข้อความของหน้าและการเขียน search index ด้วย
+    """
+    def run(config: dict) -> dict:
+        from batch_converter import BatchConverter, build_tasks
+        from search_index import SEARCH_DIR, SEARCH_SCRIPT_NAME, SearchIndexBuilder
+
+        with tempfile.TemporaryDirectory() as work_dir:
+            paths = []
+            for kind in ('prose', 'code', 'tables', 'mermaid', 'lists'):
+                paths += write_corpus(os.path.join(work_dir, 'docs'), kind,
+                                      config['docs'], config['size'], config['seed'])
+            size = sum(os.path.getsize(path) for path in paths)
+            output_dir = os.path.join(work_dir, 'html')
+            script = os.path.join(output_dir, SEARCH_DIR, SEARCH_SCRIPT_NAME) if search else None
+            tasks = build_tasks(paths, output_dir, search_script=script)
+
+            latencies = []
+            best = None
+            for _ in range(config['rounds']):
+                batch = BatchConverter(jobs=config['jobs'], manifest=None)
+                builder = SearchIndexBuilder(output_dir, replace=True) if search else None
+                start = time.perf_counter()
+                for result in batch.convert(tasks):
+                    if result['status'] == 'failed':
+                        raise Exception(f"Conversion failed: {result['path']}: {result['error']}")
+                    latencies.append(result['elapsed'])
+                    if builder is not None:
+                        builder.add(result['index'])
+                if builder is not None:
+                    builder.write()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        result = summarize(len(tasks), size, best, latencies)
+        result['jobs'] = config['jobs'] or os.cpu_count()
+        return result
+    return run
+
+
+CASES = {
+    'convert.prose': bench_convert('prose'),
+    'convert.code': bench_convert('code'),
+    'convert.tables': bench_convert('tables'),
+    'convert.mermaid': bench_convert('mermaid'),
+    'convert.lists': bench_convert('lists'),
+    'convert.huge': bench_convert('huge'),
+    'mermaid.html': bench_mermaid_html,
+    'mermaid.alternative': bench_mermaid_alternative,
+    'mermaid.prerender': bench_mermaid_prerender,
+    'batch.mixed': bench_batch(),
+    'batch.search': bench_batch(search=True),
+}
+
+
+def environment(config: dict) -> dict:
+    """ข้อมูลของเครื่องและเวอร์ชันที่มีผลต่อผลลัพธ์"""
+    import markdown
+    import pygments
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'markdown': markdown.__version__,
+        'pygments': pygments.__version__,
+        'scale': config['scale'],
+        'seed': config['seed'],
+        'rounds': config['rounds'],
+        'jobs': config['jobs'],
+        'date': time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+
+
+def run_case(name: str, config: dict, result_file: str):
+    """รัน case เดียวใน process นี้ และเขียนผลลงไฟล์ JSON"""
+    result = CASES[name](config)
+    result['peak_rss_mb'] = peak_rss_mb(include_children=name.startswith('batch.'))
+    with open(result_file, 'w', encoding='utf-8') as f:
+        json.dump(result, f)
+
+
+def run_in_child(name: str, config: dict) -> dict:
+    """รัน case ใน process ใหม่ (ข้อความของ converter ไม่ปนกับผลลัพธ์)"""
+    fd, result_file = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        command = [sys.executable, os.path.abspath(__file__), 'run-case', name,
+                   '--scale', config['scale'], '--seed', str(config['seed']),
+                   '--rounds', str(config['rounds']), '--result-file', result_file]
+        if config['jobs']:
+            command += ['--jobs', str(config['jobs'])]
+        completed = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        if completed.returncode != 0:
+            raise Exception(f"Benchmark case {name} failed:\n{completed.stderr}")
+        with open(result_file, encoding='utf-8') as f:
+            return json.load(f)
+    finally:
+        os.unlink(result_file)
+
+
+def print_results(cases: dict):
+    print(f"{'case':22s} {'MB/s':>8} {'docs/s':>9} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'RSS MB':>8}")
+    for name, result in cases.items():
+        rss = result['peak_rss_mb']
+        print(f"{name:22s} {result['mb_per_s']:>8.2f} {result['docs_per_s']:>9.1f} {result['p50_ms']:>9.2f} "
+              f"{result['p90_ms']:>9.2f} {result['p99_ms']:>9.2f} {rss if rss is not None else '-':>8}")
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list:
+    """เทียบผลกับ baseline คืนรายการ regression (case, metric, baseline, current, เปลี่ยนไป %)"""
+    for key in ('python', 'cpu_count', 'markdown', 'pygments', 'scale', 'seed', 'rounds', 'jobs'):
+        if baseline['environment'].get(key) != current['environment'].get(key):
+            print(f"Warning: {key} differs (baseline {baseline['environment'].get(key)}, "
+                  f"current {current['environment'].get(key)})")
+
+    regressions = []
+    print(f"{'case':22s} {'metric':12s} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current['cases'].items():
+        previous = baseline['cases'].get(name)
+        if previous is None:
+            print(f"{name:22s} (not in baseline)")
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            worse = -change if higher_is_better else change
+            flag = ''
+            if worse > threshold:
+                flag = '  REGRESSION'
+                regressions.append((name, metric, old, new, change))
+            elif -worse > threshold:
+                flag = '  improved'
+            print(f"{name:22s} {metric:12s} {old:>10.2f} {new:>10.2f} {change:>+7.1f}%{flag}")
+    for name in baseline['cases']:
+        if name not in current['cases']:
+            print(f"{name:22s} (missing from current results)")
+    return regressions
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def report_regressions(regressions: list, threshold: float):
+    if regressions:
+        print(f"{len(regressions)} regression(s) over {threshold:g}%")
+        sys.exit(1)
+    print(f"No regressions over {threshold:g}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="md2html benchmark suite")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    for command in ('run', 'run-case'):
+        sub = commands.add_parser(command)
+        if command == 'run-case':
+            sub.add_argument('name', choices=sorted(CASES))
+            sub.add_argument('--result-file', required=True)
+        else:
+            sub.add_argument('--case', action='append', choices=sorted(CASES),
+                             help='Run only this case (repeatable, default: all)')
+            sub.add_argument('--output', '-o', default='benchmark-results.json',
+                             help='JSON results file (default: benchmark-results.json)')
+            sub.add_argument('--baseline', help='Compare the results with this JSON baseline')
+            sub.add_argument('--threshold', type=float, default=10.0,
+                             help='Regression threshold in percent (default: 10)')
+        sub.add_argument('--scale', choices=sorted(SCALES), default='quick')
+        sub.add_argument('--seed', type=int, default=0)
+        sub.add_argument('--rounds', type=int, default=None,
+                         help='Repetitions per case (default: from --scale)')
+        sub.add_argument('--jobs', '-j', type=int, default=None,
+                         help='Worker processes for batch.mixed (default: CPU count)')
+
+    sub = commands.add_parser('compare')
+    sub.add_argument('baseline')
+    sub.add_argument('current')
+    sub.add_argument('--threshold', type=float, default=10.0,
+                     help='Regression threshold in percent (default: 10)')
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        regressions = compare(load_results(args.baseline), load_results(args.current), args.threshold)
+        report_regressions(regressions, args.threshold)
+        return
+
+    config = dict(SCALES[args.scale], scale=args.scale, seed=args.seed, jobs=args.jobs)
+    if args.rounds:
+        config['rounds'] = args.rounds
+    if args.command == 'run-case':
+        run_case(args.name, config, args.result_file)
+        return
+
+    results = {'environment': environment(config), 'cases': {}}
+    for name in args.case or CASES:
+        print(f"Running {name}...", flush=True)
+        results['cases'][name] = run_in_child(name, config)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print_results(results['cases'])
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(load_results(args.baseline), results, args.threshold)
+        report_regressions(regressions, args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Incremental Build Cache
+บันทึก manifest ของการแปลงไฟล์ เพื่อข้ามไฟล์ที่ไม่มีการเปลี่ยนแปลงในการรันครั้งถัดไป
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+MANIFEST_NAME = ".md2html-manifest.json"
+MANIFEST_VERSION = 1
+
+
+def hash_bytes(data: bytes) -> str:
+    """คำนวณ hash ของข้อมูล"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    """คำนวณ hash ของไฟล์โดยอ่านทีละส่วน"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_source(file_path: str):
+    """อ่านไฟล์ Markdown ครั้งเดียว คืนค่า (เนื้อหา, hash ของไฟล์)"""
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    except Exception as e:
+        raise Exception(f"Error reading file {file_path}: {e}")
+    return decode_source(data, file_path)
+
+
+def decode_source(data: bytes, file_path: str):
+    """แปลง bytes ของไฟล์ Markdown เป็นข้อความ (ขึ้นบรรทัดแบบ LF) คืนค่า (เนื้อหา, hash ของไฟล์)"""
+    try:
+        content = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    except Exception as e:
+        raise Exception(f"Error reading file {file_path}: {e}")
+    return content, hash_bytes(data)
+
+
+def settings_hash(settings: dict) -> str:
+    """คำนวณ hash ของการตั้งค่า converter"""
+    encoded = json.dumps(settings, sort_keys=True, default=str).encode('utf-8')
+    return hash_bytes(encoded)
+
+
+class BuildManifest:
+    """Manifest ที่เก็บ hash ของไฟล์ต้นฉบับและการตั้งค่าที่ใช้สร้างไฟล์ output แต่ละไฟล์"""
+
+    def __init__(self, output_dir: str):
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self.dirty = False
+        self.load()
+
+    def load(self):
+        """โหลด manifest จากดิสก์ (ถ้าไฟล์เสียหรือคนละเวอร์ชัน จะเริ่มใหม่)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get('version') == MANIFEST_VERSION:
+            self.entries = data.get('entries', {})
+
+    def save(self):
+        """บันทึก manifest ลงดิสก์แบบ atomic (เขียนเฉพาะเมื่อมีการเปลี่ยนแปลง)"""
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=MANIFEST_NAME, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'entries': self.entries}, f)
+            os.replace(temp_path, self.path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+        self.dirty = False
+
+    def is_up_to_date(self, source: str, output: str, settings_key: str) -> bool:
+        """ตรวจสอบว่าไฟล์ output ยังตรงกับไฟล์ต้นฉบับและการตั้งค่าปัจจุบันหรือไม่
+
+        ใช้ขนาดและ mtime ของไฟล์ต้นฉบับเป็นทางลัด และคำนวณ hash เฉพาะเมื่อ stat เปลี่ยน
+        """
+        entry = self.entries.get(os.path.abspath(source))
+        if entry is None or entry['settings'] != settings_key:
+            return False
+        if entry['output'] != os.path.abspath(output):
+            return False
+
+        try:
+            source_stat = os.stat(source)
+            output_stat = os.stat(output)
+        except OSError:
+            return False
+
+        # ไฟล์ output ถูกลบหรือแก้ไขจากภายนอก
+        if output_stat.st_size != entry['output_size'] or output_stat.st_mtime_ns != entry['output_mtime_ns']:
+            return False
+
+        if source_stat.st_size == entry['size'] and source_stat.st_mtime_ns == entry['mtime_ns']:
+            return True
+
+        # stat เปลี่ยน (เช่น touch หรือ checkout ใหม่) ให้เทียบเนื้อหาจริง
+        if source_stat.st_size != entry['size'] or hash_file(source) != entry['hash']:
+            return False
+        entry['mtime_ns'] = source_stat.st_mtime_ns
+        self.dirty = True
+        return True
+
+    def record(self, source: str, output: str, settings_key: str, content_hash: str):
+        """บันทึกผลการแปลงไฟล์ที่สำเร็จ"""
+        source_stat = os.stat(source)
+        output_stat = os.stat(output)
+        self.entries[os.path.abspath(source)] = {
+            'hash': content_hash,
+            'size': source_stat.st_size,
+            'mtime_ns': source_stat.st_mtime_ns,
+            'settings': settings_key,
+            'output': os.path.abspath(output),
+            'output_size': output_stat.st_size,
+            'output_mtime_ns': output_stat.st_mtime_ns,
+        }
+        self.dirty = True
+
+    def forget(self, source: str):
+        """ลบข้อมูลของไฟล์ออกจาก manifest"""
+        if self.entries.pop(os.path.abspath(source), None) is not None:
+            self.dirty = True
+
+    def stale_outputs(self, sources: list) -> list:
+        """คืนรายการไฟล์ output ที่ไฟล์ต้นฉบับไม่อยู่ในชุดที่แปลงแล้ว (เช่น ถูกลบหรือย้าย)"""
+        current = {os.path.abspath(source) for source in sources}
+        stale = []
+        for source, entry in list(self.entries.items()):
+            if source not in current and not os.path.exists(source):
+                stale.append(entry['output'])
+                del self.entries[source]
+                self.dirty = True
+        return sorted(stale)
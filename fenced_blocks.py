@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Fenced Block Scanner
+หา fenced code blocks ทั้งหมดในเอกสารด้วยการสแกนรอบเดียว (``` และ ~~~, CRLF, fence ที่ย่อหน้าไม่เกิน 3 ช่องว่าง)
+แล้วส่งแต่ละ block ให้ handler ตามภาษา เช่น mermaid
+"""
+
+import re
+from collections import namedtuple
+
+# fence ย่อหน้าได้ไม่เกิน 3 ช่องว่าง (4 ช่องขึ้นไปหรือ tab คือ indented code block ซึ่ง Markdown แสดงเป็นโค้ดตามตัวอักษร)
+# บรรทัด fence หนึ่งบรรทัด (ใช้กับการอ่านทีละบรรทัด)
+FENCE_PATTERN = re.compile(r'^ {0,3}(?P<fence>`{3,}|~{3,})(?P<info>.*)$')
+
+# บรรทัด fence ที่เริ่มจากต้นบรรทัด (ใช้ร่วมกับ str.find เพื่อกระโดดไปยังตำแหน่งที่มี ``` หรือ ~~~)
+FENCE_LINE_PATTERN = re.compile(r'(?P<indent> {0,3})(?P<fence>`{3,}|~{3,})(?P<info>[^\r\n]*?)\r?(?=\n|$)')
+
+# ภาษาจาก info string เช่น "mermaid", "python title=x", "{.python}"
+LANGUAGE_PATTERN = re.compile(r'\{?\s*\.?([^\s{}.`]+)')
+
+# language: ภาษาตัวพิมพ์เล็ก ('' ถ้าไม่ระบุ), info: info string ทั้งหมด
+# content: เนื้อหาภายใน block (ตัด indent ของ fence ออก และขึ้นบรรทัดด้วย \n)
+# start/end: ตำแหน่งใน text ตั้งแต่ fence เปิด (ไม่รวม indent) ถึงท้าย fence ปิด (ไม่รวม newline)
+FencedBlock = namedtuple('FencedBlock', ['language', 'info', 'content', 'start', 'end', 'indent'])
+
+
+class FenceTracker:
+    """ติดตามว่าบรรทัดปัจจุบันอยู่ภายใน fenced code block หรือไม่ (สำหรับอ่านทีละบรรทัด)"""
+
+    def __init__(self):
+        self.fence = None
+
+    @property
+    def inside(self) -> bool:
+        return self.fence is not None
+
+    def feed(self, line: str) -> bool:
+        """อัปเดตสถานะด้วยบรรทัดถัดไป คืนค่า True ถ้าบรรทัดนี้เป็นบรรทัด fence"""
+        match = FENCE_PATTERN.match(line)
+        if match is None:
+            return False
+        fence = match.group('fence')
+        info = match.group('info').strip()
+        if self.fence is None:
+            if not _is_valid_opening(fence, info):
+                return False
+            self.fence = fence
+            return True
+        if _is_closing(self.fence, fence, info):
+            self.fence = None
+            return True
+        return False
+
+
+def _is_valid_opening(fence: str, info: str) -> bool:
+    """info string ของ backtick fence ต้องไม่มี backtick"""
+    return not (fence[0] == '`' and '`' in info)
+
+
+def _is_closing(opening: str, fence: str, info: str) -> bool:
+    """fence ปิดต้องเป็นตัวอักษรเดียวกัน ยาวไม่น้อยกว่า fence เปิด และไม่มี info string"""
+    return fence[0] == opening[0] and len(fence) >= len(opening) and not info
+
+
+def _block_content(text: str, opening, closing) -> str:
+    """ดึงเนื้อหาระหว่าง fence เปิดและปิด พร้อมตัด indent และแปลง CRLF"""
+    content_start = opening.end() + 1
+    content_end = closing.start()
+    if content_start >= content_end:
+        return ''
+    content = text[content_start:content_end]
+    if content.endswith('\n'):
+        content = content[:-1]
+    if '\r' in content:
+        content = content.replace('\r\n', '\n')
+    indent = len(opening.group('indent'))
+    if indent:
+        lines = content.split('\n')
+        for i, line in enumerate(lines):
+            stripped = line.lstrip(' \t')
+            lines[i] = line[min(indent, len(line) - len(stripped)):]
+        content = '\n'.join(lines)
+    return content
+
+
+def _iter_fence_lines(text: str):
+    """หาบรรทัดที่อาจเป็น fence โดยใช้ str.find หา ``` และ ~~~ (เร็วกว่า regex ที่ต้องลองทุกตำแหน่ง)"""
+    find = text.find
+    pos = 0
+    next_backtick = find('```')
+    next_tilde = find('~~~')
+    while next_backtick != -1 or next_tilde != -1:
+        if next_tilde == -1 or (next_backtick != -1 and next_backtick < next_tilde):
+            candidate = next_backtick
+        else:
+            candidate = next_tilde
+
+        # fence ต้องมีเพียง whitespace นำหน้าในบรรทัดเดียวกัน
+        line_start = text.rfind('\n', 0, candidate) + 1
+        match = None
+        if line_start == candidate or not text[line_start:candidate].strip(' \t'):
+            match = FENCE_LINE_PATTERN.match(text, line_start)
+        if match is not None:
+            yield match
+            pos = match.end()
+        else:
+            pos = candidate + 3
+
+        if next_backtick != -1 and next_backtick < pos:
+            next_backtick = find('```', pos)
+        if next_tilde != -1 and next_tilde < pos:
+            next_tilde = find('~~~', pos)
+
+
+def _iter_fence_pairs(text: str):
+    """จับคู่ fence เปิดและปิด คืนค่า (match ของ fence เปิด, match ของ fence ปิด)"""
+    opening = None
+    for match in _iter_fence_lines(text):
+        fence = match.group('fence')
+        info = match.group('info').strip()
+        if opening is None:
+            if _is_valid_opening(fence, info):
+                opening = match
+        elif _is_closing(opening.group('fence'), fence, info):
+            yield opening, match
+            opening = None
+
+
+def _language(opening) -> str:
+    """ภาษาของ block จาก info string (ตัวพิมพ์เล็ก)"""
+    language = LANGUAGE_PATTERN.match(opening.group('info').strip())
+    return language.group(1).lower() if language else ''
+
+
+def _make_block(text: str, opening, closing, language: str) -> FencedBlock:
+    """สร้าง FencedBlock จาก match ของ fence เปิดและปิด"""
+    return FencedBlock(
+        language=language,
+        info=opening.group('info').strip(),
+        content=_block_content(text, opening, closing),
+        start=opening.start('fence'),
+        end=closing.end(),
+        indent=opening.group('indent'),
+    )
+
+
+def scan_fenced_blocks(text: str):
+    """หา fenced blocks ทั้งหมดใน text ตามลำดับ ด้วยการสแกนรอบเดียว (O(n))
+
+    block ที่ไม่มี fence ปิดจะถูกข้าม
+    """
+    for opening, closing in _iter_fence_pairs(text):
+        yield _make_block(text, opening, closing, _language(opening))
+
+
+def replace_fenced_blocks(text: str, handlers: dict) -> str:
+    """แทนที่ fenced blocks ด้วยผลลัพธ์จาก handler ของภาษานั้น ๆ
+
+    handlers คือ dict ของ {ภาษา: callable(FencedBlock) -> str หรือ None}
+    ถ้า handler คืนค่า None จะคง block เดิมไว้
+    """
+    if not handlers:
+        return text
+
+    pieces = []
+    last = 0
+    for opening, closing in _iter_fence_pairs(text):
+        language = _language(opening)
+        handler = handlers.get(language)
+        if handler is None:
+            # ไม่ต้องดึงเนื้อหาของ block ที่ไม่มี handler
+            continue
+        block = _make_block(text, opening, closing, language)
+        replacement = handler(block)
+        if replacement is None:
+            continue
+        pieces.append(text[last:block.start])
+        pieces.append(replacement)
+        last = block.end
+
+    if not pieces:
+        return text
+    pieces.append(text[last:])
+    return ''.join(pieces)
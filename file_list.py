@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Virtual File List
+รายการไฟล์สำหรับ GUI ที่เก็บข้อมูลไฟล์ใน array แบบกะทัดรัด และสร้างแถวใน Treeview เฉพาะแถวที่มองเห็น
+ทำให้แสดงโฟลเดอร์ที่มีไฟล์นับแสนได้โดยไม่ช้าและไม่กินหน่วยความจำตามจำนวนไฟล์
+"""
+
+import os
+import threading
+import time
+import tkinter as tk
+from array import array
+from tkinter import ttk
+
+# สถานะของไฟล์ (เก็บเป็นหนึ่ง byte ต่อไฟล์)
+STATUS_NONE = 0
+STATUS_QUEUED = 1
+STATUS_RUNNING = 2
+STATUS_DONE = 3
+STATUS_FAILED = 4
+STATUS_CACHED = 5
+
+STATUS_LABELS = ('', 'รอแปลง', 'กำลังแปลง', 'เสร็จ', 'ล้มเหลว', 'ไม่เปลี่ยนแปลง')
+
+# สถานะจากผลลัพธ์ของ BatchConverter
+RESULT_STATUS = {
+    'converted': STATUS_DONE,
+    'failed': STATUS_FAILED,
+    'cached': STATUS_CACHED,
+}
+
+DEFAULT_ROW_HEIGHT = 20
+WHEEL_ROWS = 3
+
+
+def format_size(size: int) -> str:
+    """ขนาดไฟล์สำหรับแสดงผล"""
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 * 1024:
+        return f"{size // 1024} KB"
+    return f"{size // (1024 * 1024)} MB"
+
+
+class FileListModel:
+    """ข้อมูลไฟล์ทั้งหมดของรายการ (path, ขนาด, เวลาแก้ไข และสถานะ) แบบ thread-safe
+
+    ขนาดและเวลาเก็บใน array และสถานะใน bytearray แทน dict ต่อไฟล์
+    generation เปลี่ยนทุกครั้งที่ล้างรายการ เพื่อทิ้งข้อมูลที่มาช้าจากการสแกน/การแปลงครั้งก่อน
+    version เปลี่ยนทุกครั้งที่ข้อมูลเปลี่ยน เพื่อให้ view วาดใหม่เฉพาะเมื่อจำเป็น
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.version = 0
+        self._reset()
+
+    def _reset(self):
+        self.paths = []
+        self.sizes = array('q')
+        self.mtimes = array('d')
+        self.statuses = bytearray()
+        self.counts = [0] * len(STATUS_LABELS)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def clear(self) -> int:
+        """ล้างรายการและคืน generation ใหม่"""
+        with self.lock:
+            self._reset()
+            self.generation += 1
+            self.version += 1
+            return self.generation
+
+    def _append(self, files):
+        added = len(self.paths)
+        for found in files:
+            self.paths.append(found.path)
+            self.sizes.append(found.size)
+            self.mtimes.append(found.mtime)
+        added = len(self.paths) - added
+        self.statuses.extend(bytes(added))
+        self.counts[STATUS_NONE] += added
+        self.version += 1
+
+    def extend(self, files, generation: int = None):
+        """เพิ่ม ScannedFile หลายไฟล์ท้ายรายการ (เรียกจาก thread ใดก็ได้)"""
+        with self.lock:
+            if generation is None or generation == self.generation:
+                self._append(files)
+
+    def replace(self, files, generation: int = None):
+        """แทนที่รายการทั้งหมดด้วย files (เช่น ผลการสแกนที่เรียงแล้ว)"""
+        with self.lock:
+            if generation is None or generation == self.generation:
+                self._reset()
+                self._append(files)
+
+    def reset_statuses(self, status: int = STATUS_QUEUED) -> int:
+        """ตั้งสถานะของทุกไฟล์ (เช่น รอแปลง) และคืน generation ปัจจุบัน"""
+        with self.lock:
+            self.statuses = bytearray([status]) * len(self.paths)
+            self.counts = [0] * len(STATUS_LABELS)
+            self.counts[status] = len(self.paths)
+            self.version += 1
+            return self.generation
+
+    def set_status(self, index: int, status: int, generation: int = None):
+        """เปลี่ยนสถานะของไฟล์ลำดับที่ index (เรียกจาก thread ใดก็ได้)"""
+        with self.lock:
+            if generation is not None and generation != self.generation:
+                return
+            previous = self.statuses[index]
+            if previous != status:
+                self.counts[previous] -= 1
+                self.counts[status] += 1
+                self.statuses[index] = status
+                self.version += 1
+
+    def status(self, index: int) -> int:
+        """สถานะของไฟล์ลำดับที่ index (STATUS_NONE ถ้ารายการถูกล้างไปแล้ว)"""
+        with self.lock:
+            return self.statuses[index] if index < len(self.statuses) else STATUS_NONE
+
+    def count(self, status: int) -> int:
+        return self.counts[status]
+
+    def snapshot(self) -> list:
+        """สำเนารายการ path ทั้งหมด"""
+        with self.lock:
+            return list(self.paths)
+
+    def rows(self, start: int, count: int) -> list:
+        """ข้อมูลของแถว start ถึง start + count - 1 เป็น (path, size, mtime, status)"""
+        with self.lock:
+            end = min(start + count, len(self.paths))
+            return [(self.paths[i], self.sizes[i], self.mtimes[i], self.statuses[i])
+                    for i in range(start, end)]
+
+
+class VirtualFileList:
+    """Treeview ที่มีแถวเท่ากับจำนวนแถวที่มองเห็น และเติมข้อมูลจาก FileListModel ตามตำแหน่งที่เลื่อน
+
+    การเลื่อน การปรับขนาด และ refresh() วาดเฉพาะแถวที่ข้อมูลเปลี่ยน
+    """
+
+    def __init__(self, parent, model: FileListModel, height: int = 6):
+        self.model = model
+        self.offset = 0
+        self.visible_rows = height
+        self._items = []  # iid ของแถวที่สร้างไว้ (ใช้ซ้ำเมื่อเลื่อน)
+        self._rendered = {}  # iid -> ข้อมูลที่แสดงอยู่
+        self._rendered_version = None
+
+        self.tree = ttk.Treeview(parent, height=height, show="tree headings", selectmode="none")
+        self.tree["columns"] = ("size", "modified", "status")
+        self.tree.column("#0", width=260, minwidth=160)
+        self.tree.column("size", width=70, minwidth=60)
+        self.tree.column("modified", width=120, minwidth=100)
+        self.tree.column("status", width=100, minwidth=80)
+
+        self.tree.heading("#0", text="ชื่อไฟล์")
+        self.tree.heading("size", text="ขนาด")
+        self.tree.heading("modified", text="แก้ไขล่าสุด")
+        self.tree.heading("status", text="สถานะ")
+
+        # scrollbar อ้างอิงตำแหน่งใน model ไม่ใช่แถวใน Treeview
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
+
+        self.tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+
+        self.tree.bind("<Configure>", self.on_resize)
+        self.tree.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_rows(-WHEEL_ROWS))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_rows(WHEEL_ROWS))
+
+        row_height = ttk.Style().lookup("Treeview", "rowheight")
+        self.row_height = int(row_height) if row_height else DEFAULT_ROW_HEIGHT
+
+    def yview(self, *args):
+        """คำสั่งจาก scrollbar ('moveto', fraction) หรือ ('scroll', n, 'units'/'pages')"""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.model))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= max(1, self.visible_rows - 1)
+            self.offset += step
+        self.refresh(force=True)
+
+    def scroll_rows(self, rows: int):
+        self.offset += rows
+        self.refresh(force=True)
+
+    def on_mouse_wheel(self, event):
+        """Windows ส่ง delta ทีละ 120, macOS ส่งค่าเล็ก ๆ"""
+        notches = event.delta // 120 if abs(event.delta) >= 120 else (1 if event.delta > 0 else -1)
+        self.scroll_rows(-notches * WHEEL_ROWS)
+
+    def on_resize(self, event):
+        """คำนวณจำนวนแถวที่มองเห็นใหม่เมื่อ Treeview เปลี่ยนขนาด (หักแถวหัวตาราง)"""
+        rows = max(1, event.height // self.row_height - 1)
+        if rows != self.visible_rows:
+            self.visible_rows = rows
+            self.refresh(force=True)
+
+    def refresh(self, force: bool = False):
+        """วาดแถวที่มองเห็นใหม่ถ้าข้อมูลเปลี่ยนตั้งแต่ครั้งก่อน"""
+        version = self.model.version
+        if not force and version == self._rendered_version:
+            return
+        self._rendered_version = version
+
+        total = len(self.model)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        rows = self.model.rows(self.offset, self.visible_rows)
+
+        # สร้าง/ลบแถวให้เท่ากับจำนวนแถวที่ต้องแสดง
+        while len(self._items) < len(rows):
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > len(rows):
+            iid = self._items.pop()
+            self._rendered.pop(iid, None)
+            self.tree.delete(iid)
+
+        for iid, (path, size, mtime, status) in zip(self._items, rows):
+            key = (path, size, mtime, status)
+            if self._rendered.get(iid) == key:
+                continue
+            self._rendered[iid] = key
+            self.tree.item(iid, text=os.path.basename(path),
+                           values=(format_size(size),
+                                   time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime)),
+                                   STATUS_LABELS[status]))
+
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(rows)) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
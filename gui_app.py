@@ -10,10 +10,21 @@ import threading
 import os
 import sys
 from pathlib import Path
+import time
 import webbrowser
 
 # Import จาก main.py
-from main import MarkdownConverter
+from main import MarkdownConverter, write_site_asset
+from batch_converter import BatchConverter, build_tasks
+from output_writer import write_output
+from build_cache import BuildManifest
+from scanner import DirectoryScanner, default_index_path
+from site_index import SITE_ASSET_NAME
+from file_list import (FileListModel, VirtualFileList, RESULT_STATUS,
+                       STATUS_CACHED, STATUS_DONE, STATUS_FAILED, STATUS_QUEUED, STATUS_RUNNING)
+
+# ความถี่ในการวาดรายการไฟล์และสถานะใหม่ระหว่างสแกน/แปลง (รวมการอัปเดตทั้งหมดในช่วงนั้นเป็นครั้งเดียว)
+REFRESH_INTERVAL_MS = 100
 
 
 class MarkdownConverterGUI:
@@ -30,18 +41,30 @@ class MarkdownConverterGUI:
         self.document_title = tk.StringVar(value="Document")
         self.selected_format = tk.StringVar(value="html")
         self.include_images = tk.BooleanVar(value=True)
+        self.build_site = tk.BooleanVar(value=False)  # โหมดโฟลเดอร์: คงโครงสร้างโฟลเดอร์และสร้างเมนูนำทาง
         self.input_mode = tk.StringVar(value="file")  # "file" or "folder"
-        self.found_files = []  # รายการไฟล์ที่พบ
+        self.file_list = FileListModel()  # รายการไฟล์ที่พบ
+        self.scan_job = None  # การสแกนโฟลเดอร์ที่กำลังทำงาน
+        self.converting = False
+        self.convert_started = None  # เวลาเริ่มแปลงหลายไฟล์ (สำหรับคำนวณความเร็ว)
+        self.refresh_pending = False
         
-        # สร้าง converter
-        self.converter = MarkdownConverter()
+        # converter ถูกสร้างเมื่อแปลงไฟล์ครั้งแรก เพื่อให้หน้าต่างเปิดได้ทันที
+        self._converter = None
         
         self.create_widgets()
+    
+    @property
+    def converter(self):
+        """MarkdownConverter ที่สร้างเมื่อใช้งานครั้งแรก"""
+        if self._converter is None:
+            self._converter = MarkdownConverter()
+        return self._converter
         
     def create_widgets(self):
         """สร้าง GUI widgets"""
         # Main frame
-        main_frame = ttk.Frame(self.root, padding="10")
+        self.main_frame = main_frame = ttk.Frame(self.root, padding="10")
         main_frame.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
         # Configure grid weights
@@ -71,25 +94,10 @@ class MarkdownConverterGUI:
         
         # File list (for folder mode)
         self.file_list_frame = ttk.LabelFrame(main_frame, text="ไฟล์ที่พบ", padding="5")
-        self.file_list_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E), pady=5)
-        
-        # Create Treeview for file list
-        self.file_tree = ttk.Treeview(self.file_list_frame, height=6, show="tree headings")
-        self.file_tree["columns"] = ("size", "modified")
-        self.file_tree.column("#0", width=300, minwidth=200)
-        self.file_tree.column("size", width=80, minwidth=60)
-        self.file_tree.column("modified", width=120, minwidth=100)
+        self.file_list_frame.grid(row=3, column=0, columnspan=3, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         
-        self.file_tree.heading("#0", text="ชื่อไฟล์")
-        self.file_tree.heading("size", text="ขนาด")
-        self.file_tree.heading("modified", text="แก้ไขล่าสุด")
-        
-        # Scrollbar for file list
-        file_scrollbar = ttk.Scrollbar(self.file_list_frame, orient="vertical", command=self.file_tree.yview)
-        self.file_tree.configure(yscrollcommand=file_scrollbar.set)
-        
-        self.file_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
-        file_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        # Treeview ที่สร้างแถวเฉพาะส่วนที่มองเห็น (รองรับโฟลเดอร์ที่มีไฟล์จำนวนมาก)
+        self.file_view = VirtualFileList(self.file_list_frame, self.file_list, height=6)
         
         # Configure grid weights for file list
         self.file_list_frame.columnconfigure(0, weight=1)
@@ -115,7 +123,13 @@ class MarkdownConverterGUI:
         ttk.Label(format_frame, text="HTML (เท่านั้น)", font=("Arial", 10, "bold")).pack(side=tk.LEFT)
         
         # Include images option
-        ttk.Checkbutton(main_frame, text="รวม Mermaid diagrams", variable=self.include_images).grid(row=7, column=0, columnspan=3, sticky=tk.W, pady=10)
+        options_frame = ttk.Frame(main_frame)
+        options_frame.grid(row=7, column=0, columnspan=3, sticky=tk.W, pady=10)
+        ttk.Checkbutton(options_frame, text="รวม Mermaid diagrams", variable=self.include_images).pack(side=tk.LEFT, padx=(0, 10))
+        
+        # Site option (folder mode): แสดงเฉพาะโหมดโฟลเดอร์
+        self.site_check = ttk.Checkbutton(options_frame, text="สร้างเว็บไซต์ (คงโครงสร้างโฟลเดอร์ + เมนูนำทาง)",
+                                          variable=self.build_site)
         
         # Convert button
         convert_button = ttk.Button(main_frame, text="แปลงไฟล์", command=self.convert_file)
@@ -137,9 +151,13 @@ class MarkdownConverterGUI:
         """เมื่อเปลี่ยนโหมดการทำงาน"""
         if self.input_mode.get() == "folder":
             self.file_list_frame.grid()
+            self.site_check.pack(side=tk.LEFT)
+            self.main_frame.rowconfigure(3, weight=1)  # ให้รายการไฟล์ขยายตามหน้าต่าง
             self.root.geometry("600x700")  # เพิ่มความสูง
         else:
             self.file_list_frame.grid_remove()
+            self.site_check.pack_forget()
+            self.main_frame.rowconfigure(3, weight=0)
             self.root.geometry("600x500")  # ลดความสูง
             self.clear_file_list()
     
@@ -170,57 +188,82 @@ class MarkdownConverterGUI:
             self.scan_markdown_files(folder_path)
     
     def scan_markdown_files(self, folder_path):
-        """สแกนไฟล์ .md ในโฟลเดอร์"""
-        try:
-            self.found_files = []
-            self.clear_file_list()
-            
-            # สแกนไฟล์ .md ทั้งหมดในโฟลเดอร์
-            for root, dirs, files in os.walk(folder_path):
-                for file in files:
-                    if file.lower().endswith('.md'):
-                        file_path = os.path.join(root, file)
-                        file_size = os.path.getsize(file_path)
-                        file_mtime = os.path.getmtime(file_path)
-                        
-                        # แปลงขนาดไฟล์
-                        if file_size < 1024:
-                            size_str = f"{file_size} B"
-                        elif file_size < 1024 * 1024:
-                            size_str = f"{file_size // 1024} KB"
-                        else:
-                            size_str = f"{file_size // (1024 * 1024)} MB"
-                        
-                        # แปลงเวลาแก้ไข
-                        import datetime
-                        mtime_str = datetime.datetime.fromtimestamp(file_mtime).strftime("%Y-%m-%d %H:%M")
-                        
-                        # เพิ่มในรายการ
-                        self.found_files.append({
-                            'path': file_path,
-                            'name': file,
-                            'size': size_str,
-                            'modified': mtime_str
-                        })
-            
-            # แสดงใน Treeview
-            for file_info in self.found_files:
-                self.file_tree.insert("", "end", 
-                                    text=file_info['name'],
-                                    values=(file_info['size'], file_info['modified']))
-            
-            # อัปเดต status
-            count = len(self.found_files)
-            self.status_label.config(text=f"พบไฟล์ Markdown {count} ไฟล์")
-            
-        except Exception as e:
-            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถสแกนโฟลเดอร์ได้: {e}")
+        """สแกนไฟล์ .md ในโฟลเดอร์ใน background thread โดยเพิ่มผลลัพธ์ลงในรายการทีละชุด"""
+        # ยกเลิกการสแกนครั้งก่อนที่ยังไม่เสร็จ
+        if self.scan_job is not None:
+            self.scan_job.cancel()
+        generation = self.clear_file_list()
+        self.status_label.config(text="กำลังสแกนโฟลเดอร์...")
+        
+        scanner = DirectoryScanner(folder_path, index_path=default_index_path(folder_path))
+        job = None
+        
+        def on_batch(batch):
+            # เพิ่มลงใน model โดยตรง หน้าจอจะวาดใหม่ใน refresh_file_list รอบถัดไป
+            self.file_list.extend(batch, generation)
+        
+        def on_done(result, error):
+            self.root.after(0, lambda: self.scan_finished(job, generation, result, error))
+        
+        job = scanner.start(on_batch, on_done)
+        self.scan_job = job
+        self.schedule_refresh()
+    
+    def scan_finished(self, job, generation, result, error):
+        """การสแกนเสร็จสิ้น (เรียกใน UI thread)"""
+        if job is not self.scan_job:
+            return
+        self.scan_job = None
+        if error is not None:
+            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถสแกนโฟลเดอร์ได้: {error}")
+            return
+        
+        # แทนที่ด้วยรายการที่เรียงตาม path
+        self.file_list.replace(result, generation)
+        self.file_view.refresh()
+        
+        # อัปเดต status
+        count = len(self.file_list)
+        self.status_label.config(text=f"พบไฟล์ Markdown {count} ไฟล์")
     
     def clear_file_list(self):
-        """ล้างรายการไฟล์"""
-        for item in self.file_tree.get_children():
-            self.file_tree.delete(item)
-        self.found_files = []
+        """ล้างรายการไฟล์ และคืน generation ใหม่ของรายการ"""
+        generation = self.file_list.clear()
+        self.file_view.refresh()
+        return generation
+    
+    def schedule_refresh(self):
+        """ตั้งเวลาวาดรายการไฟล์ใหม่ (ตั้งครั้งเดียวแม้ถูกเรียกหลายครั้ง)"""
+        if not self.refresh_pending:
+            self.refresh_pending = True
+            self.root.after(REFRESH_INTERVAL_MS, self.refresh_file_list)
+    
+    def refresh_file_list(self):
+        """วาดแถวที่มองเห็นและข้อความสถานะใหม่ ทำซ้ำทุก REFRESH_INTERVAL_MS ระหว่างสแกน/แปลง"""
+        self.refresh_pending = False
+        self.file_view.refresh()
+        if self.scan_job is not None:
+            self.status_label.config(text=f"กำลังสแกนโฟลเดอร์... พบ {len(self.file_list)} ไฟล์")
+        elif self.converting and self.convert_started is not None:
+            self.status_label.config(text=self.progress_text())
+        if self.scan_job is not None or self.converting:
+            self.schedule_refresh()
+    
+    def progress_text(self):
+        """ความคืบหน้าและความเร็วของการแปลงหลายไฟล์"""
+        model = self.file_list
+        converted = model.count(STATUS_DONE)
+        failed = model.count(STATUS_FAILED)
+        cached = model.count(STATUS_CACHED)
+        finished = converted + failed + cached
+        elapsed = time.perf_counter() - self.convert_started
+        rate = finished / elapsed if elapsed > 0 else 0.0
+        text = f"กำลังแปลงไฟล์ {finished}/{len(model)} ({rate:.0f} ไฟล์/วินาที)"
+        if cached:
+            text += f" ไม่เปลี่ยนแปลง {cached}"
+        if failed:
+            text += f" ล้มเหลว {failed}"
+        return text
     
     def select_output_file(self):
         """เลือกไฟล์ Output"""
@@ -258,6 +301,10 @@ class MarkdownConverterGUI:
         # เริ่มการแปลงใน thread แยก
         self.progress.start()
         self.status_label.config(text="กำลังแปลงไฟล์...")
+        if self.input_mode.get() == "folder":
+            self.converting = True
+            self.convert_started = None
+            self.schedule_refresh()
         
         thread = threading.Thread(target=self.convert_thread)
         thread.daemon = True
@@ -291,12 +338,14 @@ class MarkdownConverterGUI:
         
         # แปลงเป็น HTML
         html_content = self.converter.convert_to_html(content, self.document_title.get())
-        with open(self.output_file.get(), 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        # เขียนแบบ atomic และข้ามถ้า HTML เหมือนไฟล์เดิม
+        write_output(self.output_file.get(), html_content.encode('utf-8'))
     
     def convert_multiple_files(self):
-        """แปลงหลายไฟล์"""
-        if not self.found_files:
+        """แปลงหลายไฟล์ (สถานะของแต่ละไฟล์ถูกเขียนลง model และแสดงผลโดย refresh_file_list)"""
+        model = self.file_list
+        paths = model.snapshot()
+        if not paths:
             raise Exception("ไม่พบไฟล์ Markdown ในโฟลเดอร์")
         
         # สร้างโฟลเดอร์ output
@@ -307,33 +356,49 @@ class MarkdownConverterGUI:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # แปลงแต่ละไฟล์
-        for i, file_info in enumerate(self.found_files):
-            try:
-                # อัปเดต progress
-                progress_text = f"กำลังแปลงไฟล์ {i+1}/{len(self.found_files)}: {file_info['name']}"
-                self.root.after(0, lambda text=progress_text: self.status_label.config(text=text))
-                
-                # อ่านไฟล์
-                with open(file_info['path'], 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # ตั้งค่า converter
-                if not self.include_images.get():
-                    self.converter.mermaid_processor = None
-                
-                # สร้างชื่อไฟล์ output
-                base_name = os.path.splitext(file_info['name'])[0]
-                output_path = os.path.join(output_dir, f"{base_name}.html")
-                
-                # แปลงเป็น HTML
-                html_content = self.converter.convert_to_html(content, base_name)
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write(html_content)
-                
-            except Exception as e:
-                print(f"Error converting {file_info['name']}: {e}")
-                continue
+        # แปลงแบบขนาน (หนึ่ง converter ต่อ worker process)
+        # ใช้ build manifest ใน output folder เพื่อข้ามไฟล์ที่ไม่มีการเปลี่ยนแปลง
+        manifest = BuildManifest(output_dir)
+        batch = BatchConverter(include_images=self.include_images.get(), manifest=manifest)
+        site_asset = os.path.join(output_dir, SITE_ASSET_NAME) if self.build_site.get() else None
+        tasks = build_tasks(paths, output_dir, source_root=self.input_folder.get() if site_asset else None,
+                            site_asset=site_asset)
+        page_indexes = []
+        rows = {path: index for index, path in enumerate(paths)}
+        
+        generation = model.reset_statuses(STATUS_QUEUED)
+        self.convert_started = time.perf_counter()
+        # process pool หยิบงานตามลำดับที่ส่ง จึงถือว่าไฟล์ที่รออยู่ลำดับแรก ๆ (เท่าจำนวน worker) กำลังแปลง
+        next_row = 0
+        running = 0
+        
+        def start_next():
+            nonlocal next_row, running
+            while running < batch.jobs and next_row < len(paths):
+                if model.status(next_row) == STATUS_QUEUED:
+                    model.set_status(next_row, STATUS_RUNNING, generation)
+                    running += 1
+                next_row += 1
+        
+        start_next()
+        for result in batch.convert(tasks):
+            index = rows[result['path']]
+            if model.status(index) == STATUS_RUNNING:
+                running -= 1
+            model.set_status(index, RESULT_STATUS[result['status']], generation)
+            if result['status'] == 'failed':
+                print(f"Error converting {os.path.basename(result['path'])}: {result['error']}")
+            if 'index' in result:
+                page_indexes.append(result['index'])
+            start_next()
+        
+        # index หัวข้อและเมนูนำทางของ site (รวมกับหน้าที่ไม่ได้แปลงใหม่)
+        if site_asset is not None:
+            write_site_asset(site_asset, page_indexes, [task['options']['site_page'] for task in tasks])
+        
+        for output in manifest.stale_outputs([task['path'] for task in tasks]):
+            print(f"Stale output (source removed): {output}")
+        manifest.save()
         
         # อัปเดต output path สำหรับการแสดงผล
         self.output_file.set(output_dir)
@@ -341,6 +406,8 @@ class MarkdownConverterGUI:
     def conversion_success(self):
         """แสดงผลการแปลงสำเร็จ"""
         self.progress.stop()
+        self.converting = False
+        self.file_view.refresh()
         
         if self.input_mode.get() == "file":
             # แปลงไฟล์เดียว
@@ -352,8 +419,12 @@ class MarkdownConverterGUI:
                     messagebox.showwarning("คำเตือน", f"ไม่สามารถเปิดไฟล์ได้: {e}")
         else:
             # แปลงหลายไฟล์
-            count = len(self.found_files)
-            self.status_label.config(text=f"แปลงไฟล์สำเร็จ! ({count} ไฟล์)")
+            count = len(self.file_list)
+            elapsed = time.perf_counter() - self.convert_started
+            failed = self.file_list.count(STATUS_FAILED)
+            summary = f"แปลงไฟล์สำเร็จ! ({count} ไฟล์, {elapsed:.1f} วินาที"
+            summary += f", ล้มเหลว {failed})" if failed else ")"
+            self.status_label.config(text=summary)
             if messagebox.askyesno("สำเร็จ", f"แปลงไฟล์ HTML สำเร็จ! ({count} ไฟล์)\nต้องการเปิดโฟลเดอร์ผลลัพธ์หรือไม่?"):
                 try:
                     os.startfile(self.output_file.get())
@@ -363,6 +434,8 @@ class MarkdownConverterGUI:
     def conversion_error(self, error_message):
         """แสดงข้อผิดพลาด"""
         self.progress.stop()
+        self.converting = False
+        self.file_view.refresh()
         self.status_label.config(text="เกิดข้อผิดพลาด")
         messagebox.showerror("ข้อผิดพลาด", f"เกิดข้อผิดพลาดในการแปลงไฟล์:\n{error_message}")
     
@@ -387,6 +460,7 @@ Markdown Converter - คู่มือการใช้งาน
 - Mermaid diagrams จะแสดงเป็น interactive HTML
 - ผลลัพธ์จะเป็นไฟล์ HTML ที่เปิดในเบราว์เซอร์ได้
 - สำหรับโฟลเดอร์: จะสร้างโฟลเดอร์ "html_output" ในโฟลเดอร์ที่เลือก
+- "สร้างเว็บไซต์": คงโครงสร้างโฟลเดอร์ย่อย, เปลี่ยนลิงก์ .md เป็น .html และเพิ่มเมนูนำทางทุกหน้า
 - หากเกิดข้อผิดพลาด ให้ตรวจสอบไฟล์ Markdown
         """
         
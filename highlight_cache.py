@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Syntax Highlighting Cache
+จำผลลัพธ์ของ Pygments สำหรับ code blocks (key = ภาษา, hash ของโค้ด, ตัวเลือกของ formatter)
+มี LRU ในหน่วยความจำ และ cache บนดิสก์ (ไม่บังคับ) ที่ใช้ร่วมกันได้ระหว่าง worker processes
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# จำนวน code blocks สูงสุดที่เก็บในหน่วยความจำต่อ process
+HIGHLIGHT_CACHE_SIZE = 4096
+
+# cache ของ process ปัจจุบัน (สร้างด้วย enable_highlight_cache)
+_active_cache = None
+# {ชื่อ extension: class} ของ codehilite และ fenced_code ที่ใช้ CachedCodeHilite (สร้างครั้งแรกที่ใช้)
+_cached_extensions = None
+_install_lock = threading.Lock()
+
+STAT_NAMES = ('hits', 'disk_hits', 'misses')
+
+
+class HighlightCache:
+    """Cache ของ HTML ที่ Pygments สร้าง แบบ LRU ในหน่วยความจำ + ไฟล์บนดิสก์
+
+    stats() คือสถิติรวมของ process และ thread_stats() คือสถิติของ thread ปัจจุบัน
+    (การแปลงหนึ่งไฟล์ทำใน thread เดียว จึงใช้ thread_stats() นับผลของไฟล์นั้นได้แม้หลาย thread แปลงพร้อมกัน)
+    """
+
+    # นามสกุลของไฟล์ cache และชื่อที่ใช้ในข้อความเตือน (subclass เปลี่ยนได้)
+    EXTENSION = '.html'
+    LABEL = 'highlight'
+
+    def __init__(self, max_entries: int = HIGHLIGHT_CACHE_SIZE, cache_dir: str = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread = threading.local()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + self.EXTENSION)
+
+    def get(self, key: str):
+        """คืน HTML ที่เคย highlight ไว้ หรือ None ถ้าไม่พบ"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._count('hits')
+                return html
+
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), 'r', encoding='utf-8') as f:
+                    html = f.read()
+            except OSError:
+                html = None
+            if html is not None:
+                self._remember(key, html)
+                with self._lock:
+                    self.disk_hits += 1
+                self._count('disk_hits')
+                return html
+
+        with self._lock:
+            self.misses += 1
+        self._count('misses')
+        return None
+
+    def _count(self, name: str):
+        counts = getattr(self._thread, 'counts', None)
+        if counts is None:
+            counts = self._thread.counts = dict.fromkeys(STAT_NAMES, 0)
+        counts[name] += 1
+
+    def put(self, key: str, html: str):
+        """เก็บผลลัพธ์ลงหน่วยความจำและดิสก์"""
+        self._remember(key, html)
+        if self.cache_dir:
+            self._write_disk(key, html)
+
+    def _remember(self, key: str, html: str):
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _write_disk(self, key: str, html: str):
+        """เขียนไฟล์ cache แบบ atomic เพื่อให้หลาย worker เขียนพร้อมกันได้"""
+        directory = os.path.dirname(self._disk_path(key))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(html)
+                os.replace(temp_path, self._disk_path(key))
+            except Exception:
+                os.unlink(temp_path)
+                raise
+        except OSError as e:
+            print(f"Warning: Cannot write {self.LABEL} cache: {e}")
+
+    def stats(self) -> dict:
+        """สถิติการใช้งาน cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+            }
+
+    def thread_stats(self) -> dict:
+        """จำนวน hits/disk_hits/misses สะสมของ thread ปัจจุบัน"""
+        return dict(getattr(self._thread, 'counts', None) or dict.fromkeys(STAT_NAMES, 0))
+
+
+def _formatter_name(formatter) -> str:
+    """ชื่อ formatter ที่คงที่ข้าม process (ใช้เป็นส่วนหนึ่งของ key)"""
+    if isinstance(formatter, str):
+        return formatter
+    return f"{formatter.__module__}.{formatter.__qualname__}"
+
+
+def _create_cached_extensions() -> dict:
+    """สร้าง subclass ของ extensions codehilite และ fenced_code ที่ highlight ผ่าน cache
+
+    processors ของ Python-Markdown สร้าง CodeHilite เอง จึงใช้ processors ของเราที่สร้าง CachedCodeHilite
+    แทน และลงทะเบียนด้วยชื่อและลำดับเดียวกับของเดิม (Markdown instances อื่นไม่ได้รับผลกระทบ)
+    """
+    import pygments
+    from markdown.extensions.attr_list import AttrListExtension, get_attrs_and_remainder
+    from markdown.extensions.codehilite import (CodeHilite, CodeHiliteExtension, HiliteTreeprocessor,
+                                                parse_hl_lines)
+    from markdown.extensions.fenced_code import FencedBlockPreprocessor, FencedCodeExtension
+
+    class CachedCodeHilite(CodeHilite):
+        """CodeHilite ที่จำผลลัพธ์ตาม (ภาษา, hash ของโค้ด, ตัวเลือกของ formatter)"""
+
+        def __init__(self, src: str, cache: HighlightCache = None, **options):
+            super().__init__(src, **options)
+            self.cache = cache
+
+        def hilite(self, shebang: bool = True) -> str:
+            if self.cache is None or not self.use_pygments:
+                return super().hilite(shebang)
+
+            key_source = repr((
+                pygments.__version__,
+                self.lang,
+                shebang,
+                self.guess_lang,
+                self.lang_prefix,
+                _formatter_name(self.pygments_formatter),
+                sorted(self.options.items()),
+                self.src,
+            ))
+            key = hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+            html = self.cache.get(key)
+            if html is None:
+                html = super().hilite(shebang)
+                self.cache.put(key, html)
+            return html
+
+    class CachedHiliteTreeprocessor(HiliteTreeprocessor):
+        """indented code blocks: เหมือน HiliteTreeprocessor แต่ใช้ CachedCodeHilite"""
+
+        cache = None
+
+        def run(self, root):
+            for block in root.iter('pre'):
+                if len(block) == 1 and block[0].tag == 'code':
+                    text = block[0].text
+                    if text is None:
+                        continue
+                    local_config = self.config.copy()
+                    code = CachedCodeHilite(self.code_unescape(text), cache=self.cache,
+                                            tab_length=self.md.tab_length,
+                                            style=local_config.pop('pygments_style', 'default'),
+                                            **local_config)
+                    placeholder = self.md.htmlStash.store(code.hilite())
+                    # เหมือนของเดิม: เปลี่ยนเป็น <p> ที่มีแต่ placeholder ซึ่งถูกแทนด้วย HTML ตอนท้าย
+                    block.clear()
+                    block.tag = 'p'
+                    block.text = placeholder
+
+    class CachedFencedBlockPreprocessor(FencedBlockPreprocessor):
+        """fenced code blocks ที่ใช้ Pygments highlight ผ่าน CachedCodeHilite
+
+        blocks ที่ไม่ใช้ Pygments (use_pygments=false หรือไม่มี codehilite) ถูกส่งต่อให้ run ของเดิม
+        """
+
+        cache = None
+
+        def run(self, lines: list) -> list:
+            if not self.checked_for_deps:
+                for ext in self.md.registeredExtensions:
+                    if isinstance(ext, CodeHiliteExtension):
+                        self.codehilite_conf = ext.getConfigs()
+                    if isinstance(ext, AttrListExtension):
+                        self.use_attr_list = True
+                self.checked_for_deps = True
+            if not (self.codehilite_conf and self.codehilite_conf['use_pygments']):
+                return super().run(lines)
+
+            text = '\n'.join(lines)
+            index = 0
+            while True:
+                match = self.FENCED_BLOCK_RE.search(text, index)
+                if match is None:
+                    break
+                lang, classes, config = None, [], {}
+                if match.group('attrs'):
+                    attrs, remainder = get_attrs_and_remainder(match.group('attrs'))
+                    if remainder:
+                        # วงเล็บปีกกาไม่ครบ ไม่ใช่ fence (ของเดิมข้ามแบบเดียวกัน)
+                        index = match.end('attrs')
+                        continue
+                    _, classes, config = self.handle_attrs(attrs)
+                    if classes:
+                        lang = classes.pop(0)
+                else:
+                    lang = match.group('lang') or None
+                    if match.group('hl_lines'):
+                        config['hl_lines'] = parse_hl_lines(match.group('hl_lines'))
+                if not config.get('use_pygments', True):
+                    index = match.end()
+                    continue
+
+                local_config = self.codehilite_conf.copy()
+                local_config.update(config)
+                if classes:
+                    local_config['css_class'] = f"{' '.join(classes)} {local_config['css_class']}"
+                code = CachedCodeHilite(match.group('code'), cache=self.cache, lang=lang,
+                                        style=local_config.pop('pygments_style', 'default'),
+                                        **local_config).hilite(shebang=False)
+                placeholder = self.md.htmlStash.store(code)
+                text = f'{text[:match.start()]}\n{placeholder}\n{text[match.end():]}'
+                index = match.start() + 1 + len(placeholder)
+            return super().run(text.split('\n'))
+
+    class CachedCodeHiliteExtension(CodeHiliteExtension):
+        def __init__(self, cache: HighlightCache = None, **kwargs):
+            self.cache = cache
+            super().__init__(**kwargs)
+
+        def extendMarkdown(self, md):
+            hiliter = CachedHiliteTreeprocessor(md)
+            hiliter.config = self.getConfigs()
+            hiliter.cache = self.cache
+            md.treeprocessors.register(hiliter, 'hilite', 30)
+            md.registerExtension(self)
+
+    class CachedFencedCodeExtension(FencedCodeExtension):
+        def __init__(self, cache: HighlightCache = None, **kwargs):
+            self.cache = cache
+            super().__init__(**kwargs)
+
+        def extendMarkdown(self, md):
+            md.registerExtension(self)
+            processor = CachedFencedBlockPreprocessor(md, self.getConfigs())
+            processor.cache = self.cache
+            md.preprocessors.register(processor, 'fenced_code_block', 25)
+
+    return {'codehilite': CachedCodeHiliteExtension, 'fenced_code': CachedFencedCodeExtension}
+
+
+def enable_highlight_cache(cache_dir: str = None, max_entries: int = HIGHLIGHT_CACHE_SIZE) -> HighlightCache:
+    """เปิดใช้ highlight cache ของ process นี้
+
+    เรียกซ้ำได้: ถ้าเปิดแล้วจะคืน cache เดิม (และเปิดใช้ cache บนดิสก์ถ้าระบุ cache_dir)
+    ยังไม่ import Markdown/Pygments จนกว่าจะเรียก cached_code_extension
+    """
+    global _active_cache
+    with _install_lock:
+        if _active_cache is None:
+            _active_cache = HighlightCache(max_entries, cache_dir)
+        elif cache_dir and not _active_cache.cache_dir:
+            _active_cache.cache_dir = cache_dir
+        return _active_cache
+
+
+def cached_code_extension(name: str, cache: HighlightCache, **config):
+    """extension codehilite หรือ fenced_code (ตาม name) ที่ highlight ผ่าน cache
+
+    เรียกตอนสร้าง Markdown instance ที่มี code extensions เท่านั้น เพื่อไม่ให้โหลด Pygments ก่อนจำเป็น
+    """
+    global _cached_extensions
+    with _install_lock:
+        if _cached_extensions is None:
+            _cached_extensions = _create_cached_extensions()
+    return _cached_extensions[name](cache=cache, **config)
+
+
+def get_highlight_cache():
+    """คืน highlight cache ของ process นี้ (None ถ้ายังไม่ได้ติดตั้ง)"""
+    return _active_cache
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Incremental Block Rendering
+แปลงเอกสารเดียวซ้ำ ๆ ระหว่างแก้ไข (เช่น live preview ของ editor) โดยแบ่งเอกสารเป็น block ระดับบนสุด
+จำ HTML ของแต่ละ block ตาม hash ของเนื้อหา และแปลงใหม่เฉพาะ block ที่เปลี่ยน
+พร้อมคืน diff ระดับ block ให้ preview แก้เฉพาะส่วนของ DOM ที่เปลี่ยนแทนการโหลดหน้าใหม่
+"""
+
+import difflib
+import hashlib
+import re
+from collections import OrderedDict
+
+from markdown.extensions.toc import unique
+
+from assets import page_head_for
+from streaming import (TOC_PLACEHOLDER, flatten_toc_tokens, iter_markdown_chunks, render_toc,
+                       scan_markdown_lines)
+
+# จำนวน block สูงสุดที่จำ HTML ไว้ (รวม block ของเวอร์ชันก่อน ๆ เพื่อให้ undo ไม่ต้องแปลงใหม่)
+BLOCK_CACHE_SIZE = 4096
+
+# จำนวนตัวอักษรของ hash ที่ใช้เป็น id ของ block ใน DOM
+BLOCK_ID_LENGTH = 12
+
+BLOCK_HTML = '<div class="md-block" data-block="{id}">\n{html}\n</div>\n'
+
+
+def split_blocks(content: str) -> list:
+    """แบ่งเอกสารเป็น block ระดับบนสุด (ตัดที่ขอบ block เดียวกับการแปลงแบบ streaming)"""
+    return list(iter_markdown_chunks(content.splitlines(keepends=True), chunk_size=0))
+
+
+HEADING_ID_PATTERN = re.compile(r'<h([1-6])([^>]*) id="([^"]*)"(.*?)</h\1>', re.S)
+
+
+def _rename_headings(html: str, renames: list) -> str:
+    """เปลี่ยน id ของหัวข้อตามลำดับใน block (และ permalink ในหัวข้อนั้น) โดยไม่แตะลิงก์อื่น
+
+    renames คือ [(id เดิม, id ใหม่)] ของทุกหัวข้อใน block ตามลำดับ
+    """
+    pending = iter(renames)
+    current = next(pending, None)
+
+    def replace(match):
+        nonlocal current
+        if current is None or match.group(3) != current[0]:
+            return match.group(0)
+        old_id, new_id = current
+        current = next(pending, None)
+        if old_id == new_id:
+            return match.group(0)
+        inner = match.group(4).replace(f'href="#{old_id}"', f'href="#{new_id}"')
+        return f'<h{match.group(1)}{match.group(2)} id="{new_id}"{inner}</h{match.group(1)}>'
+
+    return HEADING_ID_PATTERN.sub(replace, html)
+
+
+class RenderedBlock:
+    """ผลของ block หนึ่ง: HTML, หัวข้อ (toc tokens ตามลำดับ) และ Mermaid diagrams ที่ block ใช้"""
+
+    __slots__ = ('html', 'headings', 'diagrams', 'has_toc')
+
+    def __init__(self, html: str, headings: list, diagrams: dict):
+        self.html = html
+        self.headings = headings
+        self.diagrams = diagrams
+        self.has_toc = TOC_PLACEHOLDER in html
+
+
+class IncrementalRenderer:
+    """แปลงเอกสารเดียวซ้ำ ๆ โดยใช้ HTML ของ block ที่ไม่เปลี่ยนจากครั้งก่อน
+
+    ส่วนที่ขึ้นกับทั้งเอกสารถูกคำนวณใหม่ทุกครั้งจากข้อมูลที่จำไว้ของแต่ละ block:
+    - reference link definitions ถูกต่อท้ายเฉพาะ block ที่มี '[' (และเป็นส่วนหนึ่งของ key ของ block นั้น)
+    - id ของหัวข้อที่ซ้ำกันข้าม block ถูกเปลี่ยนตามลำดับในเอกสารแบบเดียวกับ toc extension
+    - [TOC] ถูกสร้างจากหัวข้อของทุก block
+    - Mermaid diagrams ของทุก block รวมเป็นชุดเดียวท้ายหน้า
+    options คือ keyword arguments ของ convert_to_html (stylesheet_href, mermaid_js_href, mermaid_js_inline)
+    ใช้จาก thread เดียว (หนึ่ง renderer ต่อหนึ่งเอกสารที่กำลังแก้ไข)
+    """
+
+    def __init__(self, converter, title: str = "Document", max_blocks: int = BLOCK_CACHE_SIZE, **options):
+        self.converter = converter
+        self.title = title
+        self.options = options
+        self.max_blocks = max_blocks
+        self._cache = OrderedDict()  # key -> RenderedBlock
+        self.blocks = []  # [{'id', 'html'}] ของการ render ครั้งล่าสุด
+        self.footer = ''
+        self.rendered = 0
+        self.reused = 0
+
+    def _render_block(self, text: str, references: str) -> RenderedBlock:
+        converter = self.converter
+        diagrams = converter.new_diagram_page(None, self.options.get('mermaid_js_href'),
+                                              self.options.get('mermaid_js_inline'))
+        processed = converter.process_markdown(text, diagrams=diagrams)
+        if references:
+            processed += '\n\n' + references
+        with converter.pool_for(processed).acquire() as md:
+            html = md.convert(processed)
+            headings = []
+            flatten_toc_tokens(md.toc_tokens, headings)
+        html = converter.insert_diagram_svgs(diagrams, html)
+        return RenderedBlock(html, headings, dict(diagrams.diagrams) if diagrams is not None else {})
+
+    def _block(self, text: str, references: str) -> RenderedBlock:
+        """ผลของ block จาก cache หรือแปลงใหม่ถ้ายังไม่เคยเห็นเนื้อหานี้"""
+        references = references if '[' in text else ''
+        key = hashlib.sha256(f"{text}\0{references}".encode('utf-8')).hexdigest()
+        block = self._cache.get(key)
+        if block is not None:
+            self._cache.move_to_end(key)
+            self.reused += 1
+            return block
+        block = self._render_block(text, references)
+        self._cache[key] = block
+        while len(self._cache) > self.max_blocks:
+            self._cache.popitem(last=False)
+        self.rendered += 1
+        return block
+
+    def render(self, content: str) -> dict:
+        """แปลงเอกสารเวอร์ชันใหม่ คืน dict ที่มี
+
+        'blocks': [{'id', 'html'}] ของทุก block ตามลำดับ (html ห่อด้วย div[data-block])
+        'diff': การแก้ไขจากผลครั้งก่อน [{'op': 'replace'/'insert'/'delete', 'start', 'end', 'blocks'}]
+                โดย start/end เป็นตำแหน่งใน blocks ครั้งก่อน เรียงจากท้ายไปต้นจึงใช้ตามลำดับได้ทันที
+        'footer': HTML ท้ายหน้าของ Mermaid diagrams และ 'footer_changed'
+        'rendered'/'reused': จำนวน block ที่แปลงใหม่/ใช้จาก cache ในครั้งนี้
+        """
+        self.rendered = 0
+        self.reused = 0
+        references, has_toc = scan_markdown_lines(content.splitlines(keepends=True))
+        results = [self._block(text, references) for text in split_blocks(content)]
+
+        # id ของหัวข้อต้องไม่ซ้ำกันทั้งเอกสาร (แต่ละ block ถูกแปลงแยกกัน)
+        used = set()
+        headings = []
+        htmls = []
+        for block in results:
+            renames = []
+            for heading in block.headings:
+                final_id = unique(heading['id'], used)
+                renames.append((heading['id'], final_id))
+                headings.append(dict(heading, id=final_id) if final_id != heading['id'] else heading)
+            if any(old_id != new_id for old_id, new_id in renames):
+                htmls.append(_rename_headings(block.html, renames))
+            else:
+                htmls.append(block.html)
+
+        if has_toc:
+            toc_html = render_toc(headings)
+            htmls = [html.replace(TOC_PLACEHOLDER, toc_html) if block.has_toc else html
+                     for block, html in zip(results, htmls)]
+
+        blocks = []
+        for html in htmls:
+            block_id = 'b' + hashlib.sha256(html.encode('utf-8')).hexdigest()[:BLOCK_ID_LENGTH]
+            blocks.append({'id': block_id, 'html': BLOCK_HTML.format(id=block_id, html=html)})
+
+        diagrams = self.converter.new_diagram_page(None, self.options.get('mermaid_js_href'),
+                                                   self.options.get('mermaid_js_inline'))
+        if diagrams is not None:
+            for block in results:
+                diagrams.diagrams.update(block.diagrams)
+        footer = self.converter.finish_diagram_page(diagrams)
+
+        diff = self.diff(self.blocks, blocks)
+        footer_changed = footer != self.footer
+        self.blocks = blocks
+        self.footer = footer
+        return {
+            'blocks': blocks,
+            'diff': diff,
+            'footer': footer,
+            'footer_changed': footer_changed,
+            'rendered': self.rendered,
+            'reused': self.reused,
+        }
+
+    @staticmethod
+    def diff(old_blocks: list, new_blocks: list) -> list:
+        """การแก้ไขที่เปลี่ยน old_blocks เป็น new_blocks เทียบด้วย id ของ block (เรียงจากท้ายไปต้น)"""
+        matcher = difflib.SequenceMatcher(None, [block['id'] for block in old_blocks],
+                                          [block['id'] for block in new_blocks], autojunk=False)
+        operations = []
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != 'equal':
+                operations.append({'op': tag, 'start': i1, 'end': i2, 'blocks': new_blocks[j1:j2]})
+        operations.reverse()
+        return operations
+
+    def body_html(self) -> str:
+        """body ของการ render ครั้งล่าสุด"""
+        return ''.join(block['html'] for block in self.blocks) + self.footer
+
+    def page_html(self) -> str:
+        """หน้า HTML เต็มของการ render ครั้งล่าสุด (สำหรับโหลด preview ครั้งแรก)"""
+        body = self.body_html()
+        stylesheet_href = self.options.get('stylesheet_href')
+        return self.converter.template.render(self.title, page_head_for(stylesheet_href, body), body)
@@ -6,51 +6,238 @@ Markdown to HTML Converter with Mermaid Diagram Support
 
 import argparse
 import os
+import re
 import sys
+import threading
+import time
+from contextlib import contextmanager
 from pathlib import Path
-import re
 
-from markdown import Markdown
-from markdown.extensions import codehilite, tables, toc
 # Import HTML Mermaid Processor (no API, no external dependencies)
 try:
     from mermaid_processor_html import MermaidProcessorPy as HtmlMermaidProcessor
 except ImportError:
     HtmlMermaidProcessor = None
 
+from archive_io import ArchiveWriter, DirectoryWriter, is_archive, iter_archive_members, iter_file_members
+from batch_converter import (BatchConverter, build_archive_tasks, build_tasks, convert_task,
+                             find_markdown_files)
+from build_cache import BuildManifest
+from assets import (DIAGRAMS_ASSET_NAME, MERMAID_ASSET_PREFIX, asset_compressors, asset_href,
+                    build_stylesheet, diagram_asset_content, hashed_asset_name, mermaid_script,
+                    page_head_for, precompress_asset, vendor_mermaid_script, write_diagram_asset,
+                    write_stylesheet)
+from page_template import load_template
+from scanner import default_index_path, user_cache_dir
+from search_index import SEARCH_DIR, SEARCH_SCRIPT_NAME, SearchIndexBuilder, search_box, search_script
+from site_index import (SITE_ASSET_NAME, SiteIndex, rewrite_links, site_nav, site_root, site_script,
+                        update_site_asset)
+from streaming import flatten_toc_tokens
+from fenced_blocks import replace_fenced_blocks
+from highlight_cache import cached_code_extension, enable_highlight_cache
+from profiling import DocumentProfile, ProfileReport, cprofile_to, profile_stage
+
+# Markdown extensions ที่ใช้แปลงไฟล์
+MARKDOWN_EXTENSIONS = [
+    'codehilite',
+    'tables',
+    'toc',
+    'fenced_code',
+    'attr_list'
+]
+
+# extensions สำหรับ code blocks (โหลด Pygments) ใช้เฉพาะเอกสารที่อาจมี code block
+CODE_EXTENSIONS = ('codehilite', 'fenced_code')
+
+# fence (``` หรือ ~~~) หรือบรรทัดที่ย่อหน้า 4 ช่อง/tab ซึ่งอาจเป็น indented code block
+CODE_BLOCK_PATTERN = re.compile(r'```|~~~|^(?: {4}|\t)', re.M)
+
+MARKDOWN_EXTENSION_CONFIGS = {
+    'codehilite': {
+        'css_class': 'highlight',
+        'use_pygments': True
+    },
+    'toc': {
+        'permalink': True,
+        'permalink_title': 'Permalink'
+    }
+}
+
+# เอกสารสั้น ๆ ที่มีทั้ง code block และ mermaid สำหรับอุ่นเครื่องทุกส่วนของ converter
+WARMUP_DOCUMENT = """# Warmup
+
+| a | b |
+|---|---|
+| 1 | 2 |
+
+```python
+print("warm")
+```
+
+```mermaid
+graph TD
+    A --> B
+```
+"""
+
+# เพิ่มเลขเวอร์ชันเมื่อแก้ไข HTML template เพื่อให้ build cache สร้างไฟล์ใหม่
+TEMPLATE_VERSION = 9
+
 
+def conversion_settings(title: str, include_images: bool = True,
+                        template_path: str = None, mermaid_renderer: str = None, **options) -> dict:
+    """การตั้งค่าทั้งหมดที่มีผลต่อไฟล์ HTML (ใช้เป็น key ของ build cache)
+
+    options คือ keyword arguments เพิ่มเติมที่ส่งให้ convert_to_html
+    """
+    settings = {
+        'extensions': MARKDOWN_EXTENSIONS,
+        'extension_configs': MARKDOWN_EXTENSION_CONFIGS,
+        'title': title,
+        'include_images': include_images,
+        'template_version': TEMPLATE_VERSION,
+        'template': load_template(template_path).version,
+        'options': options,
+    }
+    if mermaid_renderer:
+        settings['mermaid_renderer'] = mermaid_renderer
+    return settings
+
+
+def has_code_blocks(content: str) -> bool:
+    """ตรวจสอบแบบเร็วว่าเอกสารอาจมี code block หรือไม่ (ผลบวกลวงได้ แต่ไม่มีผลลบลวง)"""
+    return CODE_BLOCK_PATTERN.search(content) is not None
+
+
+def create_markdown(extension_configs: dict = None, code_blocks: bool = True, highlight_cache=None):
+    """สร้าง Markdown instance พร้อม extensions ของโปรแกรม
+
+    extension_configs ใช้แทนค่าเริ่มต้นของแต่ละ extension เฉพาะ key ที่ระบุ
+    code_blocks=False จะไม่โหลด codehilite/fenced_code (และ Pygments) สำหรับเอกสารที่ไม่มี code block
+    highlight_cache (HighlightCache) ทำให้ codehilite/fenced_code จำผลลัพธ์ของ Pygments (None = ไม่ใช้ cache)
+    """
+    # import ตอนใช้งานจริง เพื่อให้ --help และการเช็ค build cache เริ่มทำงานได้เร็ว
+    import importlib
+    from markdown import Markdown
+    from search_text import SearchTextExtension
+
+    extensions = MARKDOWN_EXTENSIONS
+    if not code_blocks:
+        extensions = [name for name in MARKDOWN_EXTENSIONS if name not in CODE_EXTENSIONS]
+    configs = {name: dict(config) for name, config in MARKDOWN_EXTENSION_CONFIGS.items()
+               if name in extensions}
+    for name, config in (extension_configs or {}).items():
+        configs.setdefault(name, {}).update(config)
+    # สร้าง extensions จาก module โดยตรง แทนการให้ Markdown ค้นหา entry points
+    # ของทุก package ที่ติดตั้ง (importlib.metadata ใช้เวลานานตอนเริ่มโปรแกรม)
+    # SearchTextExtension เก็บข้อความสำหรับ search index เฉพาะเมื่อตั้ง md.search_sections
+    def make_extension(name):
+        if highlight_cache is not None and name in CODE_EXTENSIONS:
+            return cached_code_extension(name, highlight_cache, **configs.get(name, {}))
+        return importlib.import_module(f'markdown.extensions.{name}').makeExtension(**configs.get(name, {}))
+    
+    return Markdown(extensions=[make_extension(name) for name in extensions] + [SearchTextExtension()])
+
+
+class ConverterPool:
+    """คลัง Markdown instances ที่ reset แล้ว สำหรับแปลงเอกสารพร้อมกันจากหลาย thread
+
+    แต่ละ instance ถูกใช้งานโดย thread เดียวในเวลาหนึ่ง และถูก reset ก่อนคืนเข้าคลัง
+    จึงไม่มี state (เช่น TOC) รั่วข้ามเอกสาร และไม่ต้องสร้าง extensions ใหม่ทุกครั้ง
+    """
+    
+    def __init__(self, max_size: int = None, code_blocks: bool = True, highlight_cache=None):
+        self.code_blocks = code_blocks
+        self.highlight_cache = highlight_cache
+        self._idle = []
+        self._lock = threading.Lock()
+        # จำกัดจำนวน instance ที่ใช้งานพร้อมกัน (None = ไม่จำกัด)
+        self._slots = threading.BoundedSemaphore(max_size) if max_size else None
+    
+    def _create(self):
+        """สร้าง Markdown instance ใหม่พร้อม extensions ของคลังนี้"""
+        return create_markdown(code_blocks=self.code_blocks, highlight_cache=self.highlight_cache)
+    
+    def warm(self, count: int = 1):
+        """สร้าง instances ล่วงหน้าให้พร้อมใช้งาน"""
+        with self._lock:
+            missing = count - len(self._idle)
+        for _ in range(missing):
+            md = self._create()
+            with self._lock:
+                self._idle.append(md)
+    
+    @contextmanager
+    def acquire(self):
+        """ยืม Markdown instance ที่ reset แล้ว และคืนเข้าคลังเมื่อใช้งานเสร็จ"""
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            with self._lock:
+                md = self._idle.pop() if self._idle else None
+            if md is None:
+                md = self._create()
+            try:
+                yield md
+            finally:
+                md.reset()
+                with self._lock:
+                    self._idle.append(md)
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+    
+    def convert(self, content: str) -> str:
+        """แปลง Markdown เป็น HTML ด้วย instance จากคลัง"""
+        with self.acquire() as md:
+            return md.convert(content)
 
 
 class MarkdownConverter:
     """แปลงไฟล์ Markdown เป็น HTML"""
     
-    def __init__(self):
+    def __init__(self, template_path: str = None, highlight_cache_dir: str = None,
+                 mermaid_renderer: str = None, mermaid_cache_dir: str = None):
+        # โครงหน้า HTML ที่ compile ไว้แล้ว (template เริ่มต้นหรือไฟล์ของผู้ใช้)
+        self.template = load_template(template_path)
+        
+        # cache ผลลัพธ์ของ Pygments (LRU ในหน่วยความจำ + ดิสก์ถ้าระบุ highlight_cache_dir)
+        self.highlight_cache = enable_highlight_cache(highlight_cache_dir)
+        
         # ใช้ HTML Mermaid Processor (ไม่ใช้ API, ไม่ใช้ external dependencies)
+        # ถ้าระบุ mermaid_renderer จะ render diagrams เป็น SVG ตอน build และเก็บใน mermaid_cache_dir
         if HtmlMermaidProcessor is not None:
-            self.mermaid_processor = HtmlMermaidProcessor()
+            self.mermaid_processor = HtmlMermaidProcessor(mermaid_renderer, mermaid_cache_dir)
             print("Using HTML Mermaid Processor (no API, no external dependencies)")
         else:
             self.mermaid_processor = None
             print("HTML Mermaid Processor not available - Mermaid diagrams will be skipped")
-        self.md = Markdown(
-            extensions=[
-                'codehilite',
-                'tables',
-                'toc',
-                'fenced_code',
-                'attr_list'
-            ],
-            extension_configs={
-                'codehilite': {
-                    'css_class': 'highlight',
-                    'use_pygments': True
-                },
-                'toc': {
-                    'permalink': True,
-                    'permalink_title': 'Permalink'
-                }
-            }
-        )
+        # handlers เพิ่มเติมของ fenced blocks: {ภาษา: callable(FencedBlock) -> str}
+        self.block_handlers = {}
+        # diagrams ของหน้าที่ใช้ asset ร่วมของ site ที่ยังไม่ถูกส่งออกด้วย take_site_diagrams
+        self.site_diagrams = {}
+        self._site_lock = threading.Lock()
+        
+        # Markdown instances สำหรับใช้งานพร้อมกันหลาย thread (สร้างเมื่อแปลงครั้งแรก)
+        # เอกสารที่ไม่มี code block ใช้คลังที่ไม่มี codehilite/fenced_code จึงไม่ต้องโหลด Pygments
+        self.pool = ConverterPool(highlight_cache=self.highlight_cache)
+        self.text_pool = ConverterPool(code_blocks=False)
+    
+    def warm(self):
+        """แปลงเอกสารตัวอย่าง เพื่อโหลด extensions, Pygments และ template ไว้ก่อนงานจริง"""
+        self.convert_to_bytes(WARMUP_DOCUMENT, "Warmup")
+        self.convert_to_bytes("plain", "Warmup")
+    
+    def svg_cache_stats(self, thread: bool = False) -> dict:
+        """สถิติของ SVG cache (None ถ้าไม่ได้ render diagrams ตอน build, thread=True = เฉพาะ thread ปัจจุบัน)"""
+        if self.mermaid_processor is None or self.mermaid_processor.prerenderer is None:
+            return None
+        cache = self.mermaid_processor.prerenderer.cache
+        return cache.thread_stats() if thread else cache.stats()
+    
+    def pool_for(self, content: str) -> ConverterPool:
+        """เลือกคลัง Markdown instances ตามว่าเอกสารมี code block หรือไม่"""
+        return self.pool if has_code_blocks(content) else self.text_pool
     
     def read_markdown_file(self, file_path: str) -> str:
         """อ่านไฟล์ Markdown"""
@@ -60,34 +247,76 @@ class MarkdownConverter:
         except Exception as e:
             raise Exception(f"Error reading file {file_path}: {e}")
     
-    def process_markdown(self, content: str, include_images: bool = True) -> str:
-        """ประมวลผล Markdown และจัดการ Mermaid diagrams"""
+    def process_markdown(self, content: str, include_images: bool = True, diagrams=None) -> str:
+        """ประมวลผล Markdown และจัดการ Mermaid diagrams
+
+        fenced blocks ทั้งหมดถูกสแกนรอบเดียว แล้วส่งให้ handler ตามภาษา
+        (mermaid และ handlers เพิ่มเติมใน self.block_handlers)
+        diagrams (MermaidPage จาก new_diagram_page) เก็บ source ของแต่ละ diagram ครั้งเดียวต่อหน้า
+        """
+        handlers = dict(self.block_handlers)
         if include_images and self.mermaid_processor:
+            if diagrams is not None:
+                handlers['mermaid'] = diagrams.render_block
+            else:
+                handlers['mermaid'] = self.mermaid_processor.render_block
             try:
-                content = self.mermaid_processor.replace_mermaid_with_images(content)
+                return replace_fenced_blocks(content, handlers)
             except Exception as e:
                 # หาก Mermaid API ไม่ทำงาน ให้ใช้วิธีแสดงแบบอื่น
                 print(f"Warning: Mermaid API error: {e}")
                 print("Using alternative Mermaid display method...")
-                content = self.replace_mermaid_with_alternatives(content)
+                handlers['mermaid'] = self.render_mermaid_alternative
         elif not include_images:
             # หากไม่ต้องการรูปภาพ ให้ใช้วิธีแสดงแบบอื่น
-            content = self.replace_mermaid_with_alternatives(content)
+            handlers['mermaid'] = self.render_mermaid_alternative
         
-        return content
+        return replace_fenced_blocks(content, handlers)
+    
+    def new_diagram_page(self, diagrams_href: str = None, mermaid_js_href: str = None,
+                         mermaid_js_inline: str = None):
+        """ชุด Mermaid diagrams ของหน้าใหม่ (None ถ้าไม่ได้ประมวลผล Mermaid)
+
+        Mermaid.js โหลดจาก mermaid_js_href, ฝังจากไฟล์ mermaid_js_inline หรือจาก CDN
+        (ไม่โหลดเลยเมื่อ render diagrams เป็น SVG ตอน build)
+        """
+        if self.mermaid_processor is None:
+            return None
+        script_html = ''
+        if self.mermaid_processor.prerenderer is None:
+            script_html = mermaid_script(mermaid_js_href, mermaid_js_inline)
+        return self.mermaid_processor.new_page(diagrams_href, script_html)
+    
+    def finish_diagram_page(self, diagrams) -> str:
+        """HTML ท้าย body สำหรับ diagrams ของหน้า และเก็บ diagrams ที่ต้องเขียนลง asset ของ site"""
+        if diagrams is None or not diagrams.diagrams:
+            return ''
+        if diagrams.diagrams_href:
+            with self._site_lock:
+                self.site_diagrams.update(diagrams.diagrams)
+        return diagrams.footer_html()
+    
+    def insert_diagram_svgs(self, diagrams, html_content: str) -> str:
+        """ใส่ SVG ของ diagrams ที่ render ตอน build ลงใน HTML ที่แปลงจาก Markdown แล้ว"""
+        if diagrams is None:
+            return html_content
+        return diagrams.insert_svgs(html_content)
+    
+    def take_site_diagrams(self) -> dict:
+        """diagrams ของ site ที่สะสมไว้ตั้งแต่ครั้งก่อน (และล้างรายการ)"""
+        with self._site_lock:
+            diagrams, self.site_diagrams = self.site_diagrams, {}
+        return diagrams
     
     def replace_mermaid_with_alternatives(self, content: str) -> str:
         """แทนที่ Mermaid diagrams ด้วยวิธีแสดงแบบอื่น"""
-        import re
-        
-        # หา Mermaid blocks
-        mermaid_pattern = r'```mermaid\n(.*?)\n```'
+        return replace_fenced_blocks(content, {'mermaid': self.render_mermaid_alternative})
+    
+    def render_mermaid_alternative(self, block) -> str:
+        """สร้าง HTML สำหรับแสดง Mermaid diagram เป็นโค้ดพร้อมวิธีแสดงแผนภาพ"""
+        diagram_content = block.content
         
-        def replace_mermaid(match):
-            diagram_content = match.group(1)
-            
-            # สร้าง HTML สำหรับแสดง Mermaid diagram
-            html_content = f"""
+        return f"""
 <div class="mermaid-diagram">
     <h4>📊 Mermaid Diagram</h4>
     <div class="mermaid-code">
@@ -108,210 +337,627 @@ class MarkdownConverter:
     </div>
 </div>
 """
-            return html_content
-        
-        # แทนที่ Mermaid blocks
-        content = re.sub(mermaid_pattern, replace_mermaid, content, flags=re.DOTALL)
-        
-        return content
     
-    def convert_to_html(self, content: str, title: str = "Document") -> str:
-        """แปลง Markdown เป็น HTML"""
-        processed_content = self.process_markdown(content)
-        html_content = self.md.convert(processed_content)
-        
-        # สร้าง HTML template
-        html_template = f"""
-<!DOCTYPE html>
-<html lang="th">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{title}</title>
-    <style>
-        body {{
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            max-width: 1200px;
-            margin: 0 auto;
-            padding: 20px;
-            color: #333;
-        }}
-        h1, h2, h3, h4, h5, h6 {{
-            color: #2c3e50;
-            margin-top: 2em;
-            margin-bottom: 1em;
-        }}
-        h1 {{
-            border-bottom: 3px solid #3498db;
-            padding-bottom: 10px;
-        }}
-        h2 {{
-            border-bottom: 2px solid #ecf0f1;
-            padding-bottom: 5px;
-        }}
-        code {{
-            background-color: #f8f9fa;
-            padding: 2px 4px;
-            border-radius: 3px;
-            font-family: 'Courier New', monospace;
-        }}
-        pre {{
-            background-color: #f8f9fa;
-            padding: 15px;
-            border-radius: 5px;
-            overflow-x: auto;
-            border-left: 4px solid #3498db;
-        }}
-        table {{
-            border-collapse: collapse;
-            width: 100%;
-            margin: 20px 0;
-        }}
-        th, td {{
-            border: 1px solid #ddd;
-            padding: 12px;
-            text-align: left;
-        }}
-        th {{
-            background-color: #f2f2f2;
-            font-weight: bold;
-        }}
-        img {{
-            max-width: 100%;
-            height: auto;
-            display: block;
-            margin: 20px auto;
-            box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        }}
-        blockquote {{
-            border-left: 4px solid #3498db;
-            margin: 20px 0;
-            padding: 10px 20px;
-            background-color: #f8f9fa;
-        }}
-        .toc {{
-            background-color: #f8f9fa;
-            padding: 20px;
-            border-radius: 5px;
-            margin: 20px 0;
-        }}
-        
-        /* Mermaid Diagram Styles */
-        .mermaid-diagram {{
-            border: 2px solid #e1e5e9;
-            border-radius: 8px;
-            padding: 20px;
-            margin: 20px 0;
-            background-color: #f8f9fa;
-        }}
-        
-        .mermaid-diagram h4 {{
-            margin-top: 0;
-            color: #0366d6;
-            border-bottom: 1px solid #e1e5e9;
-            padding-bottom: 10px;
-        }}
-        
-        .mermaid-container {{
-            background-color: white;
-            border: 1px solid #e1e5e9;
-            border-radius: 6px;
-            padding: 15px;
-            margin: 15px 0;
-            overflow-x: auto;
-        }}
-        
-        .mermaid {{
-            text-align: center;
-        }}
-        
-        .mermaid-code {{
-            background-color: #f6f8fa;
-            border: 1px solid #e1e5e9;
-            border-radius: 6px;
-            padding: 15px;
-            margin: 15px 0;
-        }}
-        
-        .mermaid-code pre {{
-            margin: 0;
-            overflow-x: auto;
-        }}
-        
-        .mermaid-alternatives {{
-            margin-top: 15px;
-        }}
-        
-        .mermaid-alternatives ol {{
-            margin: 10px 0;
-        }}
+    def convert_to_html(self, content: str, title: str = "Document",
+                        stylesheet_href: str = None, diagrams_href: str = None,
+                        mermaid_js_href: str = None, mermaid_js_inline: str = None,
+                        site_href: str = None, site_page: str = None, search_href: str = None,
+                        page_index: dict = None) -> str:
+        """แปลง Markdown เป็น HTML
+
+        ถ้าระบุ stylesheet_href จะลิงก์ไปยังสไตล์ชีตภายนอกแทนการฝัง CSS ในทุกหน้า
+        ถ้าระบุ diagrams_href จะอ้างอิง Mermaid diagrams จาก asset ของ site แทนการฝังในหน้า
+        mermaid_js_href/mermaid_js_inline ใช้ Mermaid.js ที่คัดลอกไว้ในเครื่องแทน CDN (asset หรือฝังในหน้า)
+        site_href/site_page ทำให้เป็นหน้าของ site และ search_href เพิ่มกล่องค้นหา (ดู finish_body)
+        page_index เก็บหัวข้อ ลิงก์ และข้อความสำหรับ search index ของหน้า
+        """
+        head, html_content = self.render_page(content, stylesheet_href, diagrams_href, mermaid_js_href,
+                                              mermaid_js_inline, site_href, site_page, search_href,
+                                              page_index)
+        return self.template.render(title, head, html_content)
+    
+    def convert_to_bytes(self, content: str, title: str = "Document",
+                         stylesheet_href: str = None, diagrams_href: str = None,
+                         mermaid_js_href: str = None, mermaid_js_inline: str = None,
+                         site_href: str = None, site_page: str = None, search_href: str = None,
+                         page_index: dict = None, profile: DocumentProfile = None) -> bytes:
+        """แปลง Markdown เป็นหน้า HTML แบบ UTF-8 bytes (สำหรับเขียนลงไฟล์โดยตรง)
+
+        ถ้าระบุ profile จะบันทึกเวลาและขนาดข้อมูลของขั้นตอน mermaid, markdown และ template
+        """
+        head, html_content = self.render_page(content, stylesheet_href, diagrams_href, mermaid_js_href,
+                                              mermaid_js_inline, site_href, site_page, search_href,
+                                              page_index, profile)
+        with profile_stage(profile, 'template'):
+            html_bytes = self.template.render_bytes(title, head, html_content)
+        if profile is not None:
+            profile.add_bytes('template', html_content, html_bytes)
+        return html_bytes
+    
+    def render_page(self, content: str, stylesheet_href: str = None, diagrams_href: str = None,
+                    mermaid_js_href: str = None, mermaid_js_inline: str = None,
+                    site_href: str = None, site_page: str = None, search_href: str = None,
+                    page_index: dict = None, profile: DocumentProfile = None) -> tuple:
+        """(head, body) ของหน้าก่อนใส่ลง template (ขั้นตอนร่วมของ convert_to_html และ convert_to_bytes)
+
+        Mermaid diagrams -> Markdown -> SVG/เมนูนำทาง/กล่องค้นหา (finish_body) -> ส่วน head ตามสไตล์ชีต
+        ถ้าระบุ profile จะบันทึกเวลาและขนาดข้อมูลของขั้นตอน mermaid และ markdown
+        """
+        diagrams = self.new_diagram_page(diagrams_href, mermaid_js_href, mermaid_js_inline)
+        with profile_stage(profile, 'mermaid'):
+            processed_content = self.process_markdown(content, diagrams=diagrams)
+        with profile_stage(profile, 'markdown'):
+            html_content = self.markdown_to_html(processed_content, page_index)
+        if profile is not None:
+            profile.add_bytes('mermaid', content, processed_content)
+            profile.add_bytes('markdown', processed_content, html_content)
+        html_content = self.finish_body(diagrams, html_content, site_href, site_page, search_href, page_index)
+        return page_head_for(stylesheet_href, html_content), html_content
+    
+    def markdown_to_html(self, processed_content: str, page_index: dict = None) -> str:
+        """แปลง Markdown ที่ประมวลผลแล้วเป็น HTML
+
+        ถ้าระบุ page_index จะเก็บหัวข้อจาก toc และข้อความของแต่ละหัวข้อจาก tree (ถ้ามี 'sections') ลงไป
+        """
+        with self.pool_for(processed_content).acquire() as md:
+            md.search_sections = page_index.get('sections') if page_index is not None else None
+            try:
+                html_content = md.convert(processed_content)
+            finally:
+                md.search_sections = None
+            if page_index is not None:
+                flatten_toc_tokens(md.toc_tokens, page_index['headings'])
+        return html_content
+    
+    def finish_body(self, diagrams, html_content: str, site_href: str = None,
+                    site_page: str = None, search_href: str = None, page_index: dict = None) -> str:
+        """body สุดท้ายของหน้า: SVG และส่วนท้ายของ diagrams เมนูนำทางของ site และกล่องค้นหา
+
+        หน้าของ site (site_href คือ URL ของ asset ของ site, site_page คือ path ของหน้าใน site)
+        ได้ลิงก์ .md ที่ถูกเขียนเป็น .html (เก็บลง page_index['links']) และเมนูนำทางต้นหน้า
+        search_href คือ URL ของสคริปต์ค้นหาของ search index
+        """
+        html_content = self.insert_diagram_svgs(diagrams, html_content)
+        if site_href:
+            html_content = rewrite_links(html_content, page_index['links'] if page_index else None)
+            html_content = site_nav(site_href, site_page or '') + html_content
+        if search_href:
+            html_content = search_box(search_href) + html_content
+        return (html_content + self.finish_diagram_page(diagrams) + site_script(site_href)
+                + search_script(search_href))
+    
+    def cleanup(self):
+        """ลบไฟล์ชั่วคราว"""
+        if self.mermaid_processor:
+            self.mermaid_processor.cleanup()
+
+
+def is_batch_input(input_path: str) -> bool:
+    """ตรวจสอบว่าอินพุตเป็นโฟลเดอร์หรือ glob pattern หรือไม่"""
+    if os.path.isdir(input_path):
+        return True
+    return not os.path.exists(input_path) and any(ch in input_path for ch in '*?[')
+
+
+def print_highlight_stats(stats: dict):
+    """แสดงสถิติของ highlight cache"""
+    print(f"Highlight cache: {stats['hits'] + stats['disk_hits']} hits "
+          f"({stats['disk_hits']} from disk), {stats['misses']} misses")
+
+
+def find_input_files(args) -> list:
+    """หาไฟล์ Markdown ของโฟลเดอร์หรือ glob pattern ตาม --include/--exclude
+
+    การสแกนโฟลเดอร์ใช้ scan index ใน cache ของผู้ใช้ (ยกเว้นเมื่อระบุ --no-cache)
+    """
+    index_path = None
+    if os.path.isdir(args.input_file) and not args.no_cache:
+        index_path = default_index_path(args.input_file)
+    return find_markdown_files(args.input_file, args.include, args.exclude, index_path)
+
+
+def batch_output_dir(args) -> str:
+    """โฟลเดอร์ output ของการแปลงหลายไฟล์"""
+    output_dir = args.output_dir or args.output
+    if not output_dir:
+        base_dir = args.input_file if os.path.isdir(args.input_file) else '.'
+        output_dir = os.path.join(base_dir, "html_output")
+    return output_dir
+
+
+def site_diagrams_asset(args, output_dir: str) -> str:
+    """path ของ asset ที่เก็บ Mermaid diagrams ของทั้ง site (None เมื่อเก็บ diagrams ในแต่ละหน้า)"""
+    if args.mermaid_defs == 'site' and not args.no_images:
+        return os.path.join(output_dir, DIAGRAMS_ASSET_NAME)
+    return None
+
+
+def site_build_options(args, files: list, output_dir: str) -> dict:
+    """keyword arguments ของ build_tasks สำหรับ --site ({} เมื่อแปลงแบบไม่สร้าง site)"""
+    if not args.site:
+        return {}
+    return {
+        'source_root': site_root(files, args.input_file),
+        'site_asset': os.path.join(output_dir, SITE_ASSET_NAME),
+    }
+
+
+def search_script_path(args, output_dir: str) -> str:
+    """path ของสคริปต์ค้นหาของ search index เมื่อใช้ --search (None เมื่อไม่สร้าง index)"""
+    if not args.search:
+        return None
+    return os.path.join(output_dir, SEARCH_DIR, SEARCH_SCRIPT_NAME)
+
+
+def write_search_index(builder, page_indexes: list, pages: list = None) -> list:
+    """รวมคำของหน้าที่แปลงใหม่เข้ากับ search index และเขียน shards ที่เปลี่ยน คืนรายการไฟล์ของ index"""
+    for page_index in page_indexes:
+        builder.add(page_index)
+    if pages is not None:
+        builder.retain(pages)
+    return builder.write()
+
+
+def write_site_asset(site_asset: str, page_indexes: list, pages: list = None, replace: bool = False):
+    """อัปเดต index/เมนูนำทางของ site และแสดงลิงก์ .md ที่ชี้ไปยังหน้าหรือหัวข้อที่ไม่มีอยู่"""
+    written, broken = update_site_asset(site_asset, page_indexes, pages, replace)
+    print_broken_links(broken)
+    return written
+
+
+def print_broken_links(broken: list):
+    """แสดงลิงก์ .md ที่ชี้ไปยังหน้าหรือหัวข้อที่ไม่มีใน site"""
+    for page, link in broken:
+        print(f"Warning: Broken link in {page}: {link}")
+
+
+def mermaid_js_asset(args, output_dir: str) -> str:
+    """Mermaid.js จาก --mermaid-js ที่คัดลอกเป็น asset ใน output_dir (None = ใช้ CDN หรือไม่ต้องใช้)"""
+    if args.mermaid_js and not args.no_images and not args.mermaid_render:
+        return vendor_mermaid_script(args.mermaid_js, output_dir)
+    return None
+
+
+def single_file_options(args, output: str):
+    """options ของการแปลงไฟล์เดียวและรายการ asset ที่เขียนไว้ข้างไฟล์ output
+
+    Mermaid.js จาก --mermaid-js ถูกฝังในหน้า (จากสำเนาใน cache ของผู้ใช้ที่ตั้งชื่อตาม hash)
+    """
+    options = {}
+    assets = []
+    if args.css == 'external':
+        stylesheet = write_stylesheet(os.path.dirname(os.path.abspath(output)))
+        options['stylesheet_href'] = asset_href(stylesheet, output)
+        assets.append(stylesheet)
+    mermaid_js = mermaid_js_asset(args, os.path.join(user_cache_dir(), 'vendor'))
+    if mermaid_js:
+        options['mermaid_js_inline'] = mermaid_js
+    return options, assets
+
+
+def precompress_assets(args, paths: list):
+    """เขียนสำเนา .gz/.br ของ asset เมื่อใช้ --precompress"""
+    if not args.precompress:
+        return
+    written = []
+    for path in paths:
+        if path and os.path.exists(path):
+            written += precompress_asset(path)
+    if written:
+        print(f"Pre-compressed {len(written)} asset file(s)")
+
+
+def mermaid_render_options(args) -> dict:
+    """keyword arguments ของ MarkdownConverter สำหรับ render Mermaid เป็น SVG ตอน build ({} ถ้าไม่ใช้)"""
+    if not args.mermaid_render or args.no_images:
+        return {}
+    return {
+        'mermaid_renderer': args.mermaid_render,
+        'mermaid_cache_dir': args.mermaid_cache or os.path.join(user_cache_dir(), 'mermaid-svg'),
+    }
+
+
+def print_svg_stats(stats: dict):
+    """แสดงสถิติของ SVG cache"""
+    print(f"Mermaid SVG cache: {stats['hits'] + stats['disk_hits']} hits "
+          f"({stats['disk_hits']} from disk), {stats['misses']} rendered")
+
+
+def run_batch(args) -> int:
+    """แปลงไฟล์ Markdown หลายไฟล์แบบขนาน คืนค่าจำนวนไฟล์ที่แปลงไม่สำเร็จ"""
+    files = find_input_files(args)
+    if not files:
+        print(f"Error: No Markdown files found in '{args.input_file}'")
+        sys.exit(1)
+    
+    output_dir = batch_output_dir(args)
+    manifest = None if args.no_cache else BuildManifest(output_dir)
+    batch = BatchConverter(jobs=args.jobs, include_images=not args.no_images,
+                           manifest=manifest, force=args.force, template_path=args.template,
+                           highlight_cache_dir=args.highlight_cache, cprofile_path=args.cprofile,
+                           **mermaid_render_options(args))
+    stylesheet = write_stylesheet(output_dir) if args.css == 'external' else None
+    diagrams_asset = site_diagrams_asset(args, output_dir)
+    mermaid_js = mermaid_js_asset(args, output_dir)
+    site_options = site_build_options(args, files, output_dir)
+    search_path = search_script_path(args, output_dir)
+    tasks = build_tasks(files, output_dir, stylesheet, diagrams_asset, mermaid_js,
+                        search_script=search_path, **site_options)
+    diagrams = {}
+    page_indexes = []
+    report = None
+    if args.profile:
+        report = ProfileReport()
+        for task in tasks:
+            task['profile'] = True
+    print(f"Converting {len(tasks)} files with {min(batch.jobs, len(tasks))} worker(s)...")
+    
+    failed = 0
+    cached = 0
+    unchanged = 0
+    start = time.perf_counter()
+    for done, result in enumerate(batch.convert(tasks), 1):
+        if result['status'] == 'failed':
+            failed += 1
+            print(f"[{done}/{len(tasks)}] Error converting {result['path']}: {result['error']}")
+        elif result['status'] == 'cached':
+            cached += 1
+        elif not result['written']:
+            unchanged += 1
+            print(f"[{done}/{len(tasks)}] {result['path']} -> {result['output']} (unchanged)")
+        else:
+            print(f"[{done}/{len(tasks)}] {result['path']} -> {result['output']}")
+        if report is not None and 'profile' in result:
+            report.add(result['profile'])
+        diagrams.update(result.get('diagrams') or {})
+        if 'index' in result:
+            page_indexes.append(result['index'])
+    
+    # diagrams ของ site: เขียนใหม่ทั้งไฟล์เมื่อทุกหน้าถูกแปลงใหม่ ไม่เช่นนั้นเพิ่มเข้าไฟล์เดิม
+    if diagrams_asset is not None:
+        write_diagram_asset(diagrams_asset, diagrams, replace=cached == 0)
+    # index ของ site: รวมหัวข้อของหน้าที่แปลงใหม่กับหน้าเดิม และตรวจลิงก์ระหว่างหน้า
+    site_asset = site_options.get('site_asset')
+    if site_asset is not None:
+        write_site_asset(site_asset, page_indexes, [task['options']['site_page'] for task in tasks],
+                         replace=cached == 0 and failed == 0)
+    # search index: หน้าที่ไม่ได้แปลงใหม่ใช้คำที่ตัดไว้ใน cache ของ index ครั้งก่อน
+    search_files = []
+    if search_path is not None:
+        index_start = time.perf_counter()
+        builder = SearchIndexBuilder(output_dir, replace=cached == 0 and failed == 0)
+        search_files = write_search_index(builder, [page_index for page_index in page_indexes
+                                                    if 'sections' in page_index],
+                                          [task['page'] for task in tasks])
+        print(f"Search index: {len(builder.pages)} pages, {len(search_files)} files "
+              f"in {time.perf_counter() - index_start:.2f}s")
+    precompress_assets(args, [stylesheet, mermaid_js, diagrams_asset, site_asset] + search_files)
+    
+    # รายงานไฟล์ output ที่ไม่มีไฟล์ต้นฉบับแล้ว
+    if manifest is not None:
+        for output in manifest.stale_outputs(files):
+            print(f"Stale output (source removed): {output}")
+        manifest.save()
+    
+    print_highlight_stats(batch.highlight_stats)
+    if batch.mermaid_renderer:
+        print_svg_stats(batch.svg_stats)
+    
+    elapsed = time.perf_counter() - start
+    converted = len(tasks) - failed - cached
+    print(f"Converted {converted}/{len(tasks)} files ({cached} up to date, {unchanged} unchanged) "
+          f"in {elapsed:.2f}s -> {output_dir}")
+    if report is not None:
+        report.write(args.profile, args.profile_output)
+    return failed
+
+
+def run_archive(args) -> int:
+    """แปลงจาก zip/tar (หรือโฟลเดอร์/glob) ลง zip/tar (หรือโฟลเดอร์) โดยไม่แตกไฟล์ลงดิสก์
+
+    member ถูกอ่านทีละตัวและแปลงขนานกันใน worker แล้วเขียนลง output ทันทีที่แปลงเสร็จ
+    asset ที่ใช้ร่วมกัน (สไตล์ชีต, Mermaid.js, diagrams, index ของ site และ search index) เป็น member ท้าย output
+    คืนค่าจำนวนไฟล์ที่แปลงไม่สำเร็จ
+    """
+    if is_archive(args.input_file):
+        if not os.path.isfile(args.input_file):
+            print(f"Error: Input file '{args.input_file}' not found")
+            sys.exit(1)
+        members = iter_archive_members(args.input_file, args.include, args.exclude)
+    else:
+        files = find_input_files(args)
+        if not files:
+            print(f"Error: No Markdown files found in '{args.input_file}'")
+            sys.exit(1)
+        members = iter_file_members(files, site_root(files, args.input_file))
+    output = args.output if args.output and is_archive(args.output) else batch_output_dir(args)
+    
+    batch = BatchConverter(jobs=args.jobs, include_images=not args.no_images,
+                           template_path=args.template, highlight_cache_dir=args.highlight_cache,
+                           cprofile_path=args.cprofile, **mermaid_render_options(args))
+    # asset: {path ใน output: เนื้อหา} และ href ของแต่ละหน้าไปยัง asset
+    assets = {}
+    hrefs = {}
+    if args.css == 'external':
+        content = build_stylesheet()
+        hrefs['stylesheet_href'] = hashed_asset_name('md2html', 'css', content)
+        assets[hrefs['stylesheet_href']] = content
+    if args.mermaid_js and not args.no_images and not args.mermaid_render:
+        with open(args.mermaid_js, 'r', encoding='utf-8') as f:
+            content = f.read()
+        hrefs['mermaid_js_href'] = hashed_asset_name(MERMAID_ASSET_PREFIX, 'js', content)
+        assets[hrefs['mermaid_js_href']] = content
+    if args.mermaid_defs == 'site' and not args.no_images:
+        hrefs['diagrams_href'] = DIAGRAMS_ASSET_NAME
+    if args.site:
+        hrefs['site_href'] = SITE_ASSET_NAME
+    if args.search:
+        hrefs['search_href'] = f"{SEARCH_DIR}/{SEARCH_SCRIPT_NAME}"
+    
+    # เวลาของ member ต้นฉบับ (HTML ใช้เวลาเดียวกัน และ asset ใช้เวลาล่าสุด)
+    mtimes = {}
+    
+    def tracked(members):
+        for member in members:
+            mtimes[member.name] = member.mtime
+            yield member
+    
+    report = ProfileReport() if args.profile else None
+    diagrams = {}
+    page_indexes = []
+    failed = 0
+    done = 0
+    latest = 0
+    start = time.perf_counter()
+    with (ArchiveWriter(output) if is_archive(output) else DirectoryWriter(output)) as writer:
+        tasks = build_archive_tasks(tracked(members), hrefs, args.site, args.search)
+        for done, result in enumerate(batch.convert_stream(tasks), 1):
+            mtime = mtimes.pop(result['path'])
+            if result['status'] == 'failed':
+                failed += 1
+                print(f"[{done}] Error converting {result['path']}: {result['error']}")
+            else:
+                latest = max(latest, mtime)
+                writer.add(result['output'], result['html'], mtime)
+                print(f"[{done}] {result['path']} -> {result['output']}")
+            if report is not None and 'profile' in result:
+                report.add(result['profile'])
+            diagrams.update(result.get('diagrams') or {})
+            if 'index' in result:
+                page_indexes.append(result['index'])
         
-        .mermaid-alternatives li {{
-            margin: 5px 0;
-        }}
+        if 'diagrams_href' in hrefs:
+            assets[DIAGRAMS_ASSET_NAME] = diagram_asset_content(diagrams)
+        if args.site:
+            index = SiteIndex()
+            for page_index in page_indexes:
+                index.add(page_index)
+            print_broken_links(index.check_links(page_indexes))
+            assets[SITE_ASSET_NAME] = index.content()
+        if args.search:
+            builder = SearchIndexBuilder(output, replace=True)
+            for page_index in page_indexes:
+                builder.add(page_index)
+            for name, content in builder.files().items():
+                assets[f"{SEARCH_DIR}/{name}"] = content
+        compressors = asset_compressors() if args.precompress else []
+        for name in sorted(assets):
+            data = assets[name].encode('utf-8')
+            writer.add(name, data, latest)
+            for suffix, compress in compressors:
+                writer.add(name + suffix, compress(data), latest)
+    
+    print_highlight_stats(batch.highlight_stats)
+    if batch.mermaid_renderer:
+        print_svg_stats(batch.svg_stats)
+    elapsed = time.perf_counter() - start
+    unchanged = '' if writer.written else ' (unchanged)'
+    print(f"Converted {done - failed}/{done} files in {elapsed:.2f}s -> {output}{unchanged}")
+    if report is not None:
+        report.write(args.profile, args.profile_output)
+    return failed
+
+
+def run_watch(args):
+    """แปลงไฟล์ครั้งแรก แล้วเฝ้าดูและแปลงใหม่เฉพาะไฟล์ที่เปลี่ยน"""
+    import fnmatch
+    import subprocess
+    from batch_converter import create_converter
+    from scanner import DirectoryScanner
+    from watcher import RebuildQueue, is_markdown_file, watch
+    
+    if is_batch_input(args.input_file):
+        failed = run_batch(args)
+        if failed:
+            print(f"{failed} file(s) failed, watching for fixes...")
+        output_dir = batch_output_dir(args)
+        stylesheet = write_stylesheet(output_dir) if args.css == 'external' else None
+        diagrams_asset = site_diagrams_asset(args, output_dir)
+        mermaid_js = mermaid_js_asset(args, output_dir)
+        files = find_input_files(args)
+        site_options = site_build_options(args, files, output_dir)
+        search_path = search_script_path(args, output_dir)
+        search_builder = SearchIndexBuilder(output_dir) if search_path else None
         
-        .mermaid-alternatives a {{
-            color: #0366d6;
-            text-decoration: none;
-        }}
+        def make_task(path):
+            return build_tasks([path], output_dir, stylesheet, diagrams_asset, mermaid_js,
+                               search_script=search_path, **site_options)[0]
         
-        .mermaid-alternatives a:hover {{
-            text-decoration: underline;
-        }}
+        # ไฟล์ที่ได้ output ซ้ำกับไฟล์ก่อนหน้า (run_batch ข้ามพร้อมคำเตือนแล้ว) ไม่ถูกแปลงใน watch mode เช่นกัน
+        owners = {}
+        for path in files:
+            owners.setdefault(make_task(path)['output'], path)
+        skipped = {os.path.abspath(path) for path in set(files) - set(owners.values())}
         
-        details {{
-            margin-top: 15px;
-        }}
+        # หน้าทั้งหมดในตอนนี้ (หน้าที่ต้นฉบับถูกลบจะถูกนำออกจากเมนูนำทางและ search index)
+        pages = {make_task(path)['page'] for path in owners.values()} if site_options or search_builder else set()
         
-        summary {{
-            cursor: pointer;
-            font-weight: bold;
-            color: #0366d6;
-        }}
+        if os.path.isdir(args.input_file):
+            target = args.input_file
+            scanner = DirectoryScanner(args.input_file, args.include, args.exclude)
+            is_relevant = scanner.accepts
+            accepts_relative = scanner.accepts_relative
+        else:
+            # glob pattern: เฝ้าดูโฟลเดอร์ที่อยู่ก่อนส่วนที่เป็น wildcard
+            target = os.path.dirname(args.input_file.split('*')[0].split('?')[0].split('[')[0]) or '.'
+            accepts_relative = None
+            pattern = os.path.abspath(args.input_file)
+            known = {os.path.abspath(path) for path in find_input_files(args)}
+            
+            def is_relevant(path):
+                return is_markdown_file(path) and (path in known or fnmatch.fnmatch(path, pattern))
+        if skipped:
+            accepts = is_relevant
+            
+            def is_relevant(path):
+                return os.path.abspath(path) not in skipped and accepts(path)
+        initial = []
+    else:
+        if not os.path.exists(args.input_file):
+            print(f"Error: Input file '{args.input_file}' not found")
+            sys.exit(1)
+        output = args.output or f"{Path(args.input_file).stem}.html"
+        options, assets = single_file_options(args, output)
+        precompress_assets(args, assets)
+        output_dir = os.path.dirname(os.path.abspath(output))
+        target = os.path.abspath(args.input_file)
+        diagrams_asset = None
+        site_options = {}
+        pages = set()
+        search_builder = None
         
-        textarea {{
-            font-family: 'Courier New', monospace;
-            font-size: 12px;
-            border: 1px solid #e1e5e9;
-            border-radius: 4px;
-            padding: 10px;
-            resize: vertical;
-        }}
-    </style>
-    <!-- Mermaid.js for interactive diagrams -->
-    <script src="https://cdn.jsdelivr.net/npm/mermaid@10.6.1/dist/mermaid.min.js"></script>
-    <script>
-        mermaid.initialize({{
-            startOnLoad: true,
-            theme: 'default',
-            themeVariables: {{
-                primaryColor: '#3498db',
-                primaryTextColor: '#2c3e50',
-                primaryBorderColor: '#2980b9',
-                lineColor: '#34495e',
-                secondaryColor: '#ecf0f1',
-                tertiaryColor: '#ffffff'
-            }}
-        }});
-    </script>
-</head>
-<body>
-    {html_content}
-</body>
-</html>
-        """
+        def make_task(path):
+            return {'path': path, 'output': output, 'title': args.title,
+                    'options': options, 'stream': args.stream}
         
-        return html_template
+        def is_relevant(path):
+            return path == target
+        accepts_relative = None
+        initial = [target]
     
-    def cleanup(self):
-        """ลบไฟล์ชั่วคราว"""
-        if self.mermaid_processor:
-            self.mermaid_processor.cleanup()
+    # build manifest ใช้เฉพาะโฟลเดอร์ output ของ folder/glob input (run_batch จัดการ --force แล้ว)
+    manifest = None if args.no_cache or not is_batch_input(args.input_file) else BuildManifest(output_dir)
+    render_options = mermaid_render_options(args)
+    converter = create_converter(not args.no_images, {
+        'template_path': args.template,
+        'highlight_cache_dir': args.highlight_cache,
+        **render_options,
+    })
+    
+    converter.warm()
+    # on_result ถูกเรียกจากหลาย thread ของ RebuildQueue
+    diagrams_lock = threading.Lock()
+    
+    def on_result(result):
+        if result['status'] == 'failed':
+            print(f"Error converting {result['path']}: {result['error']}")
+        else:
+            unchanged = '' if result['written'] else ', unchanged'
+            print(f"{result['path']} -> {result['output']} ({result['elapsed'] * 1000:.1f} ms{unchanged})")
+        if result.get('diagrams'):
+            with diagrams_lock:
+                if write_diagram_asset(diagrams_asset, result['diagrams']):
+                    precompress_assets(args, [diagrams_asset])
+        if 'index' in result and site_options:
+            with diagrams_lock:
+                pages.add(result['index']['page'])
+                if write_site_asset(site_options['site_asset'], [result['index']], sorted(pages)):
+                    precompress_assets(args, [site_options['site_asset']])
+        if 'index' in result and search_builder is not None:
+            with diagrams_lock:
+                pages.add(result['index']['page'])
+                precompress_assets(args, write_search_index(search_builder, [result['index']], sorted(pages)))
+    
+    def on_removed(path):
+        if not site_options and search_builder is None:
+            return
+        with diagrams_lock:
+            pages.discard(make_task(path)['page'])
+            if site_options and write_site_asset(site_options['site_asset'], [], sorted(pages)):
+                precompress_assets(args, [site_options['site_asset']])
+            if search_builder is not None:
+                precompress_assets(args, write_search_index(search_builder, [], sorted(pages)))
+    
+    def on_rebuild(results):
+        if not args.on_change:
+            return
+        # เฉพาะไฟล์ที่ถูกเขียนใหม่ (HTML ที่เหมือนเดิมไม่ถูกเขียนทับ)
+        outputs = [result['output'] for result in results if result['written']]
+        if outputs:
+            env = dict(os.environ, MD2HTML_OUTPUTS='\n'.join(outputs))
+            subprocess.run(args.on_change, shell=True, env=env)
+    
+    rebuild = RebuildQueue(converter, make_task, manifest, include_images=not args.no_images,
+                           template_path=args.template, jobs=args.jobs or 2, on_result=on_result,
+                           mermaid_renderer=render_options.get('mermaid_renderer'), on_removed=on_removed)
+    for path in initial:
+        rebuild.submit(path)
+    print(f"Watching {target} for changes (Ctrl+C to stop)...")
+    try:
+        watch(os.path.abspath(target), rebuild, is_relevant, polling=args.poll, on_rebuild=on_rebuild,
+              accepts_relative=accepts_relative)
+    finally:
+        converter.cleanup()
+
+
+def convert_with_server(args, options: dict) -> bool:
+    """ส่งคำขอแปลงไปยัง conversion daemon (main.py serve)
+
+    คืนค่า False ถ้าติดต่อเซิร์ฟเวอร์ไม่ได้หรือ daemon ไม่รับ options นี้ (ให้แปลงในเครื่องแทน)
+    """
+    from server import CONVERT_OPTIONS, ConversionClient
+    
+    # daemon ไม่รับ options ที่ทำให้อ่านไฟล์อื่น (เช่น Mermaid.js ที่ฝังในหน้า) จึงแปลงในเครื่อง
+    if not set(options) <= CONVERT_OPTIONS:
+        return False
+    task = {
+        'path': args.input_file,
+        'output': args.output,
+        'title': args.title,
+        'options': options,
+        'stream': args.stream,
+        'profile': bool(args.profile),
+    }
+    report = ProfileReport() if args.profile else None
+    client = ConversionClient(args.server)
+    try:
+        result = client.convert(task, include_images=not args.no_images, template_path=args.template)
+    except OSError as e:
+        print(f"Warning: Cannot reach server {args.server}: {e}")
+        print("Converting locally...")
+        return False
+    finally:
+        client.close()
+    
+    if result['status'] == 'failed':
+        print(f"Error: {result['error']}")
+        sys.exit(1)
+    print(f"HTML created successfully: {args.output} ({result['elapsed'] * 1000:.1f} ms on server)")
+    if report is not None and 'profile' in result:
+        report.add(result['profile'])
+        report.write(args.profile, args.profile_output)
+    return True
+
+
+def job_count(value: str) -> int:
+    """type ของ argparse สำหรับ --jobs (จำนวนเต็มตั้งแต่ 1 ขึ้นไป)"""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid job count: '{value}'")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError(f"job count must be at least 1, got {jobs}")
+    return jobs
 
 
 def main():
     """ฟังก์ชันหลักสำหรับ command line interface"""
+    # python main.py serve ... : รัน conversion daemon
+    if len(sys.argv) > 1 and sys.argv[1] == 'serve':
+        import server
+        server.main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="Convert Markdown files with Mermaid diagrams to HTML",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -319,54 +965,229 @@ def main():
 Examples:
   python main.py input.md --output output.html
   python main.py input.md --title "My Document"
+  python main.py docs/ --output-dir html_output --jobs 4
+  python main.py "docs/**/*.md" --output-dir html_output
+  python main.py docs/ --site --output-dir site
+  python main.py docs.tar.gz --site --output site.zip
+  python main.py serve --socket /tmp/md2html.sock
+  python main.py input.md --server unix:/tmp/md2html.sock
         """
     )
     
-    parser.add_argument('input_file', help='Input Markdown file path')
+    parser.add_argument('input_file', help='Input Markdown file, folder, glob pattern or zip/tar archive')
     parser.add_argument('--output', '-o', 
-                       help='Output HTML file path')
+                       help='Output HTML file path, or a .zip/.tar[.gz|.bz2|.xz] archive to write the pages into')
+    parser.add_argument('--output-dir', '-d',
+                       help='Output folder for folder/glob input (default: html_output)')
+    parser.add_argument('--jobs', '-j',
+                       type=job_count,
+                       default=None,
+                       help='Number of worker processes for folder/glob input (default: CPU count)')
     parser.add_argument('--title', '-t',
                        default='Document',
                        help='Document title (default: Document)')
     parser.add_argument('--no-images', 
                        action='store_true',
                        help='Skip Mermaid diagram processing')
+    parser.add_argument('--template',
+                       help='HTML template file with {{ title }}, {{ head }} and {{ body }} placeholders')
+    parser.add_argument('--css',
+                       choices=['inline', 'external'],
+                       default='inline',
+                       help='Embed CSS in every page or link a shared md2html.<hash>.css (default: inline)')
+    parser.add_argument('--highlight-cache',
+                       metavar='DIR',
+                       help='Folder for the persistent syntax-highlighting cache (shared by workers)')
+    parser.add_argument('--stream',
+                       action='store_true',
+                       help='Convert in bounded memory, chunk by chunk (automatic for files over 64 MB)')
+    parser.add_argument('--force',
+                       action='store_true',
+                       help='Rebuild all files even if they are up to date')
+    parser.add_argument('--no-cache',
+                       action='store_true',
+                       help='Do not read or write the build manifest')
+    parser.add_argument('--include',
+                       action='append',
+                       metavar='GLOB',
+                       help='Only convert files matching this glob in folder mode (repeatable, default: *.md)')
+    parser.add_argument('--exclude',
+                       action='append',
+                       metavar='GLOB',
+                       help='Skip files/folders matching this glob in folder mode (repeatable; '
+                            'patterns in .md2htmlignore are also used)')
+    parser.add_argument('--watch', '-w',
+                       action='store_true',
+                       help='Keep running and reconvert files as they change')
+    parser.add_argument('--poll',
+                       action='store_true',
+                       help='Watch by polling file modification times instead of inotify')
+    parser.add_argument('--on-change',
+                       metavar='COMMAND',
+                       help='Shell command to run after each watch rebuild (e.g. a live-reload trigger); '
+                            'changed outputs are passed in MD2HTML_OUTPUTS, one per line')
+    parser.add_argument('--server',
+                       metavar='ADDRESS',
+                       help='Forward the conversion to a running "main.py serve" daemon '
+                            '(unix:PATH or http://HOST:PORT); converts locally if unreachable')
+    parser.add_argument('--site',
+                       action='store_true',
+                       help='Build a site from folder/glob input: keep the folder structure, rewrite links '
+                            'to .md files as .html and add navigation from a shared md2html-site.js '
+                            'heading index (broken links between pages are reported)')
+    parser.add_argument('--search',
+                       action='store_true',
+                       help='Build a client-side full-text search index (Thai-aware, sharded under search/) '
+                            'while converting folder/glob input, and add a search box to every page')
+    parser.add_argument('--mermaid-defs',
+                       choices=['page', 'site'],
+                       default='page',
+                       help='Store each unique Mermaid diagram once per page, or once per output folder '
+                            'in a shared md2html-diagrams.js for folder/glob input (default: page)')
+    parser.add_argument('--mermaid-js',
+                       metavar='FILE',
+                       help='Use this local mermaid.min.js instead of the CDN: copied once as a shared '
+                            'mermaid.<hash>.js for folder/glob input, inlined for a single file')
+    parser.add_argument('--precompress',
+                       action='store_true',
+                       help='Also write .gz (and .br if brotli is installed) copies of shared CSS/JS assets '
+                            'for static hosting')
+    parser.add_argument('--mermaid-render',
+                       metavar='RENDERER',
+                       help='Pre-render Mermaid diagrams to inline SVG at build time with a local renderer: '
+                            'mmdc (mermaid-cli), stub, or module:factory; pages then load no Mermaid.js')
+    parser.add_argument('--mermaid-cache',
+                       metavar='DIR',
+                       help='Folder for the pre-rendered SVG cache shared by runs and workers '
+                            '(default: the md2html folder in the user cache)')
+    parser.add_argument('--profile',
+                       nargs='?',
+                       const='table',
+                       choices=['table', 'json'],
+                       help='Report per-stage wall/CPU time and bytes in/out (read, mermaid, markdown, '
+                            'template, write) and the slowest documents (default format: table)')
+    parser.add_argument('--profile-output',
+                       metavar='FILE',
+                       help='Write the --profile report to FILE instead of printing it')
+    parser.add_argument('--cprofile',
+                       metavar='FILE',
+                       help='Dump cProfile stats to FILE (worker processes write FILE.<pid>)')
     
     args = parser.parse_args()
+    if args.profile_output and not args.profile:
+        args.profile = 'table'
+    
+    if args.cprofile:
+        with cprofile_to(args.cprofile):
+            run(args)
+        print(f"cProfile stats written to {args.cprofile}")
+    else:
+        run(args)
+
+
+def run(args):
+    """แปลงไฟล์ตาม arguments ของ command line"""
+    # ตรวจสอบไฟล์ template ก่อนเริ่มแปลง
+    if args.template:
+        try:
+            load_template(args.template)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
+    if args.mermaid_js and not os.path.isfile(args.mermaid_js):
+        print(f"Error: Mermaid script '{args.mermaid_js}' not found")
+        sys.exit(1)
+    
+    # ตรวจสอบ renderer ของ Mermaid (เช่น ติดตั้ง mmdc แล้วหรือยัง) ก่อนเริ่มแปลง
+    if mermaid_render_options(args):
+        from mermaid_render import create_renderer
+        try:
+            create_renderer(args.mermaid_render, None)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
+    # อ่านจาก/เขียนลง zip หรือ tar โดยตรง
+    if is_archive(args.input_file) or (args.output and is_archive(args.output)):
+        if args.watch:
+            print("Error: --watch does not support zip/tar input or output")
+            sys.exit(1)
+        try:
+            failed = run_archive(args)
+        except Exception as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+        if failed:
+            sys.exit(1)
+        return
+    
+    # เฝ้าดูไฟล์และแปลงใหม่เมื่อมีการเปลี่ยนแปลง
+    if args.watch:
+        run_watch(args)
+        return
+    
+    # แปลงหลายไฟล์เมื่ออินพุตเป็นโฟลเดอร์หรือ glob pattern
+    if is_batch_input(args.input_file):
+        if run_batch(args):
+            sys.exit(1)
+        return
     
     # ตรวจสอบไฟล์อินพุต
     if not os.path.exists(args.input_file):
         print(f"Error: Input file '{args.input_file}' not found")
         sys.exit(1)
     
+    # กำหนดชื่อไฟล์เอาต์พุต
+    if not args.output:
+        # สร้างชื่อไฟล์อัตโนมัติ
+        args.output = f"{Path(args.input_file).stem}.html"
+    
+    # เขียนสไตล์ชีตภายนอกไว้ข้างไฟล์ output และเตรียม Mermaid.js ที่ฝังในหน้า
+    options, assets = single_file_options(args, args.output)
+    precompress_assets(args, assets)
+    
+    # ไฟล์เดียวไม่ใช้ build manifest (ไม่สร้าง .md2html-manifest.json ข้างไฟล์ output)
+    # แต่ HTML ที่เหมือนไฟล์เดิมก็ไม่ถูกเขียนทับ
+    
+    # ส่งให้ daemon ที่อุ่นเครื่องไว้แล้วแปลงแทน (daemon ไม่ render Mermaid เป็น SVG จึงแปลงในเครื่องเมื่อใช้)
+    render_options = mermaid_render_options(args)
+    if args.server and not render_options and convert_with_server(args, options):
+        return
+    
     # สร้าง converter
-    converter = MarkdownConverter()
+    converter = MarkdownConverter(args.template, args.highlight_cache, **render_options)
     
     # ถ้าใช้ --no-images ให้ปิดการประมวลผล Mermaid
     if args.no_images:
         converter.mermaid_processor = None
         print("Skipping Mermaid diagram processing...")
     
+    report = ProfileReport() if args.profile else None
     try:
-        # อ่านไฟล์ Markdown
-        content = converter.read_markdown_file(args.input_file)
-        
-        # กำหนดชื่อไฟล์เอาต์พุต
-        base_name = Path(args.input_file).stem
-        
-        if not args.output:
-            # สร้างชื่อไฟล์อัตโนมัติ
-            args.output = f"{base_name}.html"
+        # ไฟล์ใหญ่ (หรือ --stream) จะแปลงทีละส่วนและเขียนลงไฟล์ทันที
+        result = convert_task(converter, {
+            'path': args.input_file,
+            'output': args.output,
+            'title': args.title,
+            'options': options,
+            'stream': args.stream,
+            'profile': bool(args.profile),
+        })
+        if result['status'] == 'failed':
+            print(f"Error: {result['error']}")
+            sys.exit(1)
+        if result['written']:
+            print(f"HTML created successfully: {args.output}")
+        else:
+            print(f"HTML is unchanged: {args.output}")
+        print_highlight_stats(converter.highlight_cache.stats())
+        if converter.svg_cache_stats() is not None:
+            print_svg_stats(converter.svg_cache_stats())
         
-        # สร้างไฟล์ HTML
-        html_content = converter.convert_to_html(content, args.title)
-        with open(args.output, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"HTML created successfully: {args.output}")
-    
-    except Exception as e:
-        print(f"Error: {e}")
-        sys.exit(1)
+        if report is not None:
+            report.add(result['profile'])
+            report.write(args.profile, args.profile_output)
     
     finally:
         converter.cleanup()
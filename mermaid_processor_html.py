@@ -4,58 +4,218 @@ Mermaid Processor using pure HTML + Mermaid.js
 ใช้ Mermaid.js library ใน HTML โดยตรง ไม่ต้องใช้ API หรือ mermaid-py
 """
 
+import hashlib
+import html
+import json
 import re
 import tempfile
 from pathlib import Path
 
-class MermaidProcessorPy:
-    """Mermaid processor ที่ใช้ Mermaid.js ใน HTML โดยตรง"""
-    
-    def __init__(self):
-        self.temp_dir = Path(tempfile.mkdtemp())
-        print(f"MermaidProcessorPy (HTML) initialized. Temp directory: {self.temp_dir}")
-        
-    def replace_mermaid_with_images(self, content: str) -> str:
-        """แทนที่ Mermaid diagrams ด้วย interactive HTML"""
-        mermaid_pattern = r'```mermaid\n(.*?)\n```'
-        
-        def replace_mermaid(match):
-            diagram_content = match.group(1)
-            
-            # สร้าง interactive HTML สำหรับ Mermaid diagram
-            html_content = f"""
+from fenced_blocks import replace_fenced_blocks
+
+# จำนวนตัวอักษรของ hash ที่ใช้เป็น id ของ diagram
+DIAGRAM_ID_LENGTH = 12
+
+# HTML ของ diagram แต่ละจุดในหน้า (source อยู่ในชุด diagrams ของหน้าหรือของ site และอ้างอิงด้วย id)
+DIAGRAM_HTML = """
 <div class="mermaid-diagram">
     <h4>📊 Mermaid Diagram</h4>
-    <div class="mermaid-container">
-        <div class="mermaid">
-{diagram_content}
-        </div>
-    </div>
-    <div class="mermaid-alternatives">
-        <p><strong>💡 วิธีแสดงแผนภาพ:</strong></p>
-        <ol>
-            <li><strong>ใช้ Mermaid Live Editor:</strong> <a href="https://mermaid.live" target="_blank">https://mermaid.live</a></li>
-            <li><strong>ใช้ VS Code:</strong> ติดตั้ง Mermaid Preview extension</li>
-            <li><strong>ใช้ GitHub:</strong> GitHub จะแสดง Mermaid diagrams อัตโนมัติ</li>
-            <li><strong>ใช้ Mermaid CLI:</strong> ติดตั้ง mermaid-cli และแปลงเป็นรูปภาพ</li>
-        </ol>
-        <details>
-            <summary>📋 คัดลอกโค้ด Mermaid</summary>
-            <textarea readonly style="width: 100%; height: 100px;">{diagram_content}</textarea>
-        </details>
-    </div>
+    <div class="mermaid-container" data-mermaid="{id}"></div>
+    <details>
+        <summary>📋 คัดลอกโค้ด Mermaid</summary>
+        <textarea readonly style="width: 100%; height: 100px;" data-mermaid-source="{id}"></textarea>
+    </details>
+</div>
+"""
+
+# diagram ที่ render เป็น SVG ไว้แล้วตอน build (ไม่ต้องใช้ Mermaid.js ในเบราว์เซอร์)
+PRERENDERED_HTML = """
+<div class="mermaid-diagram">
+    <h4>📊 Mermaid Diagram</h4>
+    <div class="mermaid-container mermaid-svg" data-mermaid-id="{id}"><!--md2html-svg:{id}--></div>
+    <details>
+        <summary>📋 คัดลอกโค้ด Mermaid</summary>
+        <textarea readonly style="width: 100%; height: 100px;">{source}</textarea>
+    </details>
 </div>
 """
+
+# ตำแหน่งของ SVG ใน HTML ที่ Markdown แปลงแล้ว (ใส่ SVG หลังแปลง Markdown เพื่อไม่ให้ parser ต้องอ่าน SVG)
+SVG_MARKER_PATTERN = re.compile(r'<!--md2html-svg:(m[0-9a-f]+)-->')
+
+# คำแนะนำการแสดงแผนภาพ (หนึ่งครั้งต่อหน้า)
+DIAGRAM_HELP_HTML = """
+<div class="mermaid-alternatives">
+    <p><strong>💡 วิธีแสดงแผนภาพ:</strong></p>
+    <ol>
+        <li><strong>ใช้ Mermaid Live Editor:</strong> <a href="https://mermaid.live" target="_blank">https://mermaid.live</a></li>
+        <li><strong>ใช้ VS Code:</strong> ติดตั้ง Mermaid Preview extension</li>
+        <li><strong>ใช้ GitHub:</strong> GitHub จะแสดง Mermaid diagrams อัตโนมัติ</li>
+        <li><strong>ใช้ Mermaid CLI:</strong> ติดตั้ง mermaid-cli และแปลงเป็นรูปภาพ</li>
+    </ol>
+</div>
+"""
+
+# render diagram ที่ไม่ซ้ำกันครั้งละหนึ่งแบบ แล้วใช้ SVG เดียวกันกับทุกจุดที่อ้างอิง id นั้น
+# (จุดที่สองเป็นต้นไปได้ id ต่อท้ายด้วยลำดับเหมือน MermaidPage.insert_svgs เพื่อไม่ให้ DOM id ซ้ำกัน)
+DIAGRAM_RENDER_SCRIPT = """
+<script>
+(function () {
+    var defs = window.MD2HTML_DIAGRAMS || {};
+    var inline = document.getElementById('mermaid-diagrams');
+    if (inline) {
+        var own = JSON.parse(inline.textContent);
+        for (var key in own) { defs[key] = own[key]; }
+    }
+    document.querySelectorAll('[data-mermaid-source]').forEach(function (node) {
+        node.value = defs[node.getAttribute('data-mermaid-source')] || '';
+    });
+    var groups = {};
+    document.querySelectorAll('[data-mermaid]').forEach(function (node) {
+        var id = node.getAttribute('data-mermaid');
+        (groups[id] = groups[id] || []).push(node);
+    });
+    Object.keys(groups).forEach(function (id) {
+        var source = defs[id];
+        if (source === undefined) { return; }
+        var base = 'svg-' + id;
+        function show(svg) {
+            groups[id].forEach(function (node, i) {
+                node.innerHTML = i === 0 ? svg : svg.split(base).join(base + '-' + (i + 1));
+            });
+        }
+        function showSource() {
+            groups[id].forEach(function (node) {
+                var pre = document.createElement('pre');
+                pre.textContent = source;
+                node.appendChild(pre);
+            });
+        }
+        if (window.mermaid) {
+            mermaid.render(base, source).then(function (result) { show(result.svg); }, showSource);
+        } else {
+            showSource();
+        }
+    });
+})();
+</script>
+"""
+
+
+def diagram_id(source: str) -> str:
+    """id ของ diagram จาก hash ของ source (source เดียวกันได้ id เดียวกันทุกหน้า)"""
+    return 'm' + hashlib.sha256(source.encode('utf-8')).hexdigest()[:DIAGRAM_ID_LENGTH]
+
+
+def svg_id(key: str) -> str:
+    """id ของ SVG ที่ render ล่วงหน้าของ diagram key"""
+    return f"svg-{key}"
+
+
+def diagrams_json(diagrams: dict) -> str:
+    """JSON ของ {id: source} ที่ใส่ใน <script> ได้อย่างปลอดภัย (escape < ทั้งหมด)"""
+    return json.dumps(diagrams, ensure_ascii=False, sort_keys=True).replace('<', '\\u003c')
+
+
+class MermaidPage:
+    """Mermaid diagrams ของหน้าเดียว: เก็บ source ที่ไม่ซ้ำกันครั้งเดียวตาม hash และอ้างอิงด้วย id
+
+    diagrams_href: URL ของ asset ที่มี diagrams ของทั้ง site (None = ฝัง JSON ไว้ในหน้า)
+    prerenderer: MermaidPrerenderer สำหรับใส่ SVG ที่ render ล่วงหน้าแทน (diagram ที่ render ไม่สำเร็จ
+    จะใช้ source ในหน้าตามปกติ)
+    script_html: HTML ที่โหลด Mermaid.js ใส่ท้ายหน้าเฉพาะเมื่อหน้ามี diagram ที่ต้อง render ในเบราว์เซอร์
+    """
+
+    def __init__(self, diagrams_href: str = None, prerenderer=None, script_html: str = ''):
+        self.diagrams_href = diagrams_href
+        self.prerenderer = prerenderer
+        self.script_html = script_html
+        self.diagrams = {}  # id -> source
+        self.svgs = {}  # id -> SVG ที่รอใส่ใน HTML ด้วย insert_svgs
+        self.inserted = {}  # id -> จำนวนครั้งที่ใส่ SVG ของ diagram นี้ในหน้าแล้ว (ข้ามทุก chunk ของ streaming)
+
+    def render_block(self, block) -> str:
+        """handler ของ fenced block ภาษา mermaid"""
+        source = block.content.strip()
+        key = diagram_id(source)
+        if self.prerenderer is not None:
+            svg = self.prerenderer.svg(source, svg_id(key))
+            if svg is not None:
+                self.svgs[key] = svg
+                return PRERENDERED_HTML.format(id=key, source=html.escape(source))
+        self.diagrams.setdefault(key, source)
+        return DIAGRAM_HTML.format(id=key)
+
+    def insert_svgs(self, html_content: str) -> str:
+        """ใส่ SVG ที่ render ล่วงหน้าแทน marker ใน HTML ที่แปลงแล้ว (และคืนหน่วยความจำของ SVG)
+
+        diagram เดียวกันที่อยู่หลายจุดในหน้าได้ id ต่อท้ายด้วยลำดับ (svg-<id>-2, ...) เพื่อไม่ให้ DOM id ซ้ำกัน
+        """
+        if not self.svgs:
             return html_content
+        svgs, self.svgs = self.svgs, {}
+
+        def replace(match):
+            key = match.group(1)
+            svg = svgs.get(key)
+            if svg is None:
+                return match.group(0)
+            count = self.inserted.get(key, 0) + 1
+            self.inserted[key] = count
+            if count == 1:
+                return svg
+            # id ของ SVG ถูกใช้ใน CSS และ marker ภายใน SVG ด้วย จึงแทนที่ทุกจุด
+            return svg.replace(svg_id(key), f"{svg_id(key)}-{count}")
+
+        return SVG_MARKER_PATTERN.sub(replace, html_content)
+
+    def footer_html(self) -> str:
+        """คำแนะนำ, diagrams ของหน้า (หรือลิงก์ไป asset ของ site), Mermaid.js และ script สำหรับ render"""
+        if not self.diagrams:
+            return ''
+        if self.diagrams_href:
+            definitions = f'<script src="{html.escape(self.diagrams_href)}"></script>'
+        else:
+            definitions = (f'<script type="application/json" id="mermaid-diagrams">'
+                           f'{diagrams_json(self.diagrams)}</script>')
+        return DIAGRAM_HELP_HTML + definitions + self.script_html + DIAGRAM_RENDER_SCRIPT
+
+
+class MermaidProcessorPy:
+    """Mermaid processor ที่ใช้ Mermaid.js ใน HTML โดยตรง
+
+    ถ้าระบุ renderer (ชื่อใน mermaid_render.RENDERERS หรือ "module:factory") จะ render diagrams
+    เป็น SVG ตอน build แทน โดยใช้ temp_dir (สร้างเฉพาะเมื่อมี renderer) เป็นที่ทำงานของ renderer และเก็บผลใน cache_dir
+    """
+    
+    def __init__(self, renderer: str = None, cache_dir: str = None):
+        # renderer ต้องใช้โฟลเดอร์ชั่วคราว (ไม่มี renderer = ไม่สร้าง)
+        self.temp_dir = None
+        self.prerenderer = None
+        if renderer:
+            from mermaid_render import MermaidPrerenderer, SvgCache, create_renderer
+            self.temp_dir = Path(tempfile.mkdtemp())
+            print(f"MermaidProcessorPy (HTML) initialized. Temp directory: {self.temp_dir}")
+            self.prerenderer = MermaidPrerenderer(create_renderer(renderer, self.temp_dir),
+                                                  SvgCache(cache_dir))
         
-        content = re.sub(mermaid_pattern, replace_mermaid, content, flags=re.DOTALL)
-        return content
+    def replace_mermaid_with_images(self, content: str) -> str:
+        """แทนที่ Mermaid diagrams ด้วย interactive HTML"""
+        return replace_fenced_blocks(content, {'mermaid': self.render_block})
+    
+    def render_block(self, block) -> str:
+        """handler ของ fenced block ภาษา mermaid (source และคำแนะนำอยู่ในทุก diagram)"""
+        return self.create_mermaid_fallback(block.content)
+    
+    def new_page(self, diagrams_href: str = None, script_html: str = '') -> MermaidPage:
+        """ชุด diagrams ของหน้าใหม่ (ใช้ render_block ของ MermaidPage แทนเพื่อไม่ให้ source ซ้ำกัน)"""
+        return MermaidPage(diagrams_href, self.prerenderer, script_html)
     
     def cleanup(self):
         """ลบไฟล์ชั่วคราว"""
         try:
             import shutil
-            if self.temp_dir.exists():
+            if self.temp_dir is not None and self.temp_dir.exists():
                 shutil.rmtree(self.temp_dir)
                 print(f"Cleaned up temp directory: {self.temp_dir}")
         except Exception as e:
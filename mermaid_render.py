@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Offline Mermaid Rendering
+แปลง Mermaid diagrams เป็น SVG ตอน build ด้วย renderer ในเครื่อง (mermaid-cli หรือ renderer ของผู้ใช้)
+ผลลัพธ์เก็บใน cache ตาม hash ของ source ใช้ร่วมกันได้ระหว่างการรันและ worker processes
+ผู้อ่านจึงได้ SVG ในหน้าโดยไม่ต้องโหลดหรือรัน Mermaid.js ในเบราว์เซอร์
+"""
+
+import hashlib
+import html
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+from assets import MERMAID_CONFIG
+from highlight_cache import HighlightCache
+
+# จำนวน SVG สูงสุดที่เก็บในหน่วยความจำต่อ process
+SVG_CACHE_SIZE = 512
+
+# เวลาสูงสุดในการ render หนึ่ง diagram ด้วยโปรแกรมภายนอก (วินาที)
+RENDER_TIMEOUT = 60
+
+# id ที่ mermaid-cli ใส่ให้ทุก SVG (ถูกแทนด้วย id ของ diagram เพื่อไม่ให้ CSS ของแต่ละ SVG ชนกัน)
+MMDC_SVG_ID = 'my-svg'
+
+
+class SvgCache(HighlightCache):
+    """Cache ของ SVG ที่ render แล้ว แบบ LRU ในหน่วยความจำ + ไฟล์ .svg บนดิสก์"""
+
+    EXTENSION = '.svg'
+    LABEL = 'Mermaid SVG'
+
+    def __init__(self, cache_dir: str = None, max_entries: int = SVG_CACHE_SIZE):
+        super().__init__(max_entries, cache_dir)
+
+
+class CliRenderer:
+    """render ด้วย mermaid-cli (mmdc) ครั้งละหนึ่ง diagram โดยใช้ไฟล์ชั่วคราวใน work_dir"""
+
+    name = 'mmdc'
+
+    def __init__(self, work_dir: str, command: str = 'mmdc', timeout: float = RENDER_TIMEOUT):
+        self.executable = shutil.which(command)
+        if self.executable is None:
+            raise Exception(f"Mermaid renderer '{command}' not found "
+                            f"(install with: npm install -g @mermaid-js/mermaid-cli)")
+        self.work_dir = work_dir
+        self.timeout = timeout
+        self._version = None
+        self._config_path = None
+        self._lock = threading.Lock()
+
+    def version(self) -> str:
+        """เวอร์ชันของ mermaid-cli (เป็นส่วนหนึ่งของ cache key)"""
+        with self._lock:
+            if self._version is None:
+                completed = subprocess.run([self.executable, '--version'], capture_output=True,
+                                           text=True, timeout=self.timeout)
+                self._version = completed.stdout.strip() or 'unknown'
+            return self._version
+
+    def _config(self) -> str:
+        with self._lock:
+            if self._config_path is None:
+                os.makedirs(self.work_dir, exist_ok=True)
+                path = os.path.join(self.work_dir, 'mermaid-config.json')
+                with open(path, 'w', encoding='utf-8') as f:
+                    json.dump(MERMAID_CONFIG, f)
+                self._config_path = path
+            return self._config_path
+
+    def render(self, source: str, svg_id: str) -> str:
+        """SVG ของ diagram (raise Exception ถ้า render ไม่สำเร็จ)"""
+        os.makedirs(self.work_dir, exist_ok=True)
+        fd, input_path = tempfile.mkstemp(dir=self.work_dir, suffix='.mmd')
+        output_path = input_path[:-len('.mmd')] + '.svg'
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(source)
+            completed = subprocess.run(
+                [self.executable, '-i', input_path, '-o', output_path,
+                 '-c', self._config(), '-b', 'transparent', '-q'],
+                capture_output=True, text=True, timeout=self.timeout)
+            if completed.returncode != 0:
+                message = (completed.stderr or completed.stdout).strip().splitlines()
+                raise Exception(message[-1] if message else f"exit code {completed.returncode}")
+            with open(output_path, 'r', encoding='utf-8') as f:
+                svg = f.read()
+        finally:
+            for path in (input_path, output_path):
+                if os.path.exists(path):
+                    os.unlink(path)
+        svg = svg[svg.find('<svg'):] if '<svg' in svg else svg
+        return svg.replace(MMDC_SVG_ID, svg_id)
+
+
+class StubRenderer:
+    """renderer สำหรับทดสอบและ benchmark: SVG กล่องข้อความที่มี source ของ diagram (ไม่ต้องติดตั้งอะไร)"""
+
+    name = 'stub'
+
+    def __init__(self, work_dir: str = None):
+        self.work_dir = work_dir
+
+    def version(self) -> str:
+        return '1'
+
+    def render(self, source: str, svg_id: str) -> str:
+        lines = source.splitlines() or ['']
+        height = 20 * len(lines) + 20
+        width = 10 + 8 * max(len(line) for line in lines)
+        text = ''.join(f'<tspan x="10" dy="20">{html.escape(line)}</tspan>' for line in lines)
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" id="{svg_id}" class="mermaid-stub" '
+                f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+                f'<rect width="100%" height="100%" fill="#ffffff" stroke="#2980b9"/>'
+                f'<text font-family="monospace" font-size="14">{text}</text></svg>')
+
+
+# renderer ที่เลือกได้ด้วยชื่อ (renderer อื่นระบุเป็น "module:factory")
+RENDERERS = {
+    'mmdc': CliRenderer,
+    'stub': StubRenderer,
+}
+
+
+def create_renderer(spec: str, work_dir: str):
+    """สร้าง renderer จากชื่อใน RENDERERS หรือ "module:factory" ที่รับ work_dir
+
+    renderer ต้องมี name, version() และ render(source, svg_id) -> SVG
+    """
+    if spec in RENDERERS:
+        return RENDERERS[spec](work_dir)
+    module_name, _, attribute = spec.partition(':')
+    if not attribute:
+        raise Exception(f"Unknown Mermaid renderer: {spec} (use {', '.join(RENDERERS)} or module:factory)")
+    try:
+        factory = getattr(importlib.import_module(module_name), attribute)
+    except (ImportError, AttributeError) as e:
+        raise Exception(f"Cannot load Mermaid renderer {spec}: {e}")
+    return factory(work_dir)
+
+
+class MermaidPrerenderer:
+    """render diagrams ด้วย renderer และจำผลลัพธ์ใน SvgCache ตาม (renderer, เวอร์ชัน, source)"""
+
+    def __init__(self, renderer, cache: SvgCache):
+        self.renderer = renderer
+        self.cache = cache
+        self.failures = 0
+
+    def cache_key(self, source: str) -> str:
+        key_source = repr((self.renderer.name, self.renderer.version(), MERMAID_CONFIG, source))
+        return hashlib.sha256(key_source.encode('utf-8')).hexdigest()
+
+    def svg(self, source: str, svg_id: str):
+        """SVG ของ diagram หรือ None ถ้า render ไม่สำเร็จ (หน้าจะแสดง source แทน)"""
+        try:
+            key = self.cache_key(source)
+            svg = self.cache.get(key)
+            if svg is None:
+                svg = self.renderer.render(source, svg_id)
+                self.cache.put(key, svg)
+            return svg
+        except Exception as e:
+            self.failures += 1
+            print(f"Warning: Cannot pre-render Mermaid diagram {svg_id}: {e}")
+            return None
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Output Writer
+เขียนไฟล์ output แบบ atomic (ไฟล์ชั่วคราวในโฟลเดอร์เดียวกันแล้ว rename) จึงไม่มี HTML ที่ขาดครึ่งเมื่อโปรแกรมหยุดกลางทาง
+และข้ามการเขียนเมื่อเนื้อหาเหมือนไฟล์เดิม เพื่อให้ mtime ไม่เปลี่ยนและ rsync/cache ของ static host ไม่ต้องส่งไฟล์ซ้ำ
+"""
+
+import os
+import stat
+import tempfile
+
+from build_cache import hash_bytes, hash_file
+
+# ขนาด buffer ของไฟล์ output ที่เขียนทีละส่วน (streaming เขียน chunk เล็ก ๆ จำนวนมาก)
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# OutputBatch เขียนไฟล์ที่รอไว้ทั้งหมดเมื่อขนาดรวมเกินค่านี้
+BATCH_FLUSH_BYTES = 8 * 1024 * 1024
+
+
+def _read_umask() -> int:
+    """umask ของ process (อ่านครั้งเดียวตอน import ก่อนที่ thread อื่นจะสร้างไฟล์ เพราะ os.umask ตั้งค่าทั้ง process)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+_UMASK = _read_umask()
+
+
+def default_file_mode() -> int:
+    """mode ของไฟล์ใหม่ตาม umask ของ process (เหมือนไฟล์ที่สร้างด้วย open())"""
+    return 0o666 & ~_UMASK
+
+
+def set_output_mode(temp_path: str, path: str):
+    """ตั้ง mode ของไฟล์ชั่วคราวก่อน rename ทับ path
+
+    mkstemp สร้างไฟล์เป็น 0600 และ os.replace คง mode นั้นไว้ จึงใช้ mode ของไฟล์เดิมถ้ามี
+    ไม่เช่นนั้นใช้ mode ตาม umask (web server ที่รันด้วย user อื่นต้องอ่านไฟล์ output ได้)
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        mode = default_file_mode()
+    os.chmod(temp_path, mode)
+
+
+def sync_file(path: str):
+    """fsync ไฟล์ชั่วคราวก่อน rename (ไม่เช่นนั้นหลังเครื่องดับอาจได้ไฟล์ที่ rename แล้วแต่ว่างเปล่า)"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_directory(directory: str):
+    """fsync โฟลเดอร์เพื่อบันทึกการ rename (ข้ามบนระบบที่เปิดโฟลเดอร์ไม่ได้ เช่น Windows)"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def replace_output(temp_path: str, path: str):
+    """แทนที่ path ด้วยไฟล์ชั่วคราวที่เขียนเสร็จแล้ว: ตั้ง mode, fsync, rename แล้ว fsync โฟลเดอร์"""
+    set_output_mode(temp_path, path)
+    sync_file(temp_path)
+    os.replace(temp_path, path)
+    sync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+def write_bytes_atomic(path: str, data: bytes):
+    """เขียนไฟล์ผ่านไฟล์ชั่วคราวแล้ว rename ผู้อ่านจึงไม่เห็นไฟล์ที่เขียนไม่ครบ"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        replace_output(temp_path, path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+
+
+def write_text_atomic(path: str, content: str):
+    """เขียนไฟล์ข้อความ (UTF-8) แบบ atomic"""
+    write_bytes_atomic(path, content.encode('utf-8'))
+
+
+def same_content(path: str, data: bytes) -> bool:
+    """ไฟล์ path มีเนื้อหาเท่ากับ data หรือไม่ (เทียบขนาดก่อน แล้วจึงเทียบ hash)"""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        return hash_file(path) == hash_bytes(data)
+    except OSError:
+        return False
+
+
+def same_file(path: str, other_path: str) -> bool:
+    """ไฟล์สองไฟล์มีเนื้อหาเท่ากันหรือไม่ (เทียบขนาดก่อน แล้วจึงเทียบ hash)"""
+    try:
+        if os.path.getsize(path) != os.path.getsize(other_path):
+            return False
+        return hash_file(path) == hash_file(other_path)
+    except OSError:
+        return False
+
+
+def write_output(path: str, data: bytes) -> bool:
+    """เขียนไฟล์แบบ atomic เมื่อเนื้อหาต่างจากไฟล์เดิม คืนค่า True ถ้าไฟล์ถูกเขียนใหม่"""
+    if same_content(path, data):
+        return False
+    write_bytes_atomic(path, data)
+    return True
+
+
+class AtomicOutput:
+    """ไฟล์ output ที่เขียนทีละส่วนผ่านไฟล์ชั่วคราว (with AtomicOutput(path) as f: f.write(...))
+
+    เมื่อออกจาก with ตามปกติ ไฟล์ชั่วคราวแทนที่ path (หรือถูกลบถ้าเนื้อหาเหมือนไฟล์เดิม)
+    เมื่อเกิด exception ไฟล์ชั่วคราวถูกลบและไฟล์เดิมไม่ถูกแตะ
+    written เป็น True หลังออกจาก with ถ้าไฟล์ถูกเขียนใหม่
+    """
+
+    def __init__(self, path: str, buffering: int = OUTPUT_BUFFER_SIZE):
+        self.path = path
+        self.buffering = buffering
+        self.written = False
+        self._file = None
+        self._temp_path = None
+
+    def __enter__(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb', buffering=self.buffering)
+        return self
+
+    def write(self, data: bytes):
+        self._file.write(data)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._file.close()
+            if exc_type is None and not same_file(self._temp_path, self.path):
+                replace_output(self._temp_path, self.path)
+                self.written = True
+        finally:
+            if os.path.exists(self._temp_path):
+                os.unlink(self._temp_path)
+        return False
+
+
+class OutputBatch:
+    """รวมการเขียนไฟล์เล็กจำนวนมากแล้วเขียนพร้อมกัน (เช่น shards ของ search index)
+
+    write() เก็บเนื้อหาไว้ในหน่วยความจำจนขนาดรวมเกิน flush_bytes หรือเรียก flush()
+    flush() เขียนและ fsync ไฟล์ชั่วคราวของทุกไฟล์ก่อนแล้วจึง rename ต่อกัน ผู้อ่านจึงเห็นไฟล์ชุดใหม่เกือบพร้อมกัน
+    ใช้กับ with: flush เมื่อจบตามปกติ และทิ้งไฟล์ที่รอไว้เมื่อเกิด exception
+    """
+
+    def __init__(self, flush_bytes: int = BATCH_FLUSH_BYTES):
+        self.flush_bytes = flush_bytes
+        self.pending = {}
+        self.pending_bytes = 0
+        self.written = []
+        self.unchanged = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pending.clear()
+            self.pending_bytes = 0
+        return False
+
+    def write(self, path: str, data: bytes):
+        """เพิ่มไฟล์เข้า batch (เขียนซ้ำ path เดิมก่อน flush ใช้เนื้อหาล่าสุด)"""
+        previous = self.pending.get(path)
+        if previous is not None:
+            self.pending_bytes -= len(previous)
+        self.pending[path] = data
+        self.pending_bytes += len(data)
+        if self.pending_bytes >= self.flush_bytes:
+            self.flush()
+
+    def flush(self) -> list:
+        """เขียนไฟล์ที่รอไว้ซึ่งเนื้อหาต่างจากไฟล์เดิม คืนรายการไฟล์ที่ถูกเขียนใหม่ในครั้งนี้"""
+        pending = self.pending
+        self.pending = {}
+        self.pending_bytes = 0
+        temp_paths = []
+        try:
+            for path, data in pending.items():
+                if same_content(path, data):
+                    self.unchanged.append(path)
+                    continue
+                directory = os.path.dirname(os.path.abspath(path))
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+                temp_paths.append((temp_path, path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+            for temp_path, path in temp_paths:
+                set_output_mode(temp_path, path)
+                sync_file(temp_path)
+            written = []
+            for temp_path, path in temp_paths:
+                os.replace(temp_path, path)
+                written.append(path)
+            for directory in {os.path.dirname(os.path.abspath(path)) for path in written}:
+                sync_directory(directory)
+        finally:
+            # ไฟล์ชั่วคราวที่ยังไม่ถูก rename เมื่อเกิด exception
+            for temp_path, _ in temp_paths:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+        self.written += written
+        return written
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Precompiled Page Template
+โครงหน้า HTML ที่ถูกแยกเป็นส่วนคงที่ล่วงหน้า (ครั้งเดียวต่อ process) แล้วประกอบกับเนื้อหาแต่ละหน้า
+"""
+
+import hashlib
+import html
+import os
+import re
+from functools import lru_cache
+
+# ตำแหน่งที่ใส่ค่าได้ในไฟล์ template: {{ title }}, {{ head }}, {{ body }}
+TEMPLATE_SLOTS = ('title', 'head', 'body')
+SLOT_PATTERN = re.compile(r'\{\{\s*(' + '|'.join(TEMPLATE_SLOTS) + r')\s*\}\}')
+
+# จำนวน template ที่ compile แล้วสูงสุดที่จำไว้ (แต่ละไฟล์และแต่ละครั้งที่แก้ไขเป็นคนละรายการ)
+TEMPLATE_CACHE_SIZE = 16
+
+DEFAULT_TEMPLATE = """\
+<!DOCTYPE html>
+<html lang="th">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ title }}</title>
+    {{ head }}
+</head>
+<body>
+    {{ body }}
+</body>
+</html>
+"""
+
+
+class PageTemplate:
+    """Template ที่แยกส่วนคงที่เป็น chunks ไว้ล่วงหน้า ทั้งแบบ str และ bytes
+
+    การ render แต่ละครั้งจึงเป็นเพียงการต่อ chunks กับค่าของ title/head/body
+    โดยไม่ต้อง format ส่วนคงที่ใหม่
+    """
+
+    def __init__(self, text: str, name: str = "<default>"):
+        self.name = name
+        self.version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:12]
+
+        parts = SLOT_PATTERN.split(text)
+        self._static = parts[0::2]
+        self._slots = parts[1::2]
+        if self._slots.count('body') != 1:
+            raise Exception(f"Template {name} must contain exactly one {{{{ body }}}} placeholder")
+        self._static_bytes = [chunk.encode('utf-8') for chunk in self._static]
+
+    def _values(self, title: str, head: str, body: str) -> dict:
+        """ค่าของแต่ละ slot (title ถูก escape เสมอ)"""
+        return {'title': html.escape(title), 'head': head, 'body': body}
+
+    def render(self, title: str, head: str, body: str) -> str:
+        """ประกอบหน้า HTML เป็น str"""
+        values = self._values(title, head, body)
+        chunks = [self._static[0]]
+        for slot, static in zip(self._slots, self._static[1:]):
+            chunks.append(values[slot])
+            chunks.append(static)
+        return ''.join(chunks)
+
+    def render_bytes(self, title: str, head: str, body: str) -> bytes:
+        """ประกอบหน้า HTML เป็น UTF-8 bytes โดยใช้ส่วนคงที่ที่ encode ไว้แล้ว"""
+        values = self._values(title, head, body)
+        chunks = [self._static_bytes[0]]
+        for slot, static in zip(self._slots, self._static_bytes[1:]):
+            chunks.append(values[slot].encode('utf-8'))
+            chunks.append(static)
+        return b''.join(chunks)
+
+    def split_bytes(self, title: str, head: str):
+        """คืนค่า (ส่วนก่อน body, ส่วนหลัง body) เป็น bytes สำหรับเขียน body แบบ streaming"""
+        values = self._values(title, head, '')
+        before = [self._static_bytes[0]]
+        after = []
+        target = before
+        for slot, static in zip(self._slots, self._static_bytes[1:]):
+            if slot == 'body':
+                target = after
+            else:
+                target.append(values[slot].encode('utf-8'))
+            target.append(static)
+        return b''.join(before), b''.join(after)
+
+
+@lru_cache(maxsize=TEMPLATE_CACHE_SIZE)
+def _compile_template(path: str, mtime_ns: int) -> PageTemplate:
+    """อ่านและ compile ไฟล์ template (cache ตาม path และเวลาแก้ไข)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+    except Exception as e:
+        raise Exception(f"Error reading template {path}: {e}")
+    return PageTemplate(text, path)
+
+
+@lru_cache(maxsize=None)
+def _default_template() -> PageTemplate:
+    """Template เริ่มต้นของโปรแกรม"""
+    return PageTemplate(DEFAULT_TEMPLATE)
+
+
+def load_template(path: str = None) -> PageTemplate:
+    """โหลด template จากไฟล์ (หรือ template เริ่มต้นเมื่อไม่ระบุ) ครั้งเดียวต่อ process"""
+    if not path:
+        return _default_template()
+    path = os.path.abspath(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError as e:
+        raise Exception(f"Error reading template {path}: {e}")
+    return _compile_template(path, mtime_ns)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Conversion Profiling
+จับเวลาแต่ละขั้นตอนของการแปลง (อ่านไฟล์, Mermaid, Markdown, template, เขียนไฟล์) ทั้งเวลาจริงและเวลา CPU
+พร้อมขนาดข้อมูลเข้า/ออกต่อเอกสาร แล้วรวมเป็นรายงานของทั้ง batch (ตารางหรือ JSON)
+"""
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# ขั้นตอนของการแปลงตามลำดับในรายงาน
+STAGES = ('read', 'mermaid', 'markdown', 'template', 'write')
+
+# จำนวนเอกสารที่ช้าที่สุดที่แสดงในรายงาน
+SLOWEST_DOCUMENTS = 10
+
+
+def text_bytes(value) -> int:
+    """ขนาดเป็น bytes ของ str (UTF-8) หรือ bytes"""
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    return len(value)
+
+
+def profile_stage(profile, name: str):
+    """with block ที่จับเวลาขั้นตอน name เมื่อมี profile (ไม่มีค่าใช้จ่ายเมื่อ profile เป็น None)"""
+    return profile.stage(name) if profile is not None else nullcontext()
+
+
+class DocumentProfile:
+    """เวลาและขนาดข้อมูลของแต่ละขั้นตอนสำหรับเอกสารเดียว
+
+    stages: {ขั้นตอน: [เวลาจริง, เวลา CPU, bytes เข้า, bytes ออก]} (วินาที)
+    ขั้นตอนที่ถูกเรียกหลายครั้ง (เช่น ทีละ chunk ใน streaming) จะถูกรวมกัน
+    เวลา CPU ใช้ time.thread_time จึงไม่นับงานของ thread อื่นที่ทำพร้อมกัน
+    """
+
+    def __init__(self, path: str = None):
+        self.path = path
+        self.stages = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """จับเวลาขั้นตอน name ของโค้ดใน with block"""
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def add(self, name: str, wall: float = 0.0, cpu: float = 0.0,
+            bytes_in: int = 0, bytes_out: int = 0):
+        totals = self.stages.setdefault(name, [0.0, 0.0, 0, 0])
+        totals[0] += wall
+        totals[1] += cpu
+        totals[2] += bytes_in
+        totals[3] += bytes_out
+
+    def add_bytes(self, name: str, value_in, value_out):
+        """บันทึกขนาดข้อมูลเข้า/ออกของขั้นตอน (คำนวณนอกช่วงที่จับเวลา)"""
+        self.add(name, bytes_in=text_bytes(value_in), bytes_out=text_bytes(value_out))
+
+    def to_dict(self) -> dict:
+        """ข้อมูลสำหรับส่งข้าม process และรวมใน ProfileReport"""
+        return {'path': self.path, 'stages': self.stages}
+
+
+class ProfileReport:
+    """รวมผล DocumentProfile ของหลายเอกสารเป็นสรุปต่อขั้นตอนและรายการเอกสารที่ช้าที่สุด"""
+
+    def __init__(self):
+        self.documents = 0
+        self.stages = {}
+        self.slowest = []  # (เวลาจริงรวม, path, stages)
+        self.start = time.perf_counter()
+
+    def add(self, profile: dict):
+        """เพิ่มผลของเอกสารหนึ่งไฟล์ (DocumentProfile.to_dict())"""
+        self.documents += 1
+        wall = 0.0
+        for name, values in profile['stages'].items():
+            totals = self.stages.setdefault(name, [0, 0.0, 0.0, 0, 0])
+            totals[0] += 1
+            for i, value in enumerate(values, 1):
+                totals[i] += value
+            wall += values[0]
+        self.slowest.append((wall, profile['path'], profile['stages']))
+        if len(self.slowest) > SLOWEST_DOCUMENTS * 4:
+            self._trim()
+
+    def _trim(self):
+        self.slowest.sort(key=lambda item: item[0], reverse=True)
+        del self.slowest[SLOWEST_DOCUMENTS:]
+
+    def _stage_names(self) -> list:
+        return [name for name in STAGES if name in self.stages] + \
+            sorted(name for name in self.stages if name not in STAGES)
+
+    def to_dict(self) -> dict:
+        """รายงานแบบ dict (เวลาเป็นมิลลิวินาที)"""
+        self._trim()
+        stages = {}
+        for name in self._stage_names():
+            count, wall, cpu, bytes_in, bytes_out = self.stages[name]
+            stages[name] = {
+                'documents': count,
+                'wall_ms': round(wall * 1000, 3),
+                'cpu_ms': round(cpu * 1000, 3),
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+            }
+        return {
+            'documents': self.documents,
+            'elapsed_ms': round((time.perf_counter() - self.start) * 1000, 3),
+            'stages': stages,
+            'slowest': [
+                {
+                    'path': path,
+                    'wall_ms': round(wall * 1000, 3),
+                    'stages_ms': {name: round(values[0] * 1000, 3)
+                                  for name, values in document_stages.items()},
+                }
+                for wall, path, document_stages in self.slowest
+            ],
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2, ensure_ascii=False)
+
+    def format_table(self) -> str:
+        """รายงานแบบตารางสำหรับแสดงใน terminal"""
+        report = self.to_dict()
+        total_wall = sum(stage['wall_ms'] for stage in report['stages'].values())
+        lines = [
+            f"Profile: {report['documents']} document(s) in {report['elapsed_ms'] / 1000:.2f}s",
+            f"{'stage':<10} {'wall ms':>10} {'cpu ms':>10} {'wall %':>7} "
+            f"{'in KB':>10} {'out KB':>10} {'MB/s':>8}",
+        ]
+        for name, stage in report['stages'].items():
+            share = stage['wall_ms'] / total_wall * 100 if total_wall else 0.0
+            rate = stage['bytes_in'] / 1000 / stage['wall_ms'] if stage['wall_ms'] else 0.0
+            lines.append(f"{name:<10} {stage['wall_ms']:>10.1f} {stage['cpu_ms']:>10.1f} {share:>6.1f}% "
+                         f"{stage['bytes_in'] / 1024:>10.1f} {stage['bytes_out'] / 1024:>10.1f} {rate:>8.1f}")
+        total_cpu = sum(stage['cpu_ms'] for stage in report['stages'].values())
+        lines.append(f"{'total':<10} {total_wall:>10.1f} {total_cpu:>10.1f}")
+        if report['slowest']:
+            lines.append("Slowest documents:")
+            for document in report['slowest']:
+                slowest_stage = max(document['stages_ms'].items(), key=lambda item: item[1])
+                lines.append(f"  {document['wall_ms']:>9.1f} ms  {document['path']} "
+                             f"({slowest_stage[0]} {slowest_stage[1]:.1f} ms)")
+        return '\n'.join(lines)
+
+    def format(self, report_format: str = 'table') -> str:
+        return self.to_json() if report_format == 'json' else self.format_table()
+
+    def write(self, report_format: str = 'table', output_path: str = None):
+        """แสดงรายงาน หรือบันทึกลงไฟล์ output_path"""
+        text = self.format(report_format)
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                f.write(text + '\n')
+            print(f"Profile report written to {output_path}")
+        else:
+            print(text)
+
+
+@contextmanager
+def cprofile_to(path: str):
+    """รันโค้ดใน with block ภายใต้ cProfile และบันทึกสถิติลงไฟล์ path (อ่านด้วย pstats/snakeviz)"""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+
+
+def start_worker_cprofile(path: str):
+    """เริ่ม cProfile ใน worker process และบันทึกลง path.<pid> เมื่อ process ปิดตัว"""
+    import cProfile
+    import multiprocessing.util
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+
+    def dump():
+        profiler.disable()
+        profiler.dump_stats(f"{path}.{os.getpid()}")
+
+    multiprocessing.util.Finalize(None, dump, exitpriority=20)
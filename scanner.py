@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Parallel Directory Scanner
+สแกนหาไฟล์ Markdown ในโฟลเดอร์ด้วย os.scandir หลาย thread พร้อมกัน (ใช้ stat จาก DirEntry ครั้งเดียว)
+รองรับ include/exclude globs, ไฟล์ .md2htmlignore, การสแกนเบื้องหลังที่ส่งผลลัพธ์เป็นชุด ๆ
+และ index บนดิสก์ที่ทำให้การสแกนครั้งถัดไปอ่านใหม่เฉพาะโฟลเดอร์ที่เปลี่ยน
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import namedtuple
+
+DEFAULT_INCLUDE = ('*.md',)
+IGNORE_FILE_NAME = '.md2htmlignore'
+SCAN_INDEX_VERSION = 1
+SCAN_BATCH_SIZE = 500
+SCAN_WORKERS = 8
+
+# path: path เต็มของไฟล์, name: ชื่อไฟล์, size: ขนาด (bytes), mtime: เวลาแก้ไข (วินาที)
+ScannedFile = namedtuple('ScannedFile', ['path', 'name', 'size', 'mtime'])
+
+
+def _compile_patterns(patterns) -> list:
+    """แปลง glob patterns เป็น (ใช้ path แบบ relative หรือไม่, เฉพาะโฟลเดอร์หรือไม่, regex หรือนามสกุล)
+
+    pattern ที่มี / จะเทียบกับ path แบบ relative จากโฟลเดอร์ที่สแกน นอกนั้นเทียบกับชื่อ
+    pattern ที่ลงท้ายด้วย / ใช้กับโฟลเดอร์เท่านั้น (แบบ .gitignore)
+    """
+    compiled = []
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith('#'):
+            continue
+        directory_only = pattern.endswith('/')
+        pattern = pattern.strip('/')
+        if pattern.startswith('*') and not any(ch in pattern[1:] for ch in '*?[/'):
+            matcher = pattern[1:].lower()
+        else:
+            matcher = re.compile(fnmatch.translate(pattern), re.IGNORECASE)
+        compiled.append(('/' in pattern, directory_only, matcher))
+    return compiled
+
+
+def _matches(compiled: list, relative_path: str, name: str, is_directory: bool) -> bool:
+    for uses_path, directory_only, matcher in compiled:
+        if directory_only and not is_directory:
+            continue
+        if isinstance(matcher, str):
+            # pattern แบบ *.นามสกุล: เทียบท้ายชื่อโดยตรง เร็วกว่า regex
+            if (relative_path if uses_path else name).lower().endswith(matcher):
+                return True
+        elif matcher.match(relative_path if uses_path else name):
+            return True
+    return False
+
+
+def read_ignore_file(root: str) -> list:
+    """อ่าน exclude patterns จาก .md2htmlignore ในโฟลเดอร์ที่สแกน (บรรทัดละหนึ่ง pattern)"""
+    try:
+        with open(os.path.join(root, IGNORE_FILE_NAME), 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+
+def user_cache_dir() -> str:
+    """โฟลเดอร์ cache ของ md2html ในเครื่องของผู้ใช้"""
+    cache_home = (os.environ.get('XDG_CACHE_HOME') or os.environ.get('LOCALAPPDATA')
+                  or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(cache_home, 'md2html')
+
+
+def default_index_path(root: str) -> str:
+    """ตำแหน่งของ scan index ของโฟลเดอร์นี้ใน cache ของผู้ใช้ (ไม่เขียนลงโฟลเดอร์ของผู้ใช้)"""
+    key = hashlib.sha256(os.path.abspath(root).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(user_cache_dir(), f"scan-{key}.json")
+
+
+class DirectoryScanner:
+    """สแกนไฟล์ในโฟลเดอร์แบบขนาน พร้อม index ที่เก็บรายการไฟล์ของแต่ละโฟลเดอร์ตาม mtime ของโฟลเดอร์
+
+    โฟลเดอร์ที่ mtime ไม่เปลี่ยน (ไม่มีไฟล์ถูกเพิ่ม/ลบ/เปลี่ยนชื่อ) จะใช้รายการจาก index โดยไม่ต้อง stat ไฟล์ใหม่
+    ขนาดและเวลาแก้ไขของไฟล์ที่ถูกแก้ไขในที่เดิมจึงอาจเป็นค่าจากการสแกนครั้งก่อน
+    (การแปลงไม่ได้รับผลกระทบ เพราะ build manifest ตรวจ stat ของไฟล์เองอีกครั้ง)
+    """
+
+    def __init__(self, root: str, include=DEFAULT_INCLUDE, exclude=(), use_ignore_file: bool = True,
+                 index_path: str = None, workers: int = SCAN_WORKERS):
+        self.root = os.path.abspath(root)
+        # path ของไฟล์ที่คืนให้ผู้เรียกใช้ root ตามที่ระบุมา (relative ได้ เหมือน os.walk)
+        self._base = root
+        self.include = tuple(include or DEFAULT_INCLUDE)
+        self.exclude = tuple(exclude or ())
+        if use_ignore_file:
+            self.exclude += tuple(read_ignore_file(self.root))
+        self._include = _compile_patterns(self.include)
+        self._exclude = _compile_patterns(self.exclude)
+        # include ที่เป็นนามสกุลล้วน (เช่น *.md) ตรวจด้วย str.endswith ครั้งเดียว
+        self._include_suffixes = None
+        if all(isinstance(matcher, str) and not uses_path and not directory_only
+               for uses_path, directory_only, matcher in self._include):
+            self._include_suffixes = tuple(matcher for _, _, matcher in self._include)
+        self.index_path = index_path
+        self.workers = max(1, workers)
+        # จำนวนโฟลเดอร์ที่อ่านใหม่และที่ใช้จาก index ในการสแกนครั้งล่าสุด
+        self.directories_scanned = 0
+        self.directories_reused = 0
+
+    def _settings_key(self) -> str:
+        return hashlib.sha256(repr((self.include, self.exclude)).encode('utf-8')).hexdigest()[:16]
+
+    def _load_index(self) -> dict:
+        if not self.index_path:
+            return {}
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if (data.get('version') != SCAN_INDEX_VERSION or data.get('root') != self.root
+                or data.get('settings') != self._settings_key()):
+            return {}
+        return data.get('directories', {})
+
+    def _save_index(self, directories: dict):
+        directory = os.path.dirname(self.index_path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                # json.dumps แล้วเขียนครั้งเดียวเร็วกว่า json.dump ที่เขียนทีละส่วนหลายเท่า
+                f.write(json.dumps({
+                    'version': SCAN_INDEX_VERSION,
+                    'root': self.root,
+                    'settings': self._settings_key(),
+                    'directories': directories,
+                }))
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            print(f"Warning: Cannot write scan index: {e}")
+
+    def accepts(self, path: str) -> bool:
+        """ตรวจสอบว่าไฟล์ใต้ root ผ่าน include/exclude หรือไม่ (เช่น สำหรับเหตุการณ์ของ watch mode)"""
+        relative = os.path.relpath(os.path.abspath(path), self.root).replace(os.sep, '/')
+        if relative.startswith('../'):
+            return False
+        return self.accepts_relative(relative)
+
+    def accepts_relative(self, relative: str) -> bool:
+        """ตรวจสอบ path แบบ relative กับ root (คั่นด้วย /) กับ include/exclude เช่น member ของ archive"""
+        parts = relative.split('/')
+        for depth in range(1, len(parts)):
+            if _matches(self._exclude, '/'.join(parts[:depth]), parts[depth - 1], True):
+                return False
+        name = parts[-1]
+        return (_matches(self._include, relative, name, False)
+                and not _matches(self._exclude, relative, name, False))
+
+    def _scan_directory(self, relative: str, index: dict):
+        """อ่านโฟลเดอร์เดียว คืนค่า (relative path, ข้อมูลของโฟลเดอร์, ใช้จาก index หรือไม่)"""
+        path = os.path.join(self.root, relative) if relative else self.root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return relative, None, False
+
+        cached = index.get(relative)
+        if cached is not None and cached['mtime_ns'] == mtime_ns:
+            return relative, cached, True
+
+        files = []
+        dirs = []
+        include, exclude, suffixes = self._include, self._exclude, self._include_suffixes
+        prefix = relative + '/' if relative else ''
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not exclude or not _matches(exclude, prefix + name, name, True):
+                                dirs.append(name)
+                            continue
+                        if suffixes is not None:
+                            if not name.lower().endswith(suffixes):
+                                continue
+                        elif not _matches(include, prefix + name, name, False):
+                            continue
+                        if (exclude and _matches(exclude, prefix + name, name, False)) or not entry.is_file():
+                            continue
+                        # stat ของ DirEntry ถูก cache ไว้ จึงได้ทั้งขนาดและเวลาแก้ไขจากการเรียกครั้งเดียว
+                        stat = entry.stat()
+                        files.append([name, stat.st_size, stat.st_mtime_ns])
+                    except OSError:
+                        continue
+        except OSError:
+            return relative, None, False
+        return relative, {'mtime_ns': mtime_ns, 'files': files, 'dirs': dirs}, False
+
+    def scan(self, on_batch=None, batch_size: int = SCAN_BATCH_SIZE, cancel_event=None) -> list:
+        """สแกนทั้งโฟลเดอร์ คืนรายการ ScannedFile เรียงตาม path
+
+        on_batch(list) ถูกเรียกทุกครั้งที่พบไฟล์ครบ batch_size ไฟล์ (ตามลำดับที่พบ)
+        ถ้า cancel_event ถูก set จะหยุดและคืนรายการเท่าที่พบ (ไม่บันทึก index)
+        """
+        # import เฉพาะเมื่อสแกนจริง (concurrent.futures โหลด logging ซึ่งทำให้ทุกคำสั่งเริ่มช้าลง)
+        from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+        index = self._load_index()
+        directories = {}
+        found = []
+        batch = []
+        self.directories_scanned = 0
+        self.directories_reused = 0
+        cancelled = False
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='md2html-scan') as executor:
+            pending = {executor.submit(self._scan_directory, '', index)}
+            while pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    for future in pending:
+                        future.cancel()
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    relative, info, reused = future.result()
+                    if info is None:
+                        continue
+                    directories[relative] = info
+                    if reused:
+                        self.directories_reused += 1
+                    else:
+                        self.directories_scanned += 1
+                    prefix = os.path.join(self._base, *relative.split('/')) if relative else self._base
+                    if not prefix.endswith(os.sep):
+                        prefix += os.sep
+                    for name in info['dirs']:
+                        child = f"{relative}/{name}" if relative else name
+                        pending.add(executor.submit(self._scan_directory, child, index))
+                    # ต่อ string โดยตรง (os.path.join ต่อไฟล์ช้าเมื่อมีหลายหมื่นไฟล์)
+                    batch.extend(ScannedFile(prefix + name, name, size, mtime_ns / 1e9)
+                                 for name, size, mtime_ns in info['files'])
+                    if on_batch and len(batch) >= batch_size:
+                        on_batch(batch)
+                        found.extend(batch)
+                        batch = []
+
+        if batch and on_batch and not cancelled:
+            on_batch(batch)
+        found.extend(batch)
+        if self.index_path and not cancelled and (self.directories_scanned or len(directories) != len(index)):
+            self._save_index(directories)
+        found.sort(key=lambda item: item.path)
+        return found
+
+    def start(self, on_batch=None, on_done=None, batch_size: int = SCAN_BATCH_SIZE):
+        """สแกนใน background thread คืนค่า ScanJob สำหรับยกเลิก
+
+        on_batch(list) และ on_done(รายการทั้งหมด หรือ None, error) ถูกเรียกจาก background thread
+        (GUI ต้องส่งต่อเข้า UI thread เอง เช่น root.after)
+        """
+        job = ScanJob()
+
+        def run():
+            try:
+                result = self.scan(on_batch, batch_size, job.cancel_event)
+            except Exception as e:
+                if on_done:
+                    on_done(None, e)
+                return
+            if on_done and not job.cancelled:
+                on_done(result, None)
+
+        job.thread = threading.Thread(target=run, daemon=True)
+        job.thread.start()
+        return job
+
+
+class ScanJob:
+    """การสแกนที่ทำงานอยู่เบื้องหลัง"""
+
+    def __init__(self):
+        self.cancel_event = threading.Event()
+        self.thread = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def join(self, timeout: float = None):
+        if self.thread is not None:
+            self.thread.join(timeout)
@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Full-text Search Index
+เก็บข้อความของแต่ละหัวข้อจาก tree ของ Markdown ระหว่างแปลง ตัดคำ (รองรับภาษาไทย) ใน worker
+แล้วรวมเป็น inverted index ที่แบ่งเป็น shards ขนาดจำกัด สำหรับค้นหาในเบราว์เซอร์โดยไม่ต้องมีเซิร์ฟเวอร์
+"""
+
+import gzip
+import hashlib
+import html
+import json
+import math
+import os
+import posixpath
+import re
+from collections import Counter
+from functools import lru_cache
+
+from output_writer import OutputBatch, write_bytes_atomic
+
+# โฟลเดอร์ของ index ใน output และ script ค้นหา (index อยู่ในบรรทัดแรกของ script)
+SEARCH_DIR = 'search'
+SEARCH_SCRIPT_NAME = 'md2html-search.js'
+SEARCH_META_PREFIX = 'window.MD2HTML_SEARCH_META = '
+
+# ข้อมูลของหน้าที่ตัดคำแล้ว สำหรับ incremental build (หน้าที่ไม่ได้แปลงใหม่ไม่ต้องตัดคำซ้ำ)
+SEARCH_CACHE_NAME = '.md2html-search.json.gz'
+# เปลี่ยนเมื่อวิธีตัดคำเปลี่ยน (cache ที่ตัดคำด้วยวิธีเก่าจะถูกตัดคำใหม่ทั้งหมด)
+SEARCH_CACHE_VERSION = 2
+
+# ขนาดโดยประมาณของ shard ของคำ (จำนวน shards เพิ่มเป็นเท่าตัวตามขนาดของ index)
+SHARD_TARGET_BYTES = 64 * 1024
+
+# จำนวนหัวข้อ (เอกสารของ index) ต่อ shard ของรายการเอกสาร
+DOCS_PER_SHARD = 1000
+
+# คำที่พบในหัวข้อมากกว่าสัดส่วนนี้ถือเป็น stopword (ใช้เมื่อมีหัวข้ออย่างน้อย STOPWORD_MIN_DOCS)
+STOPWORD_RATIO = 0.5
+STOPWORD_MIN_DOCS = 100
+
+# อักษรไทยติดกัน หรือตัวอักษร/ตัวเลขของภาษาอื่นติดกัน
+THAI_RUN = '\u0e00-\u0e7f'
+TOKEN_PATTERN = re.compile(f'[{THAI_RUN}]+|[^\\W_{THAI_RUN}]+')
+THAI_PATTERN = re.compile(f'[{THAI_RUN}]')
+
+# ค้นหาในเบราว์เซอร์: ตัดคำแบบเดียวกับ tokenize() โหลด shards ตามต้องการ (ผ่าน <script> จึงใช้ได้กับ file://)
+# และแสดงผลในกล่อง .site-search ของหน้า (ใช้ทุกคำและ bigram ในคำค้น เรียงตาม tf-idf)
+# ภาษาไทยค้นด้วย bigram เสมอ ส่วนคำจาก Intl.Segmenter (ตัดคำไม่ตรงกับ pythainlp ทุกครั้ง) ใช้เพิ่มคะแนนเท่านั้น
+SEARCH_SCRIPT = """\
+(function () {
+  var meta = window.MD2HTML_SEARCH_META;
+  var base = document.currentScript.src.replace(/[^\\/]*$/, '');
+  var loaded = {}, waiting = {};
+  window.MD2HTML_SEARCH = {
+    load: function (name, data) {
+      loaded[name] = data;
+      (waiting[name] || []).forEach(function (callback) { callback(); });
+      delete waiting[name];
+    }
+  };
+  function need(names, callback) {
+    var missing = names.filter(function (name) { return !(name in loaded); });
+    var pending = missing.length;
+    if (!pending) return callback();
+    missing.forEach(function (name) {
+      var done = function () { if (--pending === 0) callback(); };
+      if (waiting[name]) return waiting[name].push(done);
+      waiting[name] = [done];
+      var script = document.createElement('script');
+      script.src = base + name + '.js?v=' + meta.version;
+      document.head.appendChild(script);
+    });
+  }
+  function termShard(term) {
+    var h = 0x811c9dc5;
+    for (var i = 0; i < term.length; i++) {
+      h ^= term.charCodeAt(i);
+      h = Math.imul(h, 0x01000193) >>> 0;
+    }
+    return 'terms-' + (h & (meta.shards - 1));
+  }
+  var segmenter = meta.thai === 'words' && window.Intl && Intl.Segmenter
+    ? new Intl.Segmenter('th', {granularity: 'word'}) : null;
+  function unique(terms) {
+    return terms.filter(function (term, i) { return terms.indexOf(term) === i && meta.stop.indexOf(term) < 0; });
+  }
+  function tokenize(text) {
+    var terms = [], words = [];
+    (text.toLowerCase().match(/[\\u0e00-\\u0e7f]+|(?:(?![\\u0e00-\\u0e7f])[\\p{L}\\p{N}])+/gu) || []).forEach(function (run) {
+      if (!/[\\u0e00-\\u0e7f]/.test(run)) {
+        if (run.length > 1 || /^\\d$/.test(run)) terms.push(run);
+      } else if (run.length === 1) {
+        terms.push(run);
+      } else {
+        for (var i = 0; i + 1 < run.length; i++) terms.push(run.slice(i, i + 2));
+        if (segmenter) {
+          for (var part of segmenter.segment(run)) {
+            if (part.isWordLike && part.segment.length > 2) words.push(part.segment);
+          }
+        }
+      }
+    });
+    return {terms: unique(terms), words: unique(words)};
+  }
+  function search(query, limit, callback) {
+    var tokens = tokenize(query), terms = tokens.terms;
+    if (!terms.length) return callback([]);
+    need(terms.concat(tokens.words).map(termShard), function () {
+      var scores = null;
+      function score(term, required) {
+        var postings = loaded[termShard(term)][term] || [];
+        var idf = Math.log(1 + meta.docs / Math.max(1, postings.length / 2));
+        var next = required ? {} : scores, doc = 0;
+        for (var i = 0; i < postings.length; i += 2) {
+          doc += postings[i];
+          if (scores === null || doc in scores) next[doc] = (scores ? scores[doc] : 0) + postings[i + 1] * idf;
+        }
+        scores = next;
+      }
+      terms.forEach(function (term) { score(term, true); });
+      tokens.words.forEach(function (word) { score(word, false); });
+      var docs = Object.keys(scores).sort(function (a, b) { return scores[b] - scores[a]; }).slice(0, limit);
+      var shards = docs.map(function (doc) { return 'docs-' + Math.floor(doc / meta.docsPerShard); });
+      need(shards, function () {
+        callback(docs.map(function (doc) {
+          var entry = loaded['docs-' + Math.floor(doc / meta.docsPerShard)][doc % meta.docsPerShard];
+          return {url: entry[0], title: entry[1], section: entry[2]};
+        }));
+      });
+    });
+  }
+  window.MD2HTML_SEARCH.search = search;
+  var box = document.querySelector('.site-search');
+  if (!box) return;
+  var input = box.querySelector('input');
+  var list = box.querySelector('ul');
+  var root = box.getAttribute('data-root');
+  var timer = null;
+  input.addEventListener('input', function () {
+    clearTimeout(timer);
+    timer = setTimeout(function () {
+      search(input.value, 20, function (results) {
+        list.innerHTML = '';
+        results.forEach(function (result) {
+          var item = document.createElement('li');
+          var link = document.createElement('a');
+          link.href = root + result.url;
+          link.textContent = result.section && result.section !== result.title
+            ? result.title + ' \\u203a ' + result.section : result.title;
+          item.appendChild(link);
+          list.appendChild(item);
+        });
+      });
+    }, 150);
+  });
+})();
+"""
+
+
+@lru_cache(maxsize=1)
+def thai_segmenter():
+    """ฟังก์ชันตัดคำภาษาไทยด้วย pythainlp (newmm) หรือ None ถ้าไม่ได้ติดตั้ง (ใช้ bigram แทน)"""
+    try:
+        from pythainlp.tokenize import word_tokenize
+    except ImportError:
+        return None
+
+    def segment(text: str) -> list:
+        return [word for word in word_tokenize(text, engine='newmm', keep_whitespace=False) if word.strip()]
+
+    return segment
+
+
+def thai_mode() -> str:
+    """วิธีตัดคำภาษาไทยของ index ('words' = bigram และคำ, 'bigram' = bigram อย่างเดียว)"""
+    return 'words' if thai_segmenter() is not None else 'bigram'
+
+
+def tokenize(text: str) -> list:
+    """ตัดข้อความเป็นคำสำหรับ index (ตัวพิมพ์เล็ก, ภาษาไทยเป็น bigram ของตัวอักษร และคำที่ตัดได้ถ้ามี pythainlp)"""
+    runs = TOKEN_PATTERN.findall(text.lower())
+    if not THAI_PATTERN.search(text):
+        return [run for run in runs if len(run) > 1 or run.isdigit()]
+    segment = thai_segmenter()
+    terms = []
+    for run in runs:
+        if not ('\u0e00' <= run[0] <= '\u0e7f'):
+            if len(run) > 1 or run.isdigit():
+                terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+            if segment is not None:
+                # คำที่ยาวกว่า bigram สำหรับเพิ่มคะแนนเมื่อคำค้นตัดได้คำเดียวกัน
+                terms.extend(word for word in segment(run) if len(word) > 2)
+    return terms
+
+
+def term_counts(text: str) -> dict:
+    """จำนวนครั้งที่แต่ละคำปรากฏในข้อความ"""
+    return dict(Counter(tokenize(text)))
+
+
+def index_sections(sections: list) -> list:
+    """แปลงข้อความของแต่ละหัวข้อ [[anchor, ชื่อหัวข้อ, [ข้อความ, ...]]] เป็น [[anchor, ชื่อหัวข้อ, {คำ: จำนวน}]]"""
+    return [[anchor, title, term_counts(title + '\n' + '\n'.join(texts))]
+            for anchor, title, texts in sections if texts or title]
+
+
+def term_shard(term: str, shards: int) -> int:
+    """shard ของคำ (FNV-1a ของ UTF-16 code units ตรงกับ termShard() ในสคริปต์ค้นหา)"""
+    value = 0x811c9dc5
+    data = term.encode('utf-16-le')
+    for i in range(0, len(data), 2):
+        value ^= data[i] | (data[i + 1] << 8)
+        value = (value * 0x01000193) & 0xffffffff
+    return value & (shards - 1)
+
+
+def search_box(search_href: str) -> str:
+    """กล่องค้นหาที่ต้นหน้า (data-root คือ URL relative จากหน้าไปยัง root ของ output)"""
+    root = posixpath.dirname(posixpath.dirname(search_href))
+    root = root + '/' if root else ''
+    return (f'<div class="site-search" data-root="{html.escape(root)}">'
+            f'<input type="search" placeholder="Search / ค้นหา"><ul></ul></div>\n')
+
+
+def search_script(search_href: str) -> str:
+    """<script> ของการค้นหา ('' ถ้าหน้าไม่มีกล่องค้นหา)"""
+    if not search_href:
+        return ''
+    return f'<script src="{html.escape(search_href)}"></script>\n'
+
+
+class SearchIndexBuilder:
+    """รวมคำของทุกหน้าเป็น inverted index แบบ shards และเขียนลง output_dir/search
+
+    terms-<k>.js: {คำ: [ระยะห่างของ doc id, จำนวนครั้ง, ...]} โดย k มาจาก hash ของคำ
+    docs-<k>.js: [[url, ชื่อหน้า, ชื่อหัวข้อ], ...] ครั้งละ DOCS_PER_SHARD เอกสาร
+    md2html-search.js: ข้อมูลของ index (จำนวน shards, stopwords, วิธีตัดคำไทย) และสคริปต์ค้นหา
+    """
+
+    def __init__(self, output_dir: str, replace: bool = False):
+        self.output_dir = output_dir
+        self.search_dir = os.path.join(output_dir, SEARCH_DIR)
+        self.cache_path = os.path.join(output_dir, SEARCH_CACHE_NAME)
+        self.pages = {} if replace else self._load_cache()
+
+    def _load_cache(self) -> dict:
+        """ข้อมูลของหน้าจากการ build ครั้งก่อน ({} ถ้าไม่มี หรือตัดคำคนละวิธี/คนละรุ่น)"""
+        try:
+            with gzip.open(self.cache_path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == SEARCH_CACHE_VERSION and data.get('thai') == thai_mode():
+                return data['pages']
+        except (OSError, ValueError, KeyError):
+            pass
+        return {}
+
+    @property
+    def script_path(self) -> str:
+        return os.path.join(self.search_dir, SEARCH_SCRIPT_NAME)
+
+    def add(self, page_index: dict):
+        """เพิ่มหรือแทนที่หัวข้อของหน้าจากผลการแปลง (ชื่อหน้าคือหัวข้อระดับ 1 แรก ถ้ามี)"""
+        title = next((html.unescape(token['name']) for token in page_index['headings'] if token['level'] == 1),
+                     page_index['title'])
+        self.pages[page_index['page']] = {'title': title, 'sections': page_index['sections']}
+
+    def retain(self, pages):
+        """ลบหน้าที่ไม่อยู่ใน pages แล้ว"""
+        keep = set(pages)
+        for page in [page for page in self.pages if page not in keep]:
+            del self.pages[page]
+
+    def _build(self):
+        """คืนค่า (รายการเอกสาร, {คำ: [(doc id, จำนวนครั้ง), ...]})"""
+        docs = []
+        postings = {}
+        for page in sorted(self.pages):
+            entry = self.pages[page]
+            for anchor, section, counts in entry['sections']:
+                doc = len(docs)
+                docs.append([f"{page}#{anchor}" if anchor else page, entry['title'], section])
+                for term, count in counts.items():
+                    postings.setdefault(term, []).append((doc, count))
+        return docs, postings
+
+    def files(self) -> dict:
+        """เนื้อหาของทุกไฟล์ใน index {ชื่อไฟล์ใน search/: ข้อความ}"""
+        docs, postings = self._build()
+        stopwords = []
+        if len(docs) >= STOPWORD_MIN_DOCS:
+            limit = len(docs) * STOPWORD_RATIO
+            stopwords = sorted(term for term, entries in postings.items() if len(entries) > limit)
+            for term in stopwords:
+                del postings[term]
+
+        size = sum(len(term) + 6 * len(entries) for term, entries in postings.items())
+        shards = 1
+        while size / shards > SHARD_TARGET_BYTES:
+            shards *= 2
+        terms = [{} for _ in range(shards)]
+        for term in sorted(postings):
+            encoded = []
+            previous = 0
+            for doc, count in postings[term]:
+                encoded += [doc - previous, count]
+                previous = doc
+            terms[term_shard(term, shards)][term] = encoded
+
+        files = {}
+        for number, shard in enumerate(terms):
+            files[f'terms-{number}.js'] = self._shard_content(f'terms-{number}', shard)
+        for number in range(0, max(1, math.ceil(len(docs) / DOCS_PER_SHARD))):
+            chunk = docs[number * DOCS_PER_SHARD:(number + 1) * DOCS_PER_SHARD]
+            files[f'docs-{number}.js'] = self._shard_content(f'docs-{number}', chunk)
+
+        version = hashlib.sha256(''.join(files[name] for name in sorted(files)).encode('utf-8')).hexdigest()[:12]
+        meta = {
+            'version': version,
+            'shards': shards,
+            'docs': len(docs),
+            'docsPerShard': DOCS_PER_SHARD,
+            'thai': thai_mode(),
+            'stop': stopwords,
+        }
+        files[SEARCH_SCRIPT_NAME] = (SEARCH_META_PREFIX + json.dumps(meta, ensure_ascii=False, sort_keys=True)
+                                     + ';\n' + SEARCH_SCRIPT)
+        return files
+
+    def write(self) -> list:
+        """เขียน index (เฉพาะไฟล์ที่เปลี่ยน) และ cache ของหน้า คืนรายการไฟล์ของ index ทั้งหมด"""
+        files = self.files()
+        with OutputBatch() as batch:
+            for name, content in files.items():
+                batch.write(os.path.join(self.search_dir, name), content.encode('utf-8'))
+        for name in os.listdir(self.search_dir):
+            # shards ที่เหลือจาก index ครั้งก่อนที่มีจำนวน shards มากกว่า (ลบหลังเขียน index ใหม่แล้ว)
+            if name not in files and re.match(r'(terms|docs)-\d+\.js(\.gz|\.br)?$', name):
+                os.unlink(os.path.join(self.search_dir, name))
+
+        # json.dumps ใช้ encoder ภาษา C (json.dump ลง stream เป็น Python ทั้งหมด)
+        cache = json.dumps({'version': SEARCH_CACHE_VERSION, 'thai': thai_mode(), 'pages': self.pages},
+                           ensure_ascii=False, separators=(',', ':'))
+        write_bytes_atomic(self.cache_path, gzip.compress(cache.encode('utf-8'), compresslevel=6))
+        return [os.path.join(self.search_dir, name) for name in sorted(files)]
+
+    @staticmethod
+    def _shard_content(name: str, data) -> str:
+        return (f'MD2HTML_SEARCH.load({json.dumps(name)},'
+                f'{json.dumps(data, ensure_ascii=False, separators=(",", ":"))});\n')
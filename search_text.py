@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Search Text Extension
+Markdown extension ที่เก็บข้อความของเอกสารแยกตามหัวข้อจาก tree ที่ parse แล้ว สำหรับสร้าง search index
+(ไม่ต้องอ่านไฟล์ HTML ที่เขียนแล้วกลับมา parse ใหม่)
+"""
+
+import re
+
+from markdown.extensions import Extension
+from markdown.treeprocessors import Treeprocessor
+
+# placeholder ของ Markdown ใน tree: \x02<ord>\x03 คืออักขระที่ escape ด้วย \ ส่วนอื่นคือ raw HTML/code ที่ stash ไว้
+ESCAPED_CHAR_PATTERN = re.compile('\x02(\\d+)\x03')
+PLACEHOLDER_PATTERN = re.compile('\x02[^\x03]*\x03')
+
+HEADING_TAGS = ('h1', 'h2', 'h3', 'h4', 'h5', 'h6')
+
+
+def _element_text(element) -> str:
+    """ข้อความใน element (ไม่รวม permalink ของหัวข้อ)"""
+    parts = [element.text or '']
+    for child in element:
+        if child.get('class') != 'headerlink':
+            parts.append(_element_text(child))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+
+def _clean_text(text: str) -> str:
+    """คืนอักขระที่ถูก escape และลบ placeholder ของ raw HTML/code ที่ stash ไว้"""
+    text = ESCAPED_CHAR_PATTERN.sub(lambda match: chr(int(match.group(1))), text)
+    return PLACEHOLDER_PATTERN.sub(' ', text)
+
+
+class SearchTextProcessor(Treeprocessor):
+    """เก็บข้อความของเอกสารแยกตามหัวข้อระดับบนสุดลง md.search_sections (ไม่ทำอะไรถ้าเป็น None)
+
+    ทำงานหลัง toc (หัวข้อมี id แล้ว) section ใหม่เริ่มที่แต่ละหัวข้อ: [id, ชื่อหัวข้อ, [ข้อความ, ...]]
+    ข้อความก่อนหัวข้อแรกต่อท้าย section สุดท้ายของรายการ (เช่นจาก chunk ก่อนหน้าเมื่อแปลงแบบ streaming)
+    """
+
+    def run(self, root):
+        sections = getattr(self.md, 'search_sections', None)
+        if sections is None:
+            return
+        for element in root:
+            if element.tag in HEADING_TAGS:
+                sections.append([element.get('id', ''), _clean_text(_element_text(element)).strip(), []])
+                continue
+            text = _clean_text(_element_text(element)).strip()
+            if text:
+                if not sections:
+                    sections.append(['', '', []])
+                sections[-1][2].append(text)
+
+
+class SearchTextExtension(Extension):
+    """extension ที่เพิ่ม SearchTextProcessor (ข้อความถูกเก็บเฉพาะเมื่อตั้ง md.search_sections)"""
+
+    def extendMarkdown(self, md):
+        md.search_sections = None
+        md.treeprocessors.register(SearchTextProcessor(md), 'search_text', 4)
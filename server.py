@@ -0,0 +1,580 @@
+#!/usr/bin/env python3
+"""
+Conversion Daemon
+เซิร์ฟเวอร์ที่เก็บ MarkdownConverter ที่อุ่นเครื่องแล้วไว้ในหน่วยความจำ และรับคำขอแปลงผ่าน
+localhost HTTP หรือ Unix socket (ไม่ต้องเสียเวลาเริ่ม interpreter/import/สร้าง converter ทุกครั้ง)
+
+API (JSON):
+  GET  /health    สถานะและสถิติของเซิร์ฟเวอร์
+  POST /convert   {"task": {...}, "include_images": true, "template_path": null} -> ผลลัพธ์แบบ batch
+  POST /render    {"content": "...", "title": "...", "stylesheet_href": null} -> HTML (text/html)
+  POST /shutdown  ปิดเซิร์ฟเวอร์
+
+ทุกคำขอต้องมี token ของ daemon ใน header X-MD2HTML-Token และ POST ต้องเป็น Content-Type: application/json
+คำขอที่มี header Origin (ส่งมาจากหน้าเว็บในเบราว์เซอร์) หรือ Host ที่ไม่ใช่ localhost ถูกปฏิเสธ
+token สุ่มใหม่ทุกครั้งที่เริ่ม daemon (หรือใช้ MD2HTML_SERVER_TOKEN) และเขียนลงไฟล์ที่มีเพียงเจ้าของอ่านได้
+client ในเครื่องเดียวกันอ่าน token จากไฟล์นี้
+"""
+
+import argparse
+import hmac
+import http.client
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from batch_converter import convert_task, create_converter
+from scanner import user_cache_dir
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+
+# ขนาดสูงสุดของ request body (ไฟล์ใหญ่กว่านี้ให้ส่งเป็น path ผ่าน /convert)
+MAX_REQUEST_SIZE = 64 * 1024 * 1024
+
+# จำนวน converters (แยกตาม include_images, template_path) สูงสุดที่ daemon เก็บไว้ (LRU)
+MAX_CONVERTERS = 8
+
+# header ที่ client ส่ง token ของ daemon และ environment variable สำหรับกำหนด token เอง
+TOKEN_HEADER = 'X-MD2HTML-Token'
+TOKEN_ENV = 'MD2HTML_SERVER_TOKEN'
+
+# key ของ task และ options ที่ /convert รับ (options ที่ทำให้อ่านไฟล์อื่น เช่น mermaid_js_inline ไม่ได้รับ)
+CONVERT_TASK_KEYS = {'path', 'output', 'title', 'options', 'stream', 'profile'}
+CONVERT_OPTIONS = {'stylesheet_href', 'mermaid_js_href'}
+
+
+def parse_address(spec: str):
+    """แปลงที่อยู่เซิร์ฟเวอร์เป็น ('unix', path) หรือ ('tcp', host, port)
+
+    รูปแบบที่รองรับ: unix:/path/to.sock, http://host:port, host:port, port
+    """
+    if spec.startswith('unix:'):
+        return ('unix', spec[len('unix:'):])
+    if spec.startswith('http://'):
+        spec = spec[len('http://'):].rstrip('/')
+    host, _, port = spec.rpartition(':')
+    try:
+        return ('tcp', host or DEFAULT_HOST, int(port))
+    except ValueError:
+        raise Exception(f"Invalid server address: {spec}")
+
+
+def format_address(address) -> str:
+    """แสดงที่อยู่เซิร์ฟเวอร์ในรูปแบบเดียวกับที่ parse_address รับ"""
+    if address[0] == 'unix':
+        return f"unix:{address[1]}"
+    return f"http://{address[1]}:{address[2]}"
+
+
+def is_loopback_host(host: str) -> bool:
+    """host เป็นชื่อหรือ IP ของเครื่องตัวเอง (localhost, 127.0.0.0/8, ::1) หรือไม่"""
+    host = host.strip('[]')
+    if host.lower() == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def token_path(address) -> str:
+    """ไฟล์ token ของ daemon ที่อยู่ address (ข้าง Unix socket หรือใน cache ของผู้ใช้ตาม port)"""
+    if address[0] == 'unix':
+        return address[1] + '.token'
+    return os.path.join(user_cache_dir(), f"server-{address[2]}.token")
+
+
+def write_token(path: str, token: str):
+    """เขียน token ลงไฟล์ใหม่ที่มีเพียงเจ้าของอ่านได้ (0600)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if os.path.exists(path):
+        os.unlink(path)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(token)
+
+
+def read_token(address) -> str:
+    """token สำหรับเชื่อมต่อ address: จาก MD2HTML_SERVER_TOKEN หรือไฟล์ token ของ daemon (None ถ้าไม่มี)"""
+    token = os.environ.get(TOKEN_ENV)
+    if token:
+        return token
+    try:
+        with open(token_path(address), 'r', encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def check_convert_request(request: dict) -> dict:
+    """ตรวจ task ของ /convert: รับเฉพาะ key และ options ที่รู้จัก และ path/output ต้องเป็น absolute path"""
+    task = request['task']
+    if not isinstance(task, dict):
+        raise TypeError("task must be an object")
+    unknown = set(task) - CONVERT_TASK_KEYS
+    if unknown:
+        raise TypeError(f"Unsupported task field(s): {', '.join(sorted(unknown))}")
+    for name in ('path', 'output'):
+        if not isinstance(task[name], str) or not os.path.isabs(task[name]):
+            raise TypeError(f"task {name} must be an absolute path")
+    options = task.setdefault('options', {})
+    if not isinstance(options, dict):
+        raise TypeError("task options must be an object")
+    unknown = set(options) - CONVERT_OPTIONS
+    if unknown:
+        raise TypeError(f"Unsupported option(s): {', '.join(sorted(unknown))}")
+    if any(value is not None and not isinstance(value, str) for value in options.values()):
+        raise TypeError("option values must be strings")
+    return task
+
+
+class ConversionService:
+    """converters ที่อุ่นเครื่องไว้ แยกตาม (include_images, template_path)
+
+    MarkdownConverter ใช้ ConverterPool อยู่แล้ว จึงใช้ converter เดียวกันจากหลาย thread ได้
+    เก็บไม่เกิน max_converters ตัว (ตัวที่ไม่ได้ใช้นานที่สุดถูกทิ้ง) เพื่อให้ daemon ที่รันนานไม่โตไม่สิ้นสุด
+    """
+
+    def __init__(self, highlight_cache_dir: str = None, max_converters: int = MAX_CONVERTERS):
+        self.highlight_cache_dir = highlight_cache_dir
+        self.max_converters = max_converters
+        self._converters = OrderedDict()
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.failed = 0
+
+    def converter(self, include_images: bool = True, template_path: str = None):
+        """converter ของการตั้งค่านี้ (สร้างครั้งแรกเมื่อถูกขอ)"""
+        key = (include_images, template_path)
+        with self._lock:
+            converter = self._converters.get(key)
+            if converter is None:
+                converter = create_converter(include_images, {
+                    'template_path': template_path,
+                    'highlight_cache_dir': self.highlight_cache_dir,
+                })
+                self._converters[key] = converter
+                # converter ที่ถูกทิ้งอาจยังแปลงคำขอเดิมอยู่ จึงไม่เรียก cleanup() แต่ปล่อยให้ถูกเก็บกวาดเมื่อใช้เสร็จ
+                # (converters ของ daemon ไม่ render diagrams ตอน build จึงไม่มีไฟล์ชั่วคราวที่ต้องลบ)
+                while len(self._converters) > self.max_converters:
+                    self._converters.popitem(last=False)
+            else:
+                self._converters.move_to_end(key)
+        return converter
+
+    def request_converter(self, request: dict):
+        """converter ตาม include_images/template_path ของคำขอ"""
+        include_images = request.get('include_images', True)
+        template_path = request.get('template_path')
+        if not isinstance(include_images, bool):
+            raise TypeError("include_images must be a boolean")
+        if template_path is not None and not isinstance(template_path, str):
+            raise TypeError("template_path must be a string")
+        return self.converter(include_images, template_path)
+
+    def warm(self, include_images: bool = True, template_path: str = None):
+        """แปลงเอกสารตัวอย่างหนึ่งครั้ง เพื่อโหลด extensions, Pygments และ template ล่วงหน้า"""
+        self.converter(include_images, template_path).warm()
+
+    def _count(self, failed: bool):
+        with self._lock:
+            self.requests += 1
+            if failed:
+                self.failed += 1
+
+    def convert(self, request: dict) -> dict:
+        """แปลงไฟล์ตาม task (path และ output เป็น absolute path บนเครื่องเดียวกัน)"""
+        task = check_convert_request(request)
+        converter = self.request_converter(request)
+        result = convert_task(converter, task)
+        self._count(result['status'] == 'failed')
+        return result
+
+    def render(self, request: dict) -> bytes:
+        """แปลงเนื้อหา Markdown ที่ส่งมาโดยตรง คืนหน้า HTML เป็น bytes"""
+        if not isinstance(request['content'], str):
+            raise TypeError("content must be a string")
+        converter = self.request_converter(request)
+        try:
+            html_bytes = converter.convert_to_bytes(request['content'], request.get('title', 'Document'),
+                                                    request.get('stylesheet_href'))
+        except Exception:
+            self._count(True)
+            raise
+        self._count(False)
+        return html_bytes
+
+    def health(self) -> dict:
+        """สถานะของเซิร์ฟเวอร์"""
+        with self._lock:
+            converters = list(self._converters.values())
+            status = {
+                'status': 'ok',
+                'pid': os.getpid(),
+                'uptime': time.time() - self.started,
+                'requests': self.requests,
+                'failed': self.failed,
+                'converters': len(converters),
+            }
+        if converters:
+            status['highlight'] = converters[0].highlight_cache.stats()
+        return status
+
+    def cleanup(self):
+        """ลบไฟล์ชั่วคราวของทุก converter"""
+        with self._lock:
+            converters = list(self._converters.values())
+            self._converters.clear()
+        for converter in converters:
+            converter.cleanup()
+
+
+class ConversionRequestHandler(BaseHTTPRequestHandler):
+    """จัดการคำขอ HTTP ของ conversion daemon"""
+
+    server_version = 'md2html'
+    # keep-alive เพื่อให้ client ที่ส่งหลายคำขอไม่ต้องเชื่อมต่อใหม่ทุกครั้ง
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        # ปิด Nagle บน TCP: header และ body ถูกเขียนแยกกัน ซึ่งทำให้ keep-alive ช้าไป ~40 ms ต่อคำขอ
+        self.disable_nagle_algorithm = self.request.family != socket.AF_UNIX
+        super().setup()
+
+    def address_string(self) -> str:
+        # Unix socket ไม่มีที่อยู่ของ client
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return 'unix'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status: int, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, data: dict):
+        self._send(status, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                   'application/json; charset=utf-8')
+
+    def _check_access(self):
+        """คืนค่า (status, ข้อความ) ถ้าต้องปฏิเสธคำขอ หรือ None ถ้าผ่าน
+
+        ป้องกันหน้าเว็บในเบราว์เซอร์ส่งคำขอข้าม origin (CSRF) และ DNS rebinding
+        """
+        if self.headers.get('Origin') is not None:
+            return 403, "Cross-origin requests are not allowed"
+        host = self.headers.get('Host')
+        if host is not None:
+            name = host.rsplit(':', 1)[0] if not host.endswith(']') else host
+            if not is_loopback_host(name) and name.strip('[]') not in self.server.allowed_hosts:
+                return 403, f"Host not allowed: {host}"
+        token = self.headers.get(TOKEN_HEADER) or ''
+        if not hmac.compare_digest(token.encode('utf-8'), self.server.token.encode('utf-8')):
+            return 401, f"Missing or invalid {TOKEN_HEADER} header"
+        return None
+
+    def _reject(self, status: int, message: str):
+        # อ่าน body ที่ยังค้างก่อนปิดการเชื่อมต่อ ไม่เช่นนั้น client ได้ connection reset แทนคำตอบ
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = 0
+        if 0 < length <= MAX_REQUEST_SIZE:
+            self.rfile.read(length)
+        self.close_connection = True
+        self._send_json(status, {'error': message})
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_REQUEST_SIZE:
+            raise ValueError(f"Request body too large ({length} bytes)")
+        body = self.rfile.read(length) if length else b'{}'
+        return json.loads(body.decode('utf-8'))
+
+    def do_GET(self):
+        denied = self._check_access()
+        if denied:
+            self._reject(*denied)
+            return
+        if self.path == '/health':
+            self._send_json(200, self.server.service.health())
+        else:
+            self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self):
+        denied = self._check_access()
+        if denied:
+            self._reject(*denied)
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._reject(415, "Content-Type must be application/json")
+            return
+        try:
+            request = self._read_json()
+            if not isinstance(request, dict):
+                raise ValueError("body must be a JSON object")
+        except (ValueError, UnicodeDecodeError) as e:
+            self.close_connection = True
+            self._send_json(400, {'error': f"Invalid request: {e}"})
+            return
+
+        service = self.server.service
+        try:
+            if self.path == '/convert':
+                self._send_json(200, service.convert(request))
+            elif self.path == '/render':
+                self._send(200, service.render(request), 'text/html; charset=utf-8')
+            elif self.path == '/shutdown':
+                self._send_json(200, {'status': 'shutting down'})
+                # shutdown() ต้องเรียกจาก thread อื่นที่ไม่ใช่ thread ของ serve_forever
+                threading.Thread(target=self.server.shutdown, daemon=True).start()
+            else:
+                self._send_json(404, {'error': f"Unknown endpoint: {self.path}"})
+        except KeyError as e:
+            self._send_json(400, {'error': f"Missing field: {e}"})
+        except TypeError as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': str(e)})
+
+
+class TCPConversionServer(ThreadingHTTPServer):
+    """daemon บน localhost HTTP"""
+    daemon_threads = True
+
+
+class UnixConversionServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """daemon บน Unix socket (ใช้ HTTP เหมือนกัน)"""
+    daemon_threads = True
+
+    def server_bind(self):
+        # ลบ socket ที่ค้างจากเซิร์ฟเวอร์ที่ปิดไปแล้ว แต่ไม่แย่ง socket ของเซิร์ฟเวอร์ที่ยังทำงาน
+        if os.path.exists(self.server_address):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.server_address)
+            except OSError:
+                os.unlink(self.server_address)
+            else:
+                raise Exception(f"Another server is already listening on {self.server_address}")
+            finally:
+                probe.close()
+        super().server_bind()
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.server_address)
+        except OSError:
+            pass
+
+
+def create_server(address, service: ConversionService, token: str, verbose: bool = False):
+    """สร้างเซิร์ฟเวอร์ตามที่อยู่ ('unix', path) หรือ ('tcp', host, port) ที่รับเฉพาะคำขอที่มี token"""
+    if address[0] == 'unix':
+        server = UnixConversionServer(address[1], ConversionRequestHandler)
+        server.allowed_hosts = set()
+    else:
+        server = TCPConversionServer((address[1], address[2]), ConversionRequestHandler)
+        # host ที่ bind ไว้ (เมื่อไม่ใช่ localhost) เป็น Host header ที่ client ภายนอกใช้ได้
+        server.allowed_hosts = {address[1].strip('[]')}
+    server.service = service
+    server.token = token
+    server.verbose = verbose
+    return server
+
+
+def serve(address, template_path: str = None, highlight_cache_dir: str = None,
+          include_images: bool = True, verbose: bool = False, token: str = None):
+    """รันเซิร์ฟเวอร์จนกว่าจะได้รับ /shutdown หรือ Ctrl+C
+
+    token=None สุ่ม token ใหม่ (ใช้ได้เฉพาะ localhost และ Unix socket)
+    token ถูกเขียนลงไฟล์ token_path(address) สำหรับ client ในเครื่อง และลบเมื่อเซิร์ฟเวอร์ปิด
+    """
+    if address[0] == 'tcp' and not is_loopback_host(address[1]) and not token:
+        raise Exception(f"Refusing to listen on non-loopback host {address[1]} without a token "
+                        f"(set {TOKEN_ENV})")
+    token = token or secrets.token_urlsafe(32)
+    service = ConversionService(highlight_cache_dir)
+    service.warm(include_images, template_path)
+    server = create_server(address, service, token, verbose)
+    if address[0] == 'tcp':
+        # port 0 = ให้ระบบเลือก port ว่าง
+        address = ('tcp', address[1], server.server_address[1])
+    token_file = token_path(address)
+    try:
+        write_token(token_file, token)
+        print(f"md2html server listening on {format_address(address)} (pid {os.getpid()})", flush=True)
+        print(f"Token file: {token_file}", flush=True)
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        server.server_close()
+        service.cleanup()
+        try:
+            os.unlink(token_file)
+        except OSError:
+            pass
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection ที่เชื่อมต่อผ่าน Unix socket"""
+
+    def __init__(self, path: str, timeout: float = None):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ConversionClient:
+    """client ของ conversion daemon (ใช้การเชื่อมต่อเดิมซ้ำระหว่างคำขอ)"""
+
+    def __init__(self, address, timeout: float = 300, token: str = None):
+        self.address = parse_address(address) if isinstance(address, str) else address
+        self.timeout = timeout
+        # token ของ daemon (None = อ่านจาก MD2HTML_SERVER_TOKEN หรือไฟล์ token ของ daemon)
+        self.token = token or read_token(self.address)
+        self._connection = None
+
+    def _connect(self):
+        if self.address[0] == 'unix':
+            return _UnixHTTPConnection(self.address[1], self.timeout)
+        return http.client.HTTPConnection(self.address[1], self.address[2], timeout=self.timeout)
+
+    def _request(self, method: str, path: str, payload: dict = None):
+        """ส่งคำขอและคืนค่า (status, content type, body) เชื่อมต่อใหม่หนึ่งครั้งถ้าการเชื่อมต่อเดิมถูกปิด"""
+        body = json.dumps(payload).encode('utf-8') if payload is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        if self.token:
+            headers[TOKEN_HEADER] = self.token
+        for attempt in range(2):
+            reused = self._connection is not None
+            if not reused:
+                self._connection = self._connect()
+            try:
+                self._connection.request(method, path, body, headers)
+                response = self._connection.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                self.close()
+                raise
+            if response.will_close:
+                self.close()
+            return response.status, response.getheader('Content-Type', ''), data
+
+    def _request_json(self, method: str, path: str, payload: dict = None) -> dict:
+        status, _, data = self._request(method, path, payload)
+        result = json.loads(data.decode('utf-8'))
+        if status in (401, 403):
+            raise PermissionError(f"Server refused the request ({status}): {result.get('error')}")
+        if status != 200:
+            raise Exception(f"Server error ({status}): {result.get('error')}")
+        return result
+
+    def convert(self, task: dict, include_images: bool = True, template_path: str = None) -> dict:
+        """ให้เซิร์ฟเวอร์แปลงไฟล์ตาม task (path จะถูกแปลงเป็น absolute path)"""
+        task = dict(task)
+        task['path'] = os.path.abspath(task['path'])
+        task['output'] = os.path.abspath(task['output'])
+        return self._request_json('POST', '/convert', {
+            'task': task,
+            'include_images': include_images,
+            'template_path': os.path.abspath(template_path) if template_path else None,
+        })
+
+    def render(self, content: str, title: str = "Document", stylesheet_href: str = None,
+               include_images: bool = True, template_path: str = None) -> bytes:
+        """ให้เซิร์ฟเวอร์แปลงเนื้อหา Markdown และคืนหน้า HTML เป็น bytes"""
+        status, _, data = self._request('POST', '/render', {
+            'content': content,
+            'title': title,
+            'stylesheet_href': stylesheet_href,
+            'include_images': include_images,
+            'template_path': os.path.abspath(template_path) if template_path else None,
+        })
+        if status != 200:
+            raise Exception(f"Server error ({status}): {json.loads(data.decode('utf-8')).get('error')}")
+        return data
+
+    def health(self) -> dict:
+        """สถานะของเซิร์ฟเวอร์"""
+        return self._request_json('GET', '/health')
+
+    def shutdown(self) -> dict:
+        """สั่งปิดเซิร์ฟเวอร์"""
+        return self._request_json('POST', '/shutdown', {})
+
+    def close(self):
+        """ปิดการเชื่อมต่อ"""
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def main(argv: list = None):
+    """command line ของ `main.py serve`"""
+    parser = argparse.ArgumentParser(
+        prog='main.py serve',
+        description="Keep warmed converters resident and accept conversion requests",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python main.py serve --socket /tmp/md2html.sock
+  python main.py serve --port 8765
+  python main.py input.md -o output.html --server unix:/tmp/md2html.sock
+        """
+    )
+    parser.add_argument('--socket', metavar='PATH',
+                        help='Listen on a Unix socket instead of localhost HTTP')
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help=f'Host to bind for HTTP (default: {DEFAULT_HOST}); a non-loopback host '
+                             f'requires a token in {TOKEN_ENV}')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help=f'Port to bind for HTTP, 0 = any free port (default: {DEFAULT_PORT})')
+    parser.add_argument('--template',
+                        help='HTML template file to warm up (requests may use other templates)')
+    parser.add_argument('--highlight-cache', metavar='DIR',
+                        help='Folder for the persistent syntax-highlighting cache')
+    parser.add_argument('--verbose', '-v', action='store_true',
+                        help='Log every request')
+    args = parser.parse_args(argv)
+
+    address = ('unix', args.socket) if args.socket else ('tcp', args.host, args.port)
+    template_path = os.path.abspath(args.template) if args.template else None
+    try:
+        serve(address, template_path, args.highlight_cache, verbose=args.verbose,
+              token=os.environ.get(TOKEN_ENV))
+    except Exception as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
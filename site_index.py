@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Site Build Index
+สร้าง site จากโฟลเดอร์ของไฟล์ Markdown: คงโครงสร้างโฟลเดอร์, เขียนลิงก์ .md เป็น .html
+และรวมหัวข้อ (toc tokens) ของทุกหน้าเป็น index เดียว ซึ่งถูกเขียนเป็น asset สำหรับเมนูนำทางของทุกหน้า
+"""
+
+import html
+import json
+import os
+import posixpath
+import re
+
+from output_writer import write_output
+
+# asset ที่เก็บ index ของ site และโค้ดสร้างเมนูนำทาง (โหลดได้แม้เปิดหน้าผ่าน file://)
+SITE_ASSET_NAME = 'md2html-site.js'
+SITE_ASSET_PREFIX = 'window.MD2HTML_SITE = '
+SITE_ASSET_SUFFIX = ';\n'
+
+# ระดับหัวข้อลึกสุดที่แสดงในเมนูนำทางของหน้าปัจจุบัน
+NAV_HEADING_LEVEL = 3
+
+# ลิงก์ relative ไปยังไฟล์ .md (ไม่มี scheme เช่น http: หรือ mailto: และไม่ใช่ //host)
+MARKDOWN_LINK_PATTERN = re.compile(r'(<a\b[^>]*?\shref=")(?!/)([^"#?:]*?)\.md(\?[^"#]*)?(#[^"]*)?"')
+
+# สร้างเมนูนำทางใน <nav class="site-nav"> จาก window.MD2HTML_SITE
+# (หน้าใน root ก่อนแล้วตามด้วยแต่ละโฟลเดอร์ย่อย ชื่อหน้าและหัวข้อเป็น HTML ที่ escape แล้วจึงใส่ด้วย innerHTML)
+NAV_SCRIPT = """\
+(function () {
+  var site = window.MD2HTML_SITE;
+  var nav = document.querySelector('nav.site-nav');
+  if (!site || !nav) return;
+  var current = nav.getAttribute('data-page');
+  var root = nav.getAttribute('data-root');
+  function link(href, label) {
+    var a = document.createElement('a');
+    a.href = href;
+    a.innerHTML = label;
+    return a;
+  }
+  function folderOf(page) {
+    return page.slice(0, page.lastIndexOf('/') + 1);
+  }
+  var pages = Object.keys(site.pages).sort(function (a, b) {
+    var fa = folderOf(a), fb = folderOf(b);
+    if (fa !== fb) return fa < fb ? -1 : 1;
+    return a < b ? -1 : (a > b ? 1 : 0);
+  });
+  var list = document.createElement('ul');
+  var folder = '';
+  pages.forEach(function (page) {
+    var entry = site.pages[page];
+    if (folderOf(page) !== folder) {
+      folder = folderOf(page);
+      var label = document.createElement('li');
+      label.className = 'site-folder';
+      label.textContent = folder;
+      list.appendChild(label);
+    }
+    var item = document.createElement('li');
+    item.appendChild(link(root + page, entry.title));
+    if (page === current) {
+      item.className = 'current';
+      var headings = document.createElement('ul');
+      entry.headings.forEach(function (heading) {
+        if (heading[0] > site.level) return;
+        var sub = document.createElement('li');
+        sub.className = 'level-' + heading[0];
+        sub.appendChild(link('#' + heading[1], heading[2]));
+        headings.appendChild(sub);
+      });
+      if (headings.firstChild) item.appendChild(headings);
+    }
+    list.appendChild(item);
+  });
+  nav.appendChild(list);
+})();
+"""
+
+
+def site_page_name(source_path: str, source_root: str) -> str:
+    """path ของหน้า HTML ใน site (relative กับ root, คั่นด้วย /) ที่ตรงกับโครงสร้างโฟลเดอร์ของไฟล์ต้นฉบับ"""
+    relative = os.path.relpath(os.path.abspath(source_path), os.path.abspath(source_root))
+    return os.path.splitext(relative)[0].replace(os.sep, '/') + '.html'
+
+
+def site_root(files: list, input_path: str) -> str:
+    """โฟลเดอร์ root ของ site: โฟลเดอร์อินพุต หรือโฟลเดอร์ร่วมของทุกไฟล์ที่ตรงกับ glob pattern"""
+    if os.path.isdir(input_path):
+        return input_path
+    return os.path.commonpath([os.path.dirname(os.path.abspath(path)) for path in files])
+
+
+def new_page_index(page: str, title: str, search: bool = False) -> dict:
+    """ข้อมูลของหน้าที่ converter เติมระหว่างแปลง
+
+    headings จาก toc, ลิงก์ .md ที่ถูกเขียนใหม่ และ sections (ข้อความของแต่ละหัวข้อ) เมื่อ search=True
+    """
+    page_index = {'page': page, 'title': title, 'headings': [], 'links': []}
+    if search:
+        page_index['sections'] = []
+    return page_index
+
+
+def rewrite_links(body_html: str, links: list = None) -> str:
+    """เขียนลิงก์ relative ไปยังไฟล์ .md เป็น .html โดยคง ?query และ #fragment (เก็บ href ใหม่ลง links ถ้าระบุ)"""
+    def replace(match):
+        href = match.group(2) + '.html' + (match.group(3) or '') + (match.group(4) or '')
+        if links is not None:
+            links.append(html.unescape(href))
+        return f'{match.group(1)}{href}"'
+
+    return MARKDOWN_LINK_PATTERN.sub(replace, body_html)
+
+
+def site_nav(site_href: str, site_page: str) -> str:
+    """ตำแหน่งของเมนูนำทางที่ต้นหน้า (data-root คือ URL relative จากหน้าไปยัง root ของ site)"""
+    root = posixpath.dirname(site_href)
+    root = root + '/' if root else ''
+    return (f'<nav class="site-nav" data-page="{html.escape(site_page)}" '
+            f'data-root="{html.escape(root)}"></nav>\n')
+
+
+def site_script(site_href: str) -> str:
+    """<script> ที่โหลด index ของ site และสร้างเมนูนำทาง ('' ถ้าไม่ใช่หน้าของ site)"""
+    if not site_href:
+        return ''
+    return f'<script src="{html.escape(site_href)}"></script>\n'
+
+
+class SiteIndex:
+    """index ของหัวข้อทุกหน้าใน site: {หน้า: {'title', 'headings': [[level, id, name], ...]}}"""
+
+    def __init__(self, pages: dict = None):
+        self.pages = pages or {}
+
+    @classmethod
+    def load(cls, asset_path: str):
+        """อ่าน index จาก asset ที่เขียนไว้ครั้งก่อน (index ว่างถ้ายังไม่มีไฟล์หรืออ่านไม่ได้)"""
+        try:
+            with open(asset_path, 'r', encoding='utf-8') as f:
+                line = f.readline()
+            if line.startswith(SITE_ASSET_PREFIX) and line.endswith(SITE_ASSET_SUFFIX):
+                data = json.loads(line[len(SITE_ASSET_PREFIX):-len(SITE_ASSET_SUFFIX)])
+                return cls(data['pages'])
+        except (OSError, ValueError, KeyError):
+            pass
+        return cls()
+
+    def add(self, page_index: dict):
+        """เพิ่มหรือแทนที่ข้อมูลของหน้าจากผลการแปลง (ชื่อหน้าคือหัวข้อระดับ 1 แรก ถ้ามี)"""
+        headings = [[token['level'], token['id'], token['name']] for token in page_index['headings']]
+        title = next((name for level, _, name in headings if level == 1), html.escape(page_index['title']))
+        self.pages[page_index['page']] = {'title': title, 'headings': headings}
+
+    def retain(self, pages):
+        """ลบหน้าที่ไม่อยู่ใน pages แล้ว (ไฟล์ต้นฉบับถูกลบหรือถูก exclude)"""
+        keep = set(pages)
+        for page in [page for page in self.pages if page not in keep]:
+            del self.pages[page]
+
+    def broken_links(self, page_index: dict) -> list:
+        """ลิงก์ .md ของหน้าที่ชี้ไปยังหน้าหรือ anchor ที่ไม่มีใน site"""
+        broken = []
+        base = posixpath.dirname(page_index['page'])
+        anchors = {}
+        for href in page_index['links']:
+            path, _, fragment = href.partition('#')
+            path = path.partition('?')[0]
+            target = posixpath.normpath(posixpath.join(base, path))
+            entry = self.pages.get(target)
+            if entry is None:
+                broken.append(f"{href} (page not found)")
+                continue
+            if fragment:
+                if target not in anchors:
+                    anchors[target] = {heading[1] for heading in entry['headings']}
+                if fragment not in anchors[target]:
+                    broken.append(f"{href} (anchor not found)")
+        return broken
+
+    def check_links(self, page_indexes: list) -> list:
+        """[(หน้า, ลิงก์ที่เสีย)] ของทุกหน้าใน page_indexes"""
+        return [(page_index['page'], link) for page_index in page_indexes
+                for link in self.broken_links(page_index)]
+
+    def content(self) -> str:
+        """เนื้อหาของ asset: index เป็น JSON บรรทัดแรก ตามด้วยโค้ดสร้างเมนูนำทาง"""
+        data = json.dumps({'level': NAV_HEADING_LEVEL, 'pages': self.pages},
+                          ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+        return SITE_ASSET_PREFIX + data + SITE_ASSET_SUFFIX + NAV_SCRIPT
+
+    def write(self, asset_path: str) -> bool:
+        """เขียน asset ของ site เมื่อเนื้อหาเปลี่ยน คืนค่า True ถ้าไฟล์ถูกเขียนใหม่"""
+        return write_output(asset_path, self.content().encode('utf-8'))
+
+
+def update_site_asset(asset_path: str, page_indexes: list, pages: list = None, replace: bool = False):
+    """รวมข้อมูลของหน้าที่แปลงใหม่เข้ากับ index ของ site และเขียน asset ใหม่เมื่อเปลี่ยน
+
+    หน้าที่ไม่ได้แปลงใหม่ (cached) ใช้ข้อมูลเดิมจาก asset ยกเว้น replace=True (ทุกหน้าถูกแปลงใหม่)
+    pages คือรายการหน้าทั้งหมดของ site (หน้าอื่นถูกลบออกจาก index, None = เก็บทุกหน้า)
+    คืนค่า (asset ถูกเขียนใหม่หรือไม่, [(หน้า, ลิงก์ที่เสีย)] ของหน้าที่แปลงใหม่)
+    """
+    index = SiteIndex() if replace else SiteIndex.load(asset_path)
+    for page_index in page_indexes:
+        index.add(page_index)
+    if pages is not None:
+        index.retain(pages)
+    return index.write(asset_path), index.check_links(page_indexes)
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Streaming Conversion for Large Markdown Files
+แปลงไฟล์ Markdown ขนาดใหญ่ทีละส่วน โดยตัดที่ขอบ block ระดับบนสุด แล้วเขียน HTML ลงไฟล์ทันที
+หน่วยความจำที่ใช้จึงขึ้นกับขนาดของแต่ละส่วน ไม่ใช่ขนาดของไฟล์ทั้งไฟล์
+"""
+
+import hashlib
+import html
+import io
+import os
+import re
+import tempfile
+
+from assets import page_head
+from fenced_blocks import FenceTracker
+from output_writer import OUTPUT_BUFFER_SIZE, AtomicOutput
+from profiling import profile_stage
+from search_index import search_box, search_script
+from site_index import rewrite_links, site_nav, site_script
+
+# ขนาดโดยประมาณของ Markdown แต่ละส่วนที่แปลงในครั้งเดียว
+# (ส่วนเล็กช่วยเลี่ยงเวลาแบบ O(n²) ของ fenced_code เมื่อมี code blocks จำนวนมาก)
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# ไฟล์ที่ใหญ่กว่านี้จะถูกแปลงแบบ streaming โดยอัตโนมัติ
+STREAM_THRESHOLD = 64 * 1024 * 1024
+
+TOC_MARKER = '[TOC]'
+TOC_PLACEHOLDER = '<!-- md2html:toc -->'
+
+REFERENCE_PATTERN = re.compile(r'^ {0,3}\[[^\]^][^\]]*\]:\s*\S')
+# บรรทัดที่อาจเป็นส่วนต่อของ block ก่อนหน้า (list, blockquote, table, raw HTML)
+CONTINUATION_PATTERN = re.compile(r'^(?:[-*+>|<]|\d+[.)])')
+
+
+def scan_markdown_lines(lines):
+    """หา reference link definitions และ [TOC] marker จากบรรทัดของเอกสาร (นอก fenced blocks)
+
+    คืนค่า (ข้อความ reference definitions ทั้งหมด, มี [TOC] หรือไม่)
+    """
+    references = []
+    has_toc = False
+    fence = FenceTracker()
+    for line in lines:
+        if fence.feed(line) or fence.inside:
+            continue
+        if REFERENCE_PATTERN.match(line):
+            references.append(line if line.endswith('\n') else line + '\n')
+        elif line.strip() == TOC_MARKER:
+            has_toc = True
+    return ''.join(references), has_toc
+
+
+def prescan_markdown(file_path: str):
+    """อ่านไฟล์รอบแรกแบบเบา ๆ เพื่อหา reference link definitions และ [TOC] marker"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return scan_markdown_lines(f)
+
+
+def iter_markdown_chunks(lines, chunk_size: int = STREAM_CHUNK_SIZE):
+    """แบ่งบรรทัดของ Markdown เป็นส่วน ๆ ที่ขอบ block ระดับบนสุด
+
+    จะตัดก็ต่อเมื่ออยู่นอก fenced block (รวม mermaid) บรรทัดก่อนหน้าเป็นบรรทัดว่าง
+    และบรรทัดถัดไปเริ่มที่คอลัมน์แรกโดยไม่ใช่ส่วนต่อของ list/blockquote/table/HTML
+    [TOC] marker นอก code block จะถูกแทนด้วย placeholder สำหรับใส่สารบัญภายหลัง
+    """
+    fence = FenceTracker()
+    buffer = []
+    size = 0
+    previous_blank = False
+    for line in lines:
+        if (size >= chunk_size and previous_blank and not fence.inside
+                and line.strip() and not line[0].isspace()
+                and not CONTINUATION_PATTERN.match(line)):
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+
+        is_fence = fence.feed(line)
+        if not is_fence and not fence.inside and line.strip() == TOC_MARKER:
+            line = TOC_PLACEHOLDER + '\n'
+        buffer.append(line)
+        size += len(line)
+        previous_blank = not fence.inside and not line.strip()
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+class HashingReader(io.RawIOBase):
+    """อ่านไฟล์แบบ binary พร้อมคำนวณ hash ของ bytes ที่อ่านผ่านไป
+
+    hash จึงตรงกับเนื้อหาที่ถูกแปลงจริง แม้ไฟล์จะถูกแก้ไขระหว่างแปลง
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self.digest = hashlib.sha256()
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        count = self._file.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_hashed_source(file_path: str):
+    """เปิดไฟล์ Markdown แบบข้อความ (UTF-8) คืนค่า (ไฟล์, HashingReader ที่เก็บ hash ของ bytes ที่อ่านแล้ว)"""
+    reader = HashingReader(open(file_path, 'rb'))
+    return io.TextIOWrapper(io.BufferedReader(reader), encoding='utf-8'), reader
+
+
+class UniqueSlugify:
+    """slugify ที่จำ id ที่ใช้ไปแล้วข้ามทุกส่วนของเอกสาร เพื่อให้ id ของหัวข้อไม่ซ้ำกัน"""
+
+    def __init__(self):
+        from markdown.extensions.toc import slugify
+        self._slugify = slugify
+        self.used = set()
+        # เลขต่อท้ายถัดไปของแต่ละ slug (ไม่ต้องไล่นับจาก 1 ทุกครั้งเมื่อหัวข้อซ้ำกันมาก)
+        self._next_suffix = {}
+
+    def __call__(self, value: str, separator: str) -> str:
+        slug = self._slugify(value, separator)
+        candidate = slug
+        counter = self._next_suffix.get(slug, 1)
+        while candidate in self.used:
+            candidate = f"{slug}_{counter}"
+            counter += 1
+        self._next_suffix[slug] = counter
+        self.used.add(candidate)
+        return candidate
+
+
+def flatten_toc_tokens(tokens: list, flat: list):
+    """แปลง toc_tokens ที่ซ้อนกันเป็นรายการเรียงตามลำดับ"""
+    for token in tokens:
+        flat.append({key: value for key, value in token.items() if key != 'children'})
+        flatten_toc_tokens(token['children'], flat)
+
+
+def render_toc(flat_tokens: list) -> str:
+    """สร้าง HTML สารบัญ (รูปแบบเดียวกับ toc extension) จาก tokens ของทุกส่วน"""
+    from markdown.extensions.toc import nest_toc_tokens
+
+    def build_list(tokens):
+        items = []
+        for token in tokens:
+            item = f'<li><a href="#{html.escape(token["id"])}">{token["name"]}</a>'
+            if token['children']:
+                item += build_list(token['children'])
+            items.append(item + '</li>\n')
+        return '<ul>\n' + ''.join(items) + '</ul>\n'
+
+    return '<div class="toc">\n' + build_list(nest_toc_tokens(flat_tokens)) + '</div>\n'
+
+
+def convert_file_streaming(converter, input_path: str, output_path: str,
+                           title: str = "Document", stylesheet_href: str = None,
+                           diagrams_href: str = None, mermaid_js_href: str = None,
+                           mermaid_js_inline: str = None, site_href: str = None,
+                           site_page: str = None, search_href: str = None, page_index: dict = None,
+                           chunk_size: int = STREAM_CHUNK_SIZE, profile=None):
+    """แปลงไฟล์ Markdown เป็น HTML ทีละส่วนและเขียนลงไฟล์ output ทันที
+
+    ถ้ามี [TOC] จะเขียน body ลงไฟล์ชั่วคราวก่อน แล้วแทรกสารบัญของทั้งเอกสารตอนประกอบไฟล์จริง
+    ไฟล์ output ถูกเขียนแบบ atomic (AtomicOutput) และไม่ถูกแตะถ้าเนื้อหาเหมือนเดิม
+    คืนค่า (hash ของไฟล์ต้นฉบับสำหรับ build cache, ไฟล์ output ถูกเขียนใหม่หรือไม่)
+    hash คำนวณจาก bytes ที่อ่านระหว่างแปลง จึงตรงกับเนื้อหาที่อยู่ใน HTML
+    profile (DocumentProfile) รวมเวลาของทุก chunk ต่อขั้นตอน โดยการ prescan นับเป็นขั้นตอน read
+    site_href/site_page/search_href/page_index เหมือนกับ MarkdownConverter.convert_to_bytes
+    """
+    # import ภายในฟังก์ชันเพื่อไม่ให้ import วนกับ main.py
+    from main import create_markdown
+
+    with profile_stage(profile, 'read'):
+        references, has_toc = prescan_markdown(input_path)
+    if profile is not None:
+        size = os.path.getsize(input_path)
+        profile.add('read', bytes_in=size, bytes_out=size)
+    md = create_markdown({'toc': {'slugify': UniqueSlugify()}}, highlight_cache=converter.highlight_cache)
+    if page_index is not None:
+        md.search_sections = page_index.get('sections')
+    # diagrams ของทั้งเอกสาร (source แต่ละแบบถูกเขียนครั้งเดียวท้าย body)
+    diagrams = converter.new_diagram_page(diagrams_href, mermaid_js_href, mermaid_js_inline)
+    with profile_stage(profile, 'template'):
+        before_body, after_body = converter.template.split_bytes(title, page_head(stylesheet_href))
+    toc_tokens = []
+    source, hashed = open_hashed_source(input_path)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    if has_toc:
+        # body ไปไฟล์ชั่วคราวก่อน เพราะสารบัญต้องรู้หัวข้อของทั้งเอกสาร
+        fd, body_path = tempfile.mkstemp(dir=output_dir, suffix='.body.tmp')
+        body_file = os.fdopen(fd, 'wb', buffering=OUTPUT_BUFFER_SIZE)
+    else:
+        body_file = output = AtomicOutput(output_path)
+    links = page_index['links'] if page_index is not None else None
+
+    try:
+        with body_file, source:
+            if not has_toc:
+                body_file.write(before_body)
+            if search_href:
+                body_file.write(search_box(search_href).encode('utf-8'))
+            if site_href:
+                body_file.write(site_nav(site_href, site_page or '').encode('utf-8'))
+            for chunk in iter_markdown_chunks(source, chunk_size):
+                with profile_stage(profile, 'mermaid'):
+                    processed = converter.process_markdown(chunk, diagrams=diagrams)
+                if references:
+                    processed += '\n\n' + references
+                with profile_stage(profile, 'markdown'):
+                    html_chunk = md.convert(processed)
+                flatten_toc_tokens(md.toc_tokens, toc_tokens)
+                md.reset()
+                html_chunk = converter.insert_diagram_svgs(diagrams, html_chunk)
+                if site_href:
+                    html_chunk = rewrite_links(html_chunk, links)
+                with profile_stage(profile, 'write'):
+                    html_bytes = html_chunk.encode('utf-8')
+                    body_file.write(html_bytes)
+                    body_file.write(b'\n')
+                if profile is not None:
+                    profile.add_bytes('mermaid', chunk, processed)
+                    profile.add_bytes('markdown', processed, html_chunk)
+                    profile.add('write', bytes_in=len(html_bytes), bytes_out=len(html_bytes) + 1)
+            body_file.write(converter.finish_diagram_page(diagrams).encode('utf-8'))
+            body_file.write((site_script(site_href) + search_script(search_href)).encode('utf-8'))
+            if not has_toc:
+                body_file.write(after_body)
+
+        if has_toc:
+            toc_html = render_toc(toc_tokens).encode('utf-8')
+            placeholder = TOC_PLACEHOLDER.encode('utf-8')
+            output = AtomicOutput(output_path)
+            with output, open(body_path, 'rb') as body:
+                output.write(before_body)
+                for line in body:
+                    if line.strip() == placeholder:
+                        output.write(toc_html)
+                    else:
+                        output.write(line)
+                output.write(after_body)
+    finally:
+        if has_toc and os.path.exists(body_path):
+            os.unlink(body_path)
+
+    if page_index is not None:
+        page_index['headings'].extend(toc_tokens)
+    return hashed.digest.hexdigest(), output.written
@@ -0,0 +1,423 @@
+#!/usr/bin/env python3
+"""
+Watch Mode
+เฝ้าดูไฟล์หรือโฟลเดอร์ Markdown แล้วแปลงใหม่เฉพาะไฟล์ที่เปลี่ยน
+ใช้ inotify (ผ่าน ctypes) บน Linux และ polling ตาม mtime/ขนาดไฟล์บนระบบอื่น
+เหตุการณ์ที่เกิดติดกันถูกรวม (debounce) แล้วส่งเข้าคิวที่จำกัดขนาดของ worker threads
+"""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import queue
+import select
+import struct
+import sys
+import threading
+import time
+
+from build_cache import settings_hash
+
+# รอให้ไม่มีเหตุการณ์ใหม่นานเท่านี้ก่อนเริ่มแปลง (รวมการบันทึกไฟล์หลายครั้งติดกันเป็นครั้งเดียว)
+DEBOUNCE_SECONDS = 0.05
+# ไม่รอ debounce นานเกินนี้ แม้จะมีเหตุการณ์เข้ามาต่อเนื่อง
+MAX_DEBOUNCE_SECONDS = 1.0
+# ช่วงเวลาระหว่างการสแกนของ PollingWatcher
+POLL_INTERVAL = 0.5
+# จำนวนไฟล์สูงสุดที่รอในคิวแปลง (เกินนี้ตัวรับเหตุการณ์จะรอ worker)
+MAX_QUEUED = 256
+
+MARKDOWN_SUFFIXES = ('.md', '.markdown')
+
+# ค่าคงที่ของ inotify จาก <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
+
+def is_markdown_file(path: str) -> bool:
+    """ตรวจสอบนามสกุลของไฟล์ Markdown"""
+    return path.lower().endswith(MARKDOWN_SUFFIXES)
+
+
+def _scan_tree(root: str, accepts_relative=None):
+    """หาไฟล์ที่เฝ้าดูทั้งหมดใต้ root พร้อม (mtime_ns, size) ด้วย os.scandir
+
+    accepts_relative(path relative กับ root คั่นด้วย /) เลือกไฟล์ เช่น DirectoryScanner.accepts_relative
+    ที่ใช้ include/exclude เดียวกับการสแกนของ batch (None = ไฟล์ Markdown ตามนามสกุล)
+    """
+    snapshot = {}
+    directories = [(root, '')]
+    while directories:
+        directory, prefix = directories.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    directories.append((entry.path, prefix + entry.name + '/'))
+                elif (is_markdown_file(entry.name) if accepts_relative is None
+                      else accepts_relative(prefix + entry.name)):
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                continue
+    return snapshot
+
+
+class PollingWatcher:
+    """ตรวจหาไฟล์ที่เปลี่ยนโดยเทียบ (mtime, ขนาด) ของทุกไฟล์เป็นระยะ ใช้ได้ทุกระบบ"""
+
+    def __init__(self, target: str, interval: float = POLL_INTERVAL, accepts_relative=None):
+        self.target = os.path.abspath(target)
+        self.interval = interval
+        self.accepts_relative = accepts_relative
+        self._snapshot = self._scan()
+        self._next_scan = time.monotonic() + interval
+
+    def _scan(self) -> dict:
+        if os.path.isdir(self.target):
+            return _scan_tree(self.target, self.accepts_relative)
+        try:
+            stat = os.stat(self.target)
+        except OSError:
+            return {}
+        return {self.target: (stat.st_mtime_ns, stat.st_size)}
+
+    def read_events(self, timeout: float) -> list:
+        """รอไม่เกิน timeout วินาที คืนรายการ (path, 'changed' หรือ 'deleted')"""
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(max(timeout, 0))
+            return []
+        if delay > 0:
+            time.sleep(delay)
+        self._next_scan = time.monotonic() + self.interval
+
+        snapshot = self._scan()
+        events = [(path, 'changed') for path, stat in snapshot.items()
+                  if self._snapshot.get(path) != stat]
+        events.extend((path, 'deleted') for path in self._snapshot if path not in snapshot)
+        self._snapshot = snapshot
+        return events
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """รับเหตุการณ์จาก inotify ของ Linux ผ่าน ctypes (เฝ้าดูทุกโฟลเดอร์ย่อยแบบ recursive)"""
+
+    def __init__(self, target: str, accepts_relative=None):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, os.strerror(error))
+
+        self.target = os.path.abspath(target)
+        self.recursive = os.path.isdir(self.target)
+        self.accepts_relative = accepts_relative
+        # wd -> path ของโฟลเดอร์
+        self._directories = {}
+        try:
+            if self.recursive:
+                self._add_tree(self.target)
+            else:
+                # ไฟล์เดียว: เฝ้าดูโฟลเดอร์แม่ เพราะ editor หลายตัวบันทึกด้วยการ rename ไฟล์ใหม่ทับ
+                self._add_directory(os.path.dirname(self.target))
+        except OSError:
+            self.close()
+            raise
+
+    def _add_directory(self, path: str):
+        wd = self._add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"Cannot watch {path}: {os.strerror(error)}")
+        self._directories[wd] = path
+
+    def _add_tree(self, root: str) -> list:
+        """เฝ้าดู root และโฟลเดอร์ย่อยทั้งหมด คืนไฟล์ที่เฝ้าดูซึ่งมีอยู่แล้ว (สำหรับโฟลเดอร์ที่เพิ่งสร้าง)"""
+        found = []
+        for directory, dirs, files in os.walk(root):
+            try:
+                self._add_directory(directory)
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ENOTDIR):
+                    continue
+                raise
+            if self.accepts_relative is None:
+                found.extend(os.path.join(directory, name) for name in files if is_markdown_file(name))
+                continue
+            prefix = os.path.relpath(directory, self.target).replace(os.sep, '/') + '/'
+            prefix = '' if prefix == './' else prefix
+            found.extend(os.path.join(directory, name) for name in files
+                         if self.accepts_relative(prefix + name))
+        return found
+
+    def _overflow_events(self) -> list:
+        """คิวของ kernel เต็ม: ถือว่าทุกไฟล์อาจเปลี่ยน (manifest จะข้ามไฟล์ที่เหมือนเดิมให้)"""
+        if not self.recursive:
+            return [(self.target, 'changed')]
+        return [(path, 'changed') for path in _scan_tree(self.target, self.accepts_relative)]
+
+    def read_events(self, timeout: float) -> list:
+        """รอไม่เกิน timeout วินาที คืนรายการ (path, 'changed' หรือ 'deleted')"""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        if not readable:
+            return []
+
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b'\0')
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    events.extend(self._overflow_events())
+                    continue
+                directory = self._directories.get(wd)
+                if directory is None:
+                    continue
+                if mask & IN_IGNORED:
+                    del self._directories[wd]
+                    continue
+                if not name:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+
+                if mask & IN_ISDIR:
+                    if self.recursive and mask & (IN_CREATE | IN_MOVED_TO):
+                        events.extend((found, 'changed') for found in self._add_tree(path))
+                    continue
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    events.append((path, 'deleted'))
+                elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    events.append((path, 'changed'))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+def create_watcher(target: str, polling: bool = False, accepts_relative=None):
+    """สร้าง watcher ที่เหมาะกับระบบ (inotify บน Linux, polling ถ้าใช้ไม่ได้หรือระบุ polling=True)
+
+    accepts_relative เลือกไฟล์ใต้โฟลเดอร์ target ที่ watcher สแกนเอง (ดู _scan_tree)
+    """
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifyWatcher(target, accepts_relative)
+        except OSError as e:
+            print(f"Warning: inotify unavailable ({e}), falling back to polling")
+    return PollingWatcher(target, accepts_relative=accepts_relative)
+
+
+class RebuildQueue:
+    """คิวแปลงไฟล์ใหม่ที่จำกัดขนาด พร้อม worker threads ที่ใช้ converter ตัวเดียวกัน
+
+    path ที่รออยู่ในคิวแล้วจะไม่ถูกเพิ่มซ้ำ ถ้าไฟล์เปลี่ยนอีกระหว่างแปลงจะถูกแปลงใหม่อีกรอบ
+    on_result(result) ถูกเรียกหลังแปลงแต่ละไฟล์ และ on_removed(path) เมื่อไฟล์ต้นฉบับถูกลบ
+    """
+
+    def __init__(self, converter, make_task, manifest=None, include_images: bool = True,
+                 template_path: str = None, jobs: int = 2, max_queued: int = MAX_QUEUED,
+                 on_result=None, mermaid_renderer: str = None, on_removed=None):
+        self.converter = converter
+        # make_task(path) -> task dict แบบเดียวกับ build_tasks
+        self.make_task = make_task
+        self.manifest = manifest
+        self.include_images = include_images
+        self.template_path = template_path
+        self.mermaid_renderer = mermaid_renderer
+        self.on_result = on_result
+        self.on_removed = on_removed
+        self.jobs = max(1, jobs)
+        self._queue = queue.Queue(max_queued)
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._finished = []
+        self._threads = []
+
+    def start(self):
+        for _ in range(self.jobs):
+            thread = threading.Thread(target=self._worker, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, path: str):
+        """เพิ่มไฟล์เข้าคิว (รอถ้าคิวเต็ม)"""
+        with self._lock:
+            if path in self._queued:
+                return
+            self._queued.add(path)
+        self._queue.put(path)
+
+    def forget(self, path: str):
+        """ไฟล์ต้นฉบับถูกลบ: ลบออกจาก manifest (ไฟล์ HTML เดิมยังอยู่)"""
+        if self.manifest is not None:
+            with self._lock:
+                self.manifest.forget(path)
+        if self.on_removed:
+            self.on_removed(path)
+
+    def idle(self) -> bool:
+        return self._queue.unfinished_tasks == 0
+
+    def take_finished(self) -> list:
+        """ผลลัพธ์ที่แปลงเสร็จตั้งแต่การเรียกครั้งก่อน"""
+        with self._lock:
+            finished, self._finished = self._finished, []
+        return finished
+
+    def save(self):
+        """บันทึก manifest (เขียนเฉพาะเมื่อมีการเปลี่ยนแปลง)"""
+        if self.manifest is not None:
+            with self._lock:
+                self.manifest.save()
+
+    def _settings_key(self, task: dict) -> str:
+        # import ภายในฟังก์ชันเพื่อไม่ให้ import วนกับ main.py
+        from main import conversion_settings
+        return settings_hash(conversion_settings(task['title'], self.include_images,
+                                                 self.template_path, self.mermaid_renderer,
+                                                 **task['options']))
+
+    def _rebuild(self, path: str) -> dict:
+        from batch_converter import convert_task
+
+        task = self.make_task(path)
+        key = None
+        if self.manifest is not None:
+            key = self._settings_key(task)
+            with self._lock:
+                up_to_date = self.manifest.is_up_to_date(task['path'], task['output'], key)
+            if up_to_date:
+                return None
+
+        os.makedirs(os.path.dirname(task['output']) or '.', exist_ok=True)
+        result = convert_task(self.converter, task)
+        if self.manifest is not None:
+            with self._lock:
+                if result['status'] == 'converted':
+                    self.manifest.record(task['path'], task['output'], key, result['hash'])
+                else:
+                    self.manifest.forget(task['path'])
+        return result
+
+    def _worker(self):
+        while True:
+            path = self._queue.get()
+            try:
+                if path is None:
+                    return
+                with self._lock:
+                    self._queued.discard(path)
+                result = self._rebuild(path)
+                if result is not None:
+                    with self._lock:
+                        self._finished.append(result)
+                    if self.on_result:
+                        self.on_result(result)
+            except Exception as e:
+                print(f"Error rebuilding {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    def close(self):
+        """รอให้งานที่อยู่ในคิวเสร็จ แล้วหยุด worker threads"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.save()
+
+
+def watch(target: str, rebuild: RebuildQueue, is_relevant=None, polling: bool = False,
+          debounce: float = DEBOUNCE_SECONDS, on_rebuild=None, stop_event=None, accepts_relative=None):
+    """เฝ้าดู target และส่งไฟล์ที่เปลี่ยนเข้า rebuild queue จนกว่าจะ Ctrl+C หรือ stop_event ถูก set
+
+    is_relevant(path) เลือกไฟล์ที่ต้องแปลง (ค่าเริ่มต้น: ไฟล์ Markdown)
+    on_rebuild(results) ถูกเรียกหนึ่งครั้งเมื่อแปลงไฟล์ทั้งชุดเสร็จ (เช่น สั่ง reload หน้าเว็บ)
+    accepts_relative คือตัวกรองแบบเดียวกับ is_relevant สำหรับ path relative กับโฟลเดอร์ target
+    ที่ watcher ใช้ตอนสแกนหาไฟล์เอง (polling, โฟลเดอร์ใหม่ และคิวของ inotify เต็ม)
+    """
+    is_relevant = is_relevant or is_markdown_file
+    watcher = create_watcher(target, polling, accepts_relative)
+    rebuild.start()
+    pending = {}
+    first_event = last_event = 0.0
+    try:
+        while stop_event is None or not stop_event.is_set():
+            now = time.monotonic()
+            if pending:
+                timeout = min(last_event + debounce, first_event + MAX_DEBOUNCE_SECONDS) - now
+            elif not rebuild.idle():
+                timeout = 0.01
+            else:
+                timeout = 0.2 if stop_event is not None else 1.0
+            events = watcher.read_events(timeout)
+
+            now = time.monotonic()
+            for path, kind in events:
+                if not is_relevant(path):
+                    continue
+                if not pending:
+                    first_event = now
+                last_event = now
+                pending[path] = kind
+
+            if pending and (now - last_event >= debounce or now - first_event >= MAX_DEBOUNCE_SECONDS):
+                for path, kind in pending.items():
+                    if kind == 'deleted' and not os.path.exists(path):
+                        print(f"Source removed (output kept): {path}")
+                        rebuild.forget(path)
+                    else:
+                        rebuild.submit(path)
+                pending = {}
+
+            if not pending and rebuild.idle():
+                finished = rebuild.take_finished()
+                if finished:
+                    rebuild.save()
+                    if on_rebuild:
+                        on_rebuild(finished)
+    except KeyboardInterrupt:
+        print("Stopped watching")
+    finally:
+        watcher.close()
+        rebuild.close()